@@ -8,14 +8,17 @@ from math import erfc, sqrt
 import scipy.special
 from datetime import datetime
 import warnings
+import abuse_store
+import abuse_pipeline
+from abuse_identity import encode_users, decode_users
+from abuse_ip_quality import ip_group_stats
 warnings.filterwarnings('ignore')
 
 # 1. 데이터 로드
 # =========================================
-df_list   = pd.read_csv("csv_output/1_IVE_광고목록.csv")
-df_join   = pd.read_csv("csv_output/3_IVE_광고참여정보.csv")
-df_settle = pd.read_csv("csv_output/2_IVE_광고적립.csv")
-df_rpt    = pd.read_csv("csv_output/아이브1년치_참여데이터.csv", index_col=0)
+# 원천 CSV는 최초 1회만 파싱 → abuse_store(Parquet) base로 보관, 이후 단계는 라벨 컬럼만 사이드카로 저장
+# 시각/ID 정규화도 여기서 1회만 (경로는 abuse_pipeline.SOURCES)
+df_list, df_join, df_settle, df_rpt = abuse_pipeline.load_frames()
 
 # ===== 전역 파라미터 =====
 REJOIN_UNIT = "ads_code"       # 'ads_code' 또는 'ads_idx' (집계 단위)
@@ -46,48 +49,29 @@ def _ip_bad_groups(df: pd.DataFrame, key: str | None) -> set:
     if "user_ip" not in df.columns:
         return set([-1]) if key is None else set(df[key].unique())
 
-    if key is None:
-        vc = df["user_ip"].astype(str).value_counts(dropna=False)
-        rows = len(df); uniq = int(vc.size)
-        top1_share = float(vc.iloc[0]/rows) if rows else 1.0
-        unique_ratio = max(1, uniq)/max(1, rows)
-        bad = (rows >= MIN_ROWS_FOR_IP_CHECK) and ((top1_share >= IP_TOP_SHARE_TH) or (unique_ratio <= IP_UNIQUE_RATIO_TH))
-        return set([-1]) if bad else set()
-
-    g = df.groupby(key, observed=True)
-    rows = g.size()
-    uniq = g["user_ip"].apply(lambda s: s.astype(str).nunique())
-    top1 = g["user_ip"].apply(lambda s: s.astype(str).value_counts(dropna=False).max())
-    top1_share = (top1 / rows).astype(float)
-    unique_ratio = uniq.clip(lower=1) / rows.clip(lower=1)
-    bad_idx = rows.index[(rows >= MIN_ROWS_FOR_IP_CHECK) & ((top1_share >= IP_TOP_SHARE_TH) | (unique_ratio <= IP_UNIQUE_RATIO_TH))]
-    return set(bad_idx)
-
-def _build_user_id_with_guard(j: pd.DataFrame) -> pd.Series:
-    """디바이스 우선, 웹은 정책(WEB_IP_POLICY)과 IP 품질에 따라 user_id 구성."""
-    dvc = pd.to_numeric(j["dvc_idx"], errors="coerce").fillna(0).astype("Int64")
-    ip  = j["user_ip"].astype(str).str.strip() if "user_ip" in j.columns else pd.Series([""], index=j.index)
+    # 그룹별 rows/unique_ip/top1_share 1패스 집계(공용 캐시), key=None이면 group_key=-1 한 그룹
+    st = ip_group_stats(df, key)
+    bad = (st["rows"] >= MIN_ROWS_FOR_IP_CHECK) & ((st["top1_share"] >= IP_TOP_SHARE_TH) | (st["unique_ratio"] <= IP_UNIQUE_RATIO_TH))
+    return set(st.loc[bad, "group_key"])
+
+def _build_user_id_with_guard(j: pd.DataFrame) -> np.ndarray:
+    """디바이스 우선, 웹은 정책(WEB_IP_POLICY)과 IP 품질에 따라 user_id(int64, 제외=-1) 구성."""
+    dvc = j["dvc_idx"]
+    ip  = j["user_ip"].astype(str).str.strip() if "user_ip" in j.columns else pd.Series("", index=j.index)
 
     if WEB_IP_POLICY == "ignore":
-        return np.where(dvc.ne(0), "dvc:"+dvc.astype(str), np.nan)
+        return encode_users(dvc)
 
     key = _pick_group_key(j)
     bad = _ip_bad_groups(j, key)
 
     if key is None:
         web_ok = "user_ip" in j.columns and ((-1) not in bad)
-        return np.where(
-            dvc.ne(0), "dvc:"+dvc.astype(str),
-            np.where((WEB_IP_POLICY=="guarded") & (~web_ok), np.nan, "ip:"+ip)
-        )
+        return encode_users(dvc, ip, web_ok=not ((WEB_IP_POLICY=="guarded") and (not web_ok)))
 
     keyvals = j[key]
     in_bad = keyvals.astype("Int64").isin(bad) if pd.api.types.is_integer_dtype(keyvals) else keyvals.astype(str).isin(bad)
-
-    return np.where(
-        dvc.ne(0), "dvc:"+dvc.astype(str),
-        np.where((WEB_IP_POLICY=="guarded") & in_bad, np.nan, "ip:"+ip)
-    )
+    return encode_users(dvc, ip, web_ok=~((WEB_IP_POLICY=="guarded") & in_bad.to_numpy()))
 
 # ============== 메인: 단일 함수 ==============
 def detect_overclick(df_list: pd.DataFrame, df_join: pd.DataFrame) -> pd.DataFrame:
@@ -97,7 +81,7 @@ def detect_overclick(df_list: pd.DataFrame, df_join: pd.DataFrame) -> pd.DataFra
       - SUS_ATTEMPTS_TH (의심), CONF_ATTEMPTS_TH (확정)
       - OVERCLICK_WINDOW_DAYS 기간 제한(옵션)
     반환: flag>0(의심/확정)만 포함한 DataFrame
-      [abuse_flag(1/2), abuse_type, user_id, <REJOIN_UNIT>, cnt, first_click, last_click]
+      [abuse_flag(1/2), abuse_type, user_id(int), user_key("dvc:…"/"ip:…"), <REJOIN_UNIT>, cnt, first_click, last_click]
     """
     # 임계치 정합성 보정
     global SUS_ATTEMPTS_TH, CONF_ATTEMPTS_TH
@@ -118,7 +102,7 @@ def detect_overclick(df_list: pd.DataFrame, df_join: pd.DataFrame) -> pd.DataFra
     j["click_date"] = pd.to_datetime(j["click_date"], errors="coerce")
     j = j[j["click_date"].notna()].copy()
     j["user_id"] = _build_user_id_with_guard(j)
-    j = j[j["user_id"].notna()].copy()
+    j = j[j["user_id"] >= 0].copy()
 
     # 2) 기간 제한(옵션)
     if OVERCLICK_WINDOW_DAYS is not None:
@@ -150,7 +134,8 @@ def detect_overclick(df_list: pd.DataFrame, df_join: pd.DataFrame) -> pd.DataFra
     out["abuse_type"] = np.where(out["abuse_flag"]==2,
                                  "확정",
                                  "의심")
-    cols = ["abuse_flag","abuse_type","user_id", grp_key, "cnt", "first_click", "last_click"]
+    out["user_key"] = decode_users(out["user_id"]).to_numpy()   # 리포트용 역변환(플래그 행만)
+    cols = ["abuse_flag","abuse_type","user_id","user_key", grp_key, "cnt", "first_click", "last_click"]
     out = out[cols].sort_values(["abuse_flag","cnt","last_click"], ascending=[False, False, True]).reset_index(drop=True)
     return out
 
@@ -195,5 +180,5 @@ df_join_v1 = apply_abuse_to_join(df_list, df_join, over)   # 행 단위 플래
 df_list_v1 = build_list_with_rate(df_list, df_join_v1)     # 광고별 어뷰징 비율(0.0~1.0)
 
 # ===== 저장 =====
-df_join_v1.to_csv("df_join_v1.csv", index=False, encoding="utf-8-sig")
-df_list_v1.to_csv("df_list_v1.csv", index=False, encoding="utf-8-sig")
\ No newline at end of file
+abuse_store.save_columns("join", df_join_v1, ["abuse_1"])
+abuse_store.save_columns("list", df_list_v1, ["abuse_1"])
\ No newline at end of file
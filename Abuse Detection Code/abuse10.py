@@ -16,16 +16,11 @@ MEDIA_SERVER_PATTERNS = [
 ]
 
 # ===== IP 품질 필터 =====
-def _is_media_server_ip(ip):
-    if pd.isna(ip): return False
-    s=str(ip).strip()
-    return any(re.match(p, s) for p in MEDIA_SERVER_PATTERNS)
-def _is_private_ip(ip):
-    if pd.isna(ip): return False
-    s=str(ip).strip()
-    return s.startswith("10.") or s.startswith("192.168.") or bool(re.match(r"^172\.(1[6-9]|2[0-9]|3[01])\.", s))
-def _valid_web_ip(ip): 
-    return (isinstance(ip,str) or not pd.isna(ip)) and (not _is_media_server_ip(ip)) and (not _is_private_ip(ip))
+from abuse_ip_class import is_valid_web_ip
+
+def _valid_web_ip(ips):
+    """결측·매체사 서버·사설 IP 제외 마스크(행 단위, 고유 IP 단위 판정)."""
+    return is_valid_web_ip(ips, MEDIA_SERVER_PATTERNS)
 
 # ===== 유틸 =====
 def _preprocess_join(df_join: pd.DataFrame):
@@ -42,30 +37,57 @@ def _preprocess_join(df_join: pd.DataFrame):
     j["ts_s"]           = (j["ts"].view("int64")//10**9).astype("int64")   # epoch sec
     # 엔티티 키: 앱=dvc_idx, 웹(dvc=0)=품질통과 user_ip
     web = (j["dvc_idx"]==0)
-    j["_entity"] = np.where(web, j["user_ip"].where(j["user_ip"].apply(_valid_web_ip)),
+    j["_entity"] = np.where(web, j["user_ip"].where(_valid_web_ip(j["user_ip"])),
                             j["dvc_idx"].astype("string"))
     j = j[j["_entity"].notna()]
     j["_entity"] = j["_entity"].astype("string")
     return j
 
-def _sec_mode_share(sec_series: pd.Series):
-    if len(sec_series)==0: return np.nan
-    vc = sec_series.value_counts(normalize=True)
-    return float(vc.iloc[0])
-
-def _iat_mode_share(ts_s: np.ndarray):
-    if len(ts_s)<2: return np.nan
-    d = np.diff(np.sort(ts_s))
-    d = d[(d>0) & (d<3600*3)]  # 3h 초과 배치성 간격 제거
-    if len(d)==0: return np.nan
-    b = pd.Series(d).round().astype("int64")
-    vc = b.value_counts()
-    # ±1초 이웃 합치기
-    merged={}
-    for k,c in vc.items():
-        if k in merged: merged[k]+=c
-        else: merged[k]=c+vc.get(k-1,0)+vc.get(k+1,0)
-    return max(merged.values())/len(b) if merged else np.nan
+def _periodicity_features(j: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+    그룹별 [n, sec_mode, iat_mode]를 한 번에 계산.
+    - sec_mode: 특정 '초(0~59)' 최빈 점유율 — (그룹, 초) bincount
+    - iat_mode: (그룹, ts) 1회 정렬 → 클릭간격(0<d<3h) 히스토그램에서 ±1초 이웃 합의 최대 점유율
+    """
+    g = j.groupby(keys, observed=True)
+    feat = g.agg(n=("click_key","count")).reset_index()
+    codes = g.ngroup().fillna(-1).to_numpy().astype("int64")
+    n_grp = len(feat)
+
+    keep = codes >= 0
+    code, ts = codes[keep], j["ts_s"].to_numpy()[keep]
+    sec = j["sec_in_min"].to_numpy()[keep].astype("int64")
+
+    # 초 최빈 점유율
+    sec_hist = np.bincount(code * 60 + sec, minlength=n_grp * 60).reshape(n_grp, 60)
+    tot = sec_hist.sum(axis=1)
+    feat["sec_mode"] = np.where(tot > 0, sec_hist.max(axis=1) / np.maximum(tot, 1), np.nan)
+
+    # 클릭간격 히스토그램(그룹 경계 제외, 3h 초과 배치성 간격 제거)
+    order = np.lexsort((ts, code))
+    code, ts = code[order], ts[order]
+    same = code[1:] == code[:-1]
+    d = np.diff(ts)
+    ok = same & (d > 0) & (d < 3600*3)
+    dc, dd = code[1:][ok], d[ok]
+    iat = np.full(n_grp, np.nan)
+    if len(dd):
+        pair = pd.DataFrame({"g": dc, "d": dd}).value_counts().sort_index()
+        pg = pair.index.get_level_values("g").to_numpy()
+        pd_ = pair.index.get_level_values("d").to_numpy()
+        c = pair.to_numpy()
+        # ±1초 이웃 합치기: 정렬된 (그룹, 간격)에서 바로 앞/뒤 칸이 같은 그룹의 d∓1이면 더함
+        nb = c.copy()
+        prev_ok = np.r_[False, (pg[1:] == pg[:-1]) & (pd_[1:] == pd_[:-1] + 1)]
+        next_ok = np.r_[(pg[1:] == pg[:-1]) & (pd_[1:] == pd_[:-1] + 1), False]
+        nb[prev_ok] += c[np.flatnonzero(prev_ok) - 1]
+        nb[next_ok] += c[np.flatnonzero(next_ok) + 1]
+        best = np.zeros(n_grp, dtype="int64")
+        np.maximum.at(best, pg, nb)
+        n_d = np.bincount(dc, minlength=n_grp)
+        iat = np.where(n_d > 0, best / np.maximum(n_d, 1), np.nan)
+    feat["iat_mode"] = iat
+    return feat
 
 def _ctit_features(df_settle: pd.DataFrame):
     if {"click_key","ads_idx","ctit"}.issubset(df_settle.columns)==False:
@@ -93,31 +115,24 @@ def _ctit_group_stats(df: pd.DataFrame):
     return stat[["grp","n","cv","mode_share"]]
 
 def _severity(sec_mode, iat_mode, n, ctit_cv=None, ctit_mode=None, n_min=N_MIN_ENTITY):
-    if n < n_min: return "정상"
-    risk = ( (not pd.isna(sec_mode) and sec_mode>=SEC_MODE_RISK) or
-             (not pd.isna(iat_mode) and iat_mode>=IAT_MODE_RISK) or
-             (ctit_cv   is not None and not pd.isna(ctit_cv)   and ctit_cv   <= CTIT_CV_RISK) or
-             (ctit_mode is not None and not pd.isna(ctit_mode) and ctit_mode >= CTIT_MODE_RISK) )
-    if risk: return "확정"
-    warn = ( (not pd.isna(sec_mode) and sec_mode>=SEC_MODE_WARN) or
-             (not pd.isna(iat_mode) and iat_mode>=IAT_MODE_WARN) or
-             (ctit_cv   is not None and not pd.isna(ctit_cv)   and ctit_cv   <= CTIT_CV_WARN) or
-             (ctit_mode is not None and not pd.isna(ctit_mode) and ctit_mode >= CTIT_MODE_WARN) )
-    return "의심" if warn else "정상"
+    """그룹 배열 단위 등급(정상/의심/확정). 결측 지표는 해당 조건 불충족으로 본다."""
+    n = np.asarray(n, dtype=float)
+    nan = np.full(len(n), np.nan)
+    sec = np.asarray(sec_mode, dtype=float)
+    iat = np.asarray(iat_mode, dtype=float)
+    cv  = nan if ctit_cv   is None else np.asarray(ctit_cv,   dtype=float)
+    cm  = nan if ctit_mode is None else np.asarray(ctit_mode, dtype=float)
+    risk = (sec >= SEC_MODE_RISK) | (iat >= IAT_MODE_RISK) | (cv <= CTIT_CV_RISK) | (cm >= CTIT_MODE_RISK)
+    warn = (sec >= SEC_MODE_WARN) | (iat >= IAT_MODE_WARN) | (cv <= CTIT_CV_WARN) | (cm >= CTIT_MODE_WARN)
+    return np.select([n < n_min, risk, warn], ["정상", "확정", "의심"], default="정상")
 
 # ===== 메인 =====
 def run_drilldown_to_df(df_list, df_join, df_settle, df_rpt):
     j = _preprocess_join(df_join)
 
     # 1) mda_idx → pub_sub_rel_id 1차 스크리닝
-    pub_g   = j.groupby(["mda_idx","pub_sub_rel_id"], observed=True)
-    pub_feat= pub_g.agg(n=("click_key","count"),
-                        sec_mode=("sec_in_min", _sec_mode_share)).reset_index()
-    pub_iat = pub_g["ts_s"].apply(lambda s: _iat_mode_share(s.values)).reset_index(name="iat_mode")
-    pub_feat = pub_feat.merge(pub_iat, on=["mda_idx","pub_sub_rel_id"], how="left")
-    pub_feat["sev1"] = pub_feat.apply(
-        lambda r: _severity(r["sec_mode"], r["iat_mode"], r["n"], None, None, N_MIN_GROUP), axis=1
-    )
+    pub_feat = _periodicity_features(j, ["mda_idx","pub_sub_rel_id"])
+    pub_feat["sev1"] = _severity(pub_feat["sec_mode"], pub_feat["iat_mode"], pub_feat["n"], None, None, N_MIN_GROUP)
     flagged_pubs = pub_feat.loc[pub_feat["sev1"].isin(["의심","확정"]), ["mda_idx","pub_sub_rel_id"]]
     if flagged_pubs.empty:
         return j.head(0).assign(severity=[])
@@ -125,11 +140,7 @@ def run_drilldown_to_df(df_list, df_join, df_settle, df_rpt):
     # 2) 플래그 퍼블리셔 내부: entity(dvc or web-ip) 정밀
     jj = j.merge(flagged_pubs.drop_duplicates(), on=["mda_idx","pub_sub_rel_id"], how="inner")
     ent_cols = ["mda_idx","pub_sub_rel_id","_entity"]
-    ent_g   = jj.groupby(ent_cols, observed=True)
-    ent_feat= ent_g.agg(n=("click_key","count"),
-                        sec_mode=("sec_in_min", _sec_mode_share)).reset_index()
-    ent_iat = ent_g["ts_s"].apply(lambda s: _iat_mode_share(s.values)).reset_index(name="iat_mode")
-    ent_feat = ent_feat.merge(ent_iat, on=ent_cols, how="left")
+    ent_feat = _periodicity_features(jj, ent_cols)
 
     # (선택) CTIT 보강
     ent_feat["ctit_cv"] = np.nan
@@ -144,9 +155,8 @@ def run_drilldown_to_df(df_list, df_join, df_settle, df_rpt):
         ent_feat["ctit_cv"]   = ent_feat["_entity"].map(cv_map)
         ent_feat["ctit_mode"] = ent_feat["_entity"].map(mode_map)
 
-    ent_feat["severity"] = ent_feat.apply(
-        lambda r: _severity(r["sec_mode"], r["iat_mode"], r["n"], r["ctit_cv"], r["ctit_mode"], N_MIN_ENTITY), axis=1
-    )
+    ent_feat["severity"] = _severity(ent_feat["sec_mode"], ent_feat["iat_mode"], ent_feat["n"],
+                                     ent_feat["ctit_cv"], ent_feat["ctit_mode"], N_MIN_ENTITY)
 
     # 3) 행 복원 → 단일 DF
     bad_entities = ent_feat.loc[ent_feat["severity"].isin(["의심","확정"]), ent_cols+["severity"]]
@@ -200,6 +210,7 @@ df_list_v1 = df_list_v1.merge(
 df_list_v1["abuse_10"] = df_list_v1["abuse_10"].fillna(0.0).astype("float32")
 
 # 확인 후 저장
-df_join_v1.to_csv("df_join_v1.csv", index=False)
-df_list_v1.to_csv("df_list_v1.csv", index=False)
-df_settle_v1.to_csv("df_settle_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("join", df_join_v1, ["abuse_10"])
+abuse_store.save_columns("list", df_list_v1, ["abuse_10"])
+abuse_store.save_columns("settle", df_settle_v1, ["abuse_10"])
+# df_list_v1.csv 내보내기는 실행기(abuse_pipeline.export_outputs)가 모든 라벨 병합 후 1회 수행
\ No newline at end of file
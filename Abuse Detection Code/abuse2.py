@@ -10,6 +10,9 @@ IP_UNIQUE_RATIO_TH = 0.001
 MIN_ROWS_FOR_IP_CHECK = 200
 GROUP_KEY_ORDER = ("mda_idx", "pub_sub_rel_id")
 
+from abuse_identity import encode_users, decode_users
+from abuse_ip_quality import ip_group_stats
+
 # ---------- 유틸: IP 가드 ----------
 def _pick_group_key(df: pd.DataFrame) -> str | None:
     for k in GROUP_KEY_ORDER:
@@ -23,47 +26,29 @@ def _ip_bad_groups(df: pd.DataFrame, key: str | None) -> set:
         # user_ip 자체가 없으면 웹은 전부 배제 대상(guarded에서)
         return set([-1]) if key is None else set(df[key].unique())
 
-    if key is None:
-        vc = df["user_ip"].astype(str).value_counts(dropna=False)
-        rows = len(df); uniq = int(vc.size)
-        top1_share = float(vc.iloc[0]/rows) if rows else 1.0
-        unique_ratio = max(1, uniq)/max(1, rows)
-        bad = (rows >= MIN_ROWS_FOR_IP_CHECK) and ((top1_share >= IP_TOP_SHARE_TH) or (unique_ratio <= IP_UNIQUE_RATIO_TH))
-        return set([-1]) if bad else set()
-
-    g = df.groupby(key, observed=True)
-    rows = g.size()
-    uniq = g["user_ip"].apply(lambda s: s.astype(str).nunique())
-    top1 = g["user_ip"].apply(lambda s: s.astype(str).value_counts(dropna=False).max())
-    top1_share = (top1 / rows).astype(float)
-    unique_ratio = uniq.clip(lower=1) / rows.clip(lower=1)
-    bad_idx = rows.index[(rows >= MIN_ROWS_FOR_IP_CHECK) & ((top1_share >= IP_TOP_SHARE_TH) | (unique_ratio <= IP_UNIQUE_RATIO_TH))]
-    return set(bad_idx)
-
-def _build_user_id_with_guard(df: pd.DataFrame) -> pd.Series:
-    """dvc 우선, 웹은 정책/품질에 따라 포함/배제."""
-    dvc = pd.to_numeric(df.get("dvc_idx", 0), errors="coerce").fillna(0).astype("Int64")
+    # 그룹별 rows/unique_ip/top1_share 1패스 집계(공용 캐시), key=None이면 group_key=-1 한 그룹
+    st = ip_group_stats(df, key)
+    bad = (st["rows"] >= MIN_ROWS_FOR_IP_CHECK) & ((st["top1_share"] >= IP_TOP_SHARE_TH) | (st["unique_ratio"] <= IP_UNIQUE_RATIO_TH))
+    return set(st.loc[bad, "group_key"])
+
+def _build_user_id_with_guard(df: pd.DataFrame) -> np.ndarray:
+    """dvc 우선, 웹은 정책/품질에 따라 포함/배제. 반환: int64 user_id (배제=-1)."""
+    dvc = df["dvc_idx"] if "dvc_idx" in df.columns else pd.Series(0, index=df.index)
     ip  = df.get("user_ip", pd.Series("", index=df.index)).astype(str).str.strip()
 
     if WEB_IP_POLICY == "ignore":
-        return np.where(dvc.ne(0), "dvc:"+dvc.astype(str), np.nan)
+        return encode_users(dvc)
 
     key = _pick_group_key(df)
     bad = _ip_bad_groups(df, key)
 
     if key is None:
         web_ok = ("user_ip" in df.columns) and ((-1) not in bad)
-        return np.where(
-            dvc.ne(0), "dvc:"+dvc.astype(str),
-            np.where((WEB_IP_POLICY=="guarded") & (~web_ok), np.nan, "ip:"+ip)
-        )
+        return encode_users(dvc, ip, web_ok=not ((WEB_IP_POLICY=="guarded") and (not web_ok)))
 
     keyvals = df[key]
     in_bad = keyvals.astype("Int64").isin(bad) if pd.api.types.is_integer_dtype(keyvals) else keyvals.astype(str).isin(bad)
-    return np.where(
-        dvc.ne(0), "dvc:"+dvc.astype(str),
-        np.where((WEB_IP_POLICY=="guarded") & in_bad, np.nan, "ip:"+ip)
-    )
+    return encode_users(dvc, ip, web_ok=~((WEB_IP_POLICY=="guarded") & in_bad.to_numpy()))
 
 # ---------- 유틸: 코드 정규화(ads_code 단위 사용 시) ----------
 def _safe_strategy(s: str) -> str:
@@ -92,14 +77,12 @@ def _rep_code_by_idx(df_any: pd.DataFrame, strategy: str) -> pd.DataFrame:
                  .groupby("ads_idx", as_index=False).tail(1)[["ads_idx","ads_code_settle"]]
                  .rename(columns={"ads_code_settle":"ads_code_settle_rep"}))
     else:
-        def _mode(x):
-            x = x.dropna()
-            if x.empty: return np.nan
-            m = x.mode()
-            return m.iloc[0] if not m.empty else x.iloc[0]
-        rep = (d.groupby("ads_idx")["ads_code_settle"]
-                 .apply(_mode).reset_index()
-                 .rename(columns={"ads_code_settle":"ads_code_settle_rep"}))
+        # 최빈 코드(동률은 작은 값): (ads_idx, 코드) 건수 1회 집계 후 ads_idx별 첫 행
+        cnt = d.groupby(["ads_idx","ads_code_settle"]).size().reset_index(name="n")
+        top = (cnt.sort_values(["ads_idx","n","ads_code_settle"], ascending=[True,False,True])
+                  .drop_duplicates("ads_idx").set_index("ads_idx")["ads_code_settle"])
+        idx = pd.Index(d["ads_idx"].dropna().unique()).sort_values()
+        rep = pd.DataFrame({"ads_idx": idx, "ads_code_settle_rep": top.reindex(idx).to_numpy()})
     return rep
 
 # ---------- 공통 전처리 ----------
@@ -140,72 +123,126 @@ def _prepare_data(df_list: pd.DataFrame, df_settle: pd.DataFrame, df_join: pd.Da
 
     # 5) user_id (IP 가드)
     s["user_id"] = _build_user_id_with_guard(s)
-    s = s[s["user_id"].notna() & s["grp"].notna()].copy()
+    s = s[(s["user_id"] >= 0) & s["grp"].notna()].copy()
 
     return s, ts
 
-# ---------- 집계 유틸(부분프레임을 반드시 넣는다!) ----------
-def _agg(df: pd.DataFrame, by_cols: list[str], use_click_key: bool, ts: str):
-    if df.empty:
-        return pd.DataFrame(columns=by_cols + ["cnt","first_click","last_click"])
-    if use_click_key and ("click_key" in df.columns):
-        return (df.groupby(by_cols, as_index=False)
-                  .agg(cnt=("click_key","nunique"),
-                       first_click=(ts,"min"),
-                       last_click=(ts,"max")))
-    else:
-        return (df.groupby(by_cols, as_index=False)
-                  .agg(cnt=(ts,"size"),
-                       first_click=(ts,"min"),
-                       last_click=(ts,"max")))
+# ---------- 위반 인덱스: (user_id, grp[, day]) 해시 집계 1회 → 라벨 전파는 키 조회 ----------
+class ViolationIndex:
+    """
+    재참여(user_id, grp) / 일일중복(user_id, grp, day) 키별 cnt·first_click·last_click.
+    - grp·day는 사전(정렬 고유값)으로 정수화 후 int64 키 1개로 패킹 → factorize/bincount 집계(정렬·merge 없음)
+    - probe(): join/settle 행 키를 같은 사전으로 패킹해 위반 키 집합에 있는지 조회
+    """
+
+    def __init__(self, s: pd.DataFrame, ts: str, use_click_key: bool = USE_CLICK_KEY):
+        self.ts = ts
+        self.grp_vocab = pd.Index(s["grp"].dropna().unique()).sort_values()
+        day = self._days(s["click_day"])
+        self.d0 = int(day[day >= 0].min()) if (day >= 0).any() else 0
+        self.n_day = int(day.max()) - self.d0 + 1 if (day >= 0).any() else 1
+        self.n_grp = max(len(self.grp_vocab), 1)
+
+        none  = (s["ads_rejoin_type"] == "NONE").to_numpy()
+        daily = (s["ads_rejoin_type"] == "ADS_CODE_DAILY_UPDATE").to_numpy()
+        k_rej, k_day = self._keys(s["user_id"], s["grp"], s["click_day"])
+        ck = pd.factorize(s["click_key"])[0] if (use_click_key and "click_key" in s.columns) else None
+        t = s[ts].to_numpy()
+        self.rejoin = self._aggregate(k_rej[none], t[none], None if ck is None else ck[none])
+        self.daily  = self._aggregate(k_day[daily], t[daily], None if ck is None else ck[daily])
+        self.rejoin_keys = pd.Index(self.rejoin.loc[self.rejoin["cnt"] >= 2, "key"])
+        self.daily_keys  = pd.Index(self.daily.loc[self.daily["cnt"] >= 2, "key"])
+
+    @staticmethod
+    def _days(day: pd.Series) -> np.ndarray:
+        d = pd.to_datetime(day, errors="coerce").to_numpy().astype("datetime64[D]")
+        return np.where(np.isnat(d), -1, d.astype("int64"))
+
+    def _keys(self, user_id, grp, click_day):
+        """행 → (재참여 키, 일일 키). 사전에 없는 grp·결측·음수 user_id·범위 밖 날짜는 -1."""
+        u = pd.to_numeric(pd.Series(np.asarray(user_id)), errors="coerce").fillna(-1).to_numpy().astype("int64")
+        g = self.grp_vocab.get_indexer(pd.Index(np.asarray(grp)))
+        d = self._days(pd.Series(np.asarray(click_day, dtype=object))) - self.d0   # 결측 날짜는 음수
+        ok = (u >= 0) & (g >= 0)
+        k_rej = np.where(ok, u * self.n_grp + g, -1)
+        k_day = np.where(ok & (d >= 0) & (d < self.n_day), k_rej * self.n_day + d, -1)
+        return k_rej, k_day
+
+    @staticmethod
+    def _aggregate(key, t, ck) -> pd.DataFrame:
+        """키별 cnt(click_key 고유수 또는 행수)·최초/최종 시각. 키 오름차순."""
+        codes, uniq = pd.factorize(key, sort=True)
+        n = len(uniq)
+        if ck is None:
+            cnt = np.bincount(codes, minlength=n)
+        else:
+            ok = ck >= 0
+            m = int(ck.max()) + 1 if ok.any() else 1
+            pair = np.unique(codes[ok].astype("int64") * m + ck[ok])
+            cnt = np.bincount(pair // m, minlength=n)
+        ti = t.view("int64")
+        first = np.full(n, np.iinfo("int64").max); np.minimum.at(first, codes, ti)
+        last  = np.full(n, np.iinfo("int64").min); np.maximum.at(last, codes, ti)
+        return pd.DataFrame({"key": uniq, "cnt": cnt,
+                             "first_click": first.view(t.dtype), "last_click": last.view(t.dtype)})
+
+    def decode(self, key, with_day: bool = False) -> dict:
+        """패킹 키 → user_id, grp(, click_day)."""
+        key = np.asarray(key, dtype="int64")
+        out = {}
+        if with_day:
+            out["click_day"] = pd.to_datetime(key % self.n_day + self.d0, unit="D").date
+            key = key // self.n_day
+        out["user_id"] = key // self.n_grp
+        out["grp"] = self.grp_vocab.take(key % self.n_grp)
+        return out
+
+    def probe(self, user_id, grp, click_day) -> np.ndarray:
+        """행별 abuse_2 (위반 키면 2, 아니면 0)."""
+        k_rej, k_day = self._keys(user_id, grp, click_day)
+        hit = (k_rej >= 0) & (self.rejoin_keys.get_indexer(k_rej) >= 0)
+        hit |= (k_day >= 0) & (self.daily_keys.get_indexer(k_day) >= 0)
+        return np.where(hit, 2, 0).astype("int8")
 
 # ---------- (1) 탐지 ----------
 def detect_abuse(df_list: pd.DataFrame, df_settle: pd.DataFrame, df_join: pd.DataFrame):
     """
-    반환: (rejoin_violation, daily_dup)
+    반환: (rejoin_violation, daily_dup, vindex)
       - 재참여_위반(NONE): user_id × grp 2회 이상
       - 일일중복_위반(DAILY_UPDATE): user_id × grp × click_day 2회 이상
       - grp = REJOIN_UNIT ('ads_idx' 또는 정규화된 'ad_code_key')
       - first/last는 타임스탬프(시:분:초) 유지
+      - vindex: 라벨 전파용 위반 인덱스(ViolationIndex)
     """
     s, ts = _prepare_data(df_list, df_settle, df_join)
+    vindex = ViolationIndex(s, ts)
 
-    # 재참여 불가(NONE)만 집계
-    s_none = s[s["ads_rejoin_type"] == "NONE"].copy()
-    if len(s_none):
-        g_none = _agg(s_none, ["user_id","grp"], USE_CLICK_KEY, ts)
-        rejoin_violation = g_none[g_none["cnt"] >= 2].copy()
-        rejoin_violation["abuse_type"] = "재참여_위반(NONE)"
-    else:
-        rejoin_violation = pd.DataFrame(columns=["abuse_type","user_id","grp","cnt","first_click","last_click"])
-
-    # 일일중복(DAILY_UPDATE)만 집계
-    s_daily = s[s["ads_rejoin_type"] == "ADS_CODE_DAILY_UPDATE"].copy()
-    if len(s_daily):
-        g_daily = _agg(s_daily, ["user_id","grp","click_day"], USE_CLICK_KEY, ts)
-        daily_dup = g_daily[g_daily["cnt"] >= 2].copy()
-        daily_dup["abuse_type"] = "일일중복_위반(DAILY_UPDATE)"
-    else:
-        daily_dup = pd.DataFrame(columns=["abuse_type","user_id","grp","click_day","cnt","first_click","last_click"])
+    def _report(agg, with_day, abuse_type):
+        v = agg[agg["cnt"] >= 2]
+        out = pd.DataFrame({"abuse_type": abuse_type, **vindex.decode(v["key"], with_day),
+                            "cnt": v["cnt"].to_numpy(),
+                            "first_click": v["first_click"].to_numpy(), "last_click": v["last_click"].to_numpy()})
+        out["user_key"] = decode_users(out["user_id"]).to_numpy()   # 리포트용 역변환, 위반 행만
+        return out
 
-    # 열 이름 정리 및 정렬
     key_name = "ads_idx" if REJOIN_UNIT == "ads_idx" else "ad_code_key"
-    rejoin_violation = (rejoin_violation.rename(columns={"grp": key_name})
-                        .loc[:, ["abuse_type","user_id",key_name,"cnt","first_click","last_click"]]
+    rejoin_violation = (_report(vindex.rejoin, False, "재참여_위반(NONE)").rename(columns={"grp": key_name})
+                        .loc[:, ["abuse_type","user_id","user_key",key_name,"cnt","first_click","last_click"]]
                         .sort_values(["cnt","last_click"], ascending=[False, True]).reset_index(drop=True))
-    daily_dup = (daily_dup.rename(columns={"grp": key_name})
-                 .loc[:, ["abuse_type","user_id",key_name,"click_day","cnt","first_click","last_click"]]
+    daily_dup = (_report(vindex.daily, True, "일일중복_위반(DAILY_UPDATE)").rename(columns={"grp": key_name})
+                 .loc[:, ["abuse_type","user_id","user_key",key_name,"click_day","cnt","first_click","last_click"]]
                  .sort_values(["cnt","last_click"], ascending=[False, True]).reset_index(drop=True))
-    return rejoin_violation, daily_dup
+    return rejoin_violation, daily_dup, vindex
 
 # 결과
-rejoin_violation, daily_dup = detect_abuse(df_list, df_settle, df_join)
+rejoin_violation, daily_dup, vindex = detect_abuse(df_list, df_settle, df_join)
 
 def _prepare_join_for_label_v1(df_list_v1: pd.DataFrame,
                                df_join_v1: pd.DataFrame,
                                df_settle: pd.DataFrame):
-    """df_join_v1을 라벨 전파용으로 정규화 (grp, click_day, user_id)."""
+    """df_join_v1을 라벨 전파용으로 정규화 (grp, click_day, user_id). _pos = df_join_v1 행 위치."""
     j = df_join_v1.copy()
+    j["_pos"] = np.arange(len(j))
 
     # meta 붙이기 (ads_rejoin_type, ads_code_list)
     meta = (df_list_v1[["ads_idx","ads_rejoin_type","ads_code"]]
@@ -233,7 +270,7 @@ def _prepare_join_for_label_v1(df_list_v1: pd.DataFrame,
 
     # user_id (IP 가드 동일 적용)
     j["user_id"] = _build_user_id_with_guard(j)
-    j = j[j["user_id"].notna() & j["grp"].notna()].copy()
+    j = j[(j["user_id"] >= 0) & j["grp"].notna()].copy()
     return j
 
 
@@ -294,26 +331,18 @@ def _prepare_settle_for_label(df_list_v1: pd.DataFrame,
 
     # --- 5) user_id 생성: 실패/결측도 보존. 폴백 계층: dvc→ip→click_key
     def _build_user_id_safe(df):
-        # dvc_idx 사용 가능하면 dvc:xxx
-        if "dvc_idx" in df.columns:
-            dvc = pd.to_numeric(df["dvc_idx"], errors="coerce").fillna(0).astype("int64")
-        else:
-            dvc = pd.Series(0, index=df.index, dtype="int64")
-        has_dvc = dvc.ne(0)
-
+        # dvc_idx 사용 가능하면 dvc, 아니면 ip, 그것도 없으면 click_key
+        dvc = df["dvc_idx"] if "dvc_idx" in df.columns else pd.Series(0, index=df.index)
         ip = df.get("user_ip")
-        has_ip = ip.notna() & (ip.astype(str).str.len() > 0) if ip is not None else pd.Series(False, index=df.index)
-
-        uid = pd.Series(pd.NA, index=df.index, dtype="object")
-        uid = np.where(has_dvc, "dvc:" + dvc.astype(str), uid)
-        uid = np.where(~has_dvc & has_ip, "ip:" + ip.astype(str), uid)
-        uid = np.where(pd.isna(uid), "ck:" + df["click_key"].astype(str), uid)
-        return pd.Series(uid, index=df.index, dtype="object")
+        if ip is None:
+            return pd.Series(encode_users(dvc, fallback=df["click_key"]), index=df.index)
+        has_ip = (ip.notna() & (ip.astype(str).str.len() > 0)).to_numpy()
+        return pd.Series(encode_users(dvc, ip.astype(str), web_ok=has_ip, fallback=df["click_key"]), index=df.index)
 
     try:
         s["user_id"] = _build_user_id_with_guard(s)  # 네가 가지고 있는 헬퍼 우선 사용
-        # 혹시 반환에 결측 있으면 안전 폴백 적용
-        miss = s["user_id"].isna() | (s["user_id"].astype(str).str.len()==0)
+        # 혹시 반환에 결측(-1) 있으면 안전 폴백 적용
+        miss = s["user_id"] < 0
         if miss.any():
             s.loc[miss, "user_id"] = _build_user_id_safe(s.loc[miss])
     except Exception:
@@ -332,54 +361,24 @@ def update_abuse2_with_v1(
     df_list_v1: pd.DataFrame,
     df_join_v1: pd.DataFrame,
     df_settle: pd.DataFrame,
-    rejoin_violation: pd.DataFrame,
-    daily_dup: pd.DataFrame
+    vindex: ViolationIndex
 ):
     """
     - df_settle_v1  : 새로 생성 (abuse_2=0/2)
     - df_join_v1    : 입력 df_join_v1에 abuse_2 컬럼을 '추가/갱신'(반환)
     - df_list_v1    : 입력 df_list_v1에 광고별 어뷰징 비율 abuse_2(0~1) '추가/갱신'(반환)
+    라벨은 위반 인덱스 조회(vindex.probe)로 행 위치에 바로 기록(merge 없음).
     """
-    key_name = "ads_idx" if REJOIN_UNIT == "ads_idx" else "ad_code_key"
-
     # 1) df_settle_v1 생성 (정산기준 라벨)
     s_settle = _prepare_settle_for_label(df_list_v1, df_settle, df_join_v1)
-    s_settle["abuse_2"] = np.int8(0)
-
-    if len(rejoin_violation):
-        v1 = rejoin_violation[["user_id", key_name]].drop_duplicates().rename(columns={key_name: "grp"})
-        s_settle = s_settle.merge(v1.assign(_a2=np.int8(2)), on=["user_id","grp"], how="left")
-        s_settle["abuse_2"] = s_settle[["abuse_2","_a2"]].max(axis=1).fillna(0).astype("int8")
-        s_settle.drop(columns=["_a2"], inplace=True)
-
-    if len(daily_dup):
-        v2 = daily_dup[["user_id", key_name, "click_day"]].drop_duplicates().rename(columns={key_name: "grp"})
-        s_settle = s_settle.merge(v2.assign(_b2=np.int8(2)), on=["user_id","grp","click_day"], how="left")
-        s_settle["abuse_2"] = s_settle[["abuse_2","_b2"]].max(axis=1).fillna(0).astype("int8")
-        s_settle.drop(columns=["_b2"], inplace=True)
-
+    s_settle["abuse_2"] = vindex.probe(s_settle["user_id"], s_settle["grp"], s_settle["click_day"])
     df_settle_v1 = s_settle  # 원본 스키마 유지가 필요하면 reindex로 맞춰도 됨
 
     # 2) df_join_v1에 abuse_2 추가 (원시참여도 동일 조건으로 색칠)
     j_norm = _prepare_join_for_label_v1(df_list_v1, df_join_v1, df_settle)
-    j_norm["abuse_2"] = np.int8(0)
-
-    if len(rejoin_violation):
-        j_norm = j_norm.merge(v1.assign(_a2=np.int8(2)), on=["user_id","grp"], how="left")
-        j_norm["abuse_2"] = j_norm[["abuse_2","_a2"]].max(axis=1).fillna(0).astype("int8")
-        j_norm.drop(columns=["_a2"], inplace=True)
-
-    if len(daily_dup):
-        j_norm = j_norm.merge(v2.assign(_b2=np.int8(2)), on=["user_id","grp","click_day"], how="left")
-        j_norm["abuse_2"] = j_norm[["abuse_2","_b2"]].max(axis=1).fillna(0).astype("int8")
-        j_norm.drop(columns=["_b2"], inplace=True)
-
-    # df_join_v1 스키마 유지 + abuse_2 붙이기 (index 정렬 보호를 위해 merge 사용)
-    df_join_v1 = df_join_v1.merge(
-        j_norm[["click_key","abuse_2"]],
-        on="click_key", how="left", suffixes=("","")
-    )
-    df_join_v1["abuse_2"] = df_join_v1["abuse_2"].fillna(0).astype("int8")
+    lab = np.zeros(len(df_join_v1), dtype="int8")
+    lab[j_norm["_pos"].to_numpy()] = vindex.probe(j_norm["user_id"], j_norm["grp"], j_norm["click_day"])
+    df_join_v1 = df_join_v1.assign(abuse_2=lab)
 
     # 3) df_list_v1에 광고별 어뷰징 비율(정산기준)
     base = s_settle.copy()
@@ -399,10 +398,10 @@ def update_abuse2_with_v1(
 
 # abuse_2 추가
 df_settle_v1, df_join_v1, df_list_v1 = update_abuse2_with_v1(
-    df_list_v1, df_join_v1, df_settle, rejoin_violation, daily_dup
+    df_list_v1, df_join_v1, df_settle, vindex
 )
 
 # 저장
-df_join_v1.to_csv("df_join_v1.csv", index=False, encoding="utf-8-sig")
-df_list_v1.to_csv("df_list_v1.csv", index=False, encoding="utf-8-sig")
-df_settle_v1.to_csv("df_settle_v1.csv", index=False, encoding="utf-8-sig")
\ No newline at end of file
+abuse_store.save_columns("join", df_join_v1, ["abuse_2"])
+abuse_store.save_columns("list", df_list_v1, ["abuse_2"])
+abuse_store.save_columns("settle", df_settle_v1, ["abuse_2"])
\ No newline at end of file
@@ -24,6 +24,8 @@ TOPK_SUSPECT_AD = 5   # 광고단위 의심 최대 개수
 TOPK_CONFIRM_PB = 3   # 퍼블리셔단위 확정 최대 개수
 TOPK_SUSPECT_PB = 5   # 퍼블리셔단위 의심 최대 개수
 
+from abuse_rolling import rolling_stats
+
 # ================== 1) 광고 단위 클릭 폭증 ==================
 def detect_click_spike_ad(df_rpt: pd.DataFrame, df_list: pd.DataFrame) -> pd.DataFrame:
     # --- 시계열 준비
@@ -43,13 +45,11 @@ def detect_click_spike_ad(df_rpt: pd.DataFrame, df_list: pd.DataFrame) -> pd.Dat
            .query("is_install_like == True")
            .sort_values(["ads_idx","rpt_dt"]))
 
-    # --- 롤링 통계(ads_idx별)
-    def _roll(gr):
-        gr = gr.copy()
-        gr["roll_med"] = gr["rpt_time_clk"].rolling(ROLL_WIN, min_periods=MIN_P).median()
-        gr["roll_std"] = gr["rpt_time_clk"].rolling(ROLL_WIN, min_periods=MIN_P).std(ddof=0)
-        return gr
-    x = x.groupby("ads_idx", group_keys=False).apply(_roll)
+    # --- 롤링 통계(ads_idx별): 정렬 배열 1패스, 그룹 오프셋으로 창 구분
+    # ads_idx 결측 행은 groupby처럼 제외 (factorize 코드 -1이 하나의 그룹으로 묶이지 않게)
+    x = x[x["ads_idx"].notna()]
+    codes = pd.factorize(x["ads_idx"])[0]
+    x["roll_med"], x["roll_std"], _ = rolling_stats(x["rpt_time_clk"], codes, ROLL_WIN, MIN_P)
 
     # --- 지표
     x["mult"]  = x["rpt_time_clk"] / x["roll_med"]
@@ -94,15 +94,12 @@ def detect_click_spike_publisher_labeled(df_join: pd.DataFrame) -> pd.DataFrame:
              .size().rename(columns={"size":"clk"})
              .sort_values(["pub_sub_rel_id","hour"]))
 
-    # --- 롤링
-    def _roll(g):
-        g = g.copy()
-        g["roll_med"] = g["clk"].rolling(ROLL_WIN, min_periods=MIN_P).median()
-        g["roll_std"] = g["clk"].rolling(ROLL_WIN, min_periods=MIN_P).std(ddof=0)
-        g["mult"]     = g["clk"] / g["roll_med"]
-        g["z"]        = (g["clk"] - g["roll_med"]) / g["roll_std"]
-        return g
-    y = grp.groupby("pub_sub_rel_id", group_keys=False).apply(_roll)
+    # --- 롤링(pub_sub_rel_id별): 정렬 배열 1패스
+    y = grp[grp["pub_sub_rel_id"].notna()].reset_index(drop=True)
+    codes = pd.factorize(y["pub_sub_rel_id"])[0]
+    y["roll_med"], y["roll_std"], _ = rolling_stats(y["clk"], codes, ROLL_WIN, MIN_P)
+    y["mult"] = y["clk"] / y["roll_med"]
+    y["z"]    = (y["clk"] - y["roll_med"]) / y["roll_std"]
 
     # --- 하드/소프트 컷 (퍼블리셔는 워밍업 미적용)
     base_guard = y["roll_med"].ge(BASE_MIN)
@@ -219,15 +216,19 @@ def build_df_list_v1(df_list, df_rpt_v1, install_types={1,2}, weighted=False):
     return df_list.merge(rate[["ads_idx","abuse_3"]], on="ads_idx", how="left").fillna({"abuse_3":0.0})
 
 # ========= 실행 =========
-# 필요시에만 로드
-df_list_v1 = pd.read_csv("df_list_v1.csv")
-df_join_v1 = pd.read_csv("df_join_v1.csv")
+# 필요시에만 로드 (같은 프로세스면 메모리 프레임 그대로, 아니면 base + 이전 단계 라벨 사이드카)
+# 이전 실행의 abuse_3·이후 단계 라벨은 빼고 로드 → 재실행 시 merge가 abuse_3_x/_y로 갈라지지 않음
+PREV_LABELS = ("abuse_1", "abuse_2")
+if "df_list_v1" not in globals():
+    df_list_v1 = abuse_store.load_table("list", sidecars=[c for c in abuse_store.sidecar_names("list") if c in PREV_LABELS])
+if "df_join_v1" not in globals():
+    df_join_v1 = abuse_store.load_table("join", sidecars=[c for c in abuse_store.sidecar_names("join") if c in PREV_LABELS])
 
 df_rpt_v1  = build_df_rpt_v1(df_rpt, spikes_ad)
 df_join_v1 = build_df_join_v1(df_join_v1, spikes_pub)   # 기존 v1에 abuse_3 추가
 df_list_v1 = build_df_list_v1(df_list_v1, df_rpt_v1, weighted=False)  # 기존 v1에 abuse_3 추가
 
 # 확인 후 저장
-df_rpt_v1.to_csv("df_rpt_v1.csv", index=False)
-df_join_v1.to_csv("df_join_v1.csv", index=False)
-df_list_v1.to_csv("df_list_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("rpt", df_rpt_v1, ["abuse_3"])
+abuse_store.save_columns("join", df_join_v1, ["abuse_3"])
+abuse_store.save_columns("list", df_list_v1, ["abuse_3"])
\ No newline at end of file
@@ -15,6 +15,8 @@ MIN_ROWS_FOR_IP_CHECK = 100
 IP_TOP_SHARE_TH       = 0.95
 IP_UNIQUE_RATIO_TH    = 0.10
 
+from abuse_rolling import rolling_stats
+
 # --------------- 유틸 ---------------
 def _to_dt_any(s):
     dt  = pd.to_datetime(s, errors="coerce")
@@ -33,6 +35,152 @@ def _to_dt_date_time(df, dcol, tcol):
         dt  = dt.fillna(dt2)
     return dt
 
+# -------- 신호 엔진: (ads_idx, date) 키 공유 집계 --------
+OUT_COLS = ["ads_idx","date","total_clk","night_clk","night_share","base_days","signals","severity",
+            "scope_type","scope_id","scope_share",
+            "dvc_top_id","dvc_top_share","dvc_top_cnt","dvc_in_pub_share","dvc_top_in_pub_id","dvc_top_in_pub_cnt",
+            "pub_mda_idx"]
+
+def _day_num(dt):
+    return dt.to_numpy().astype("datetime64[D]").astype("int64")
+
+def _row_keys(df, ads_vals, d0, n_day, base_key):
+    """행 → base(ads_idx, date) 행 위치. base에 없는 키는 -1."""
+    a  = pd.Index(ads_vals).get_indexer(df["ads_idx"])
+    dn = df["dn"].to_numpy() - d0
+    ok = (a >= 0) & (dn >= 0) & (dn < n_day)
+    k  = np.where(ok, a * n_day + dn, -1)
+    pos = np.clip(np.searchsorted(base_key, k), 0, max(len(base_key) - 1, 0))
+    return np.where(ok & (base_key[pos] == k), pos, -1) if len(base_key) else np.full(len(df), -1)
+
+def _nunique_by(g, v, n):
+    """그룹 코드 g(-1 제외)별 v 고유 수(결측 제외)."""
+    codes = pd.factorize(v)[0]
+    ok = (g >= 0) & (codes >= 0)
+    m = int(codes.max()) + 1 if ok.any() else 1
+    pair = np.unique(g[ok].astype("int64") * m + codes[ok])
+    return np.bincount(pair // m, minlength=n)
+
+def _top_by(g, v, n):
+    """그룹별 최다 값(동률은 작은 값) → (top 값 Series, top 건수, 그룹 합계). 결측 값은 제외."""
+    codes, uniq = pd.factorize(v, sort=True)
+    ok = (g >= 0) & (codes >= 0)
+    m = max(len(uniq), 1)
+    pk, pc = np.unique(g[ok].astype("int64") * m + codes[ok], return_counts=True)
+    pg, pv = pk // m, pk % m
+    tot = np.bincount(pg, weights=pc, minlength=n).astype("int64")
+    top_cnt  = np.zeros(n, dtype="int64")
+    top_code = np.full(n, -1, dtype="int64")
+    if len(pk):
+        order = np.lexsort((pv, -pc, pg))
+        head = order[np.r_[True, pg[order][1:] != pg[order][:-1]]]
+        top_cnt[pg[head]], top_code[pg[head]] = pc[head], pv[head]
+    top_val = pd.Series(uniq).reindex(top_code).reset_index(drop=True)
+    return top_val, top_cnt, tot
+
+def night_signals(r, j, s):
+    """
+    (ads_idx, date)별 야간 신호 와이드 테이블 1장.
+    rpt 일 단위 키를 기준표로 두고 join/settle 행을 같은 키 위치로 1회 매핑 → bincount/고유쌍 집계로 전 신호 계산.
+    반환: (신호표, join 행별 신호표 위치) — 위치 배열은 드릴다운에서 재사용.
+    """
+    day = r.groupby(["ads_idx","date"], as_index=False).agg(total_clk=("clk","sum"), dn=("dn","first"))
+    day = day.sort_values(["ads_idx","date"]).reset_index(drop=True)
+    n = len(day)
+    ads_vals = day["ads_idx"].unique()
+    d0 = int(day["dn"].min()) if n else 0
+    n_day = int(day["dn"].max()) - d0 + 1 if n else 1
+    base_key = pd.Index(ads_vals).get_indexer(day["ads_idx"]) * n_day + (day["dn"].to_numpy() - d0)
+
+    kr = _row_keys(r, ads_vals, d0, n_day, base_key)
+    kj = _row_keys(j, ads_vals, d0, n_day, base_key)
+    ks = _row_keys(s, ads_vals, d0, n_day, base_key)
+    r_n, j_n, s_n = r["hour"].isin(NIGHT).to_numpy(), j["hour"].isin(NIGHT).to_numpy(), s["hour"].isin(NIGHT).to_numpy()
+
+    sig = day.drop(columns="dn")
+    ok = (kr >= 0) & r_n
+    sig["night_clk"]   = np.bincount(kr[ok], weights=r["clk"].to_numpy()[ok], minlength=n).astype("int64")
+    sig["night_share"] = np.where(sig["total_clk"]>0, sig["night_clk"]/sig["total_clk"], np.nan)
+    sig["base_days"]   = sig.groupby("ads_idx").cumcount() + 1
+
+    # 전환률: 일 CR의 7일 롤링 중앙값 vs 야간 CR
+    settles = _nunique_by(ks, s["click_key"], n)
+    cr = np.where(sig["total_clk"]>0, settles/sig["total_clk"], np.nan)
+    sig["cr_med7"], _, _ = rolling_stats(cr, pd.factorize(sig["ads_idx"])[0], 7, 3)
+    night_settles = _nunique_by(np.where(s_n, ks, -1), s["click_key"], n)
+    sig["cr_night"] = np.where(sig["night_clk"]>0, night_settles/sig["night_clk"], np.nan)
+
+    # CTIT 왜곡(야간 settle)
+    ctit = s["ctit"].to_numpy()
+    ok = (ks >= 0) & s_n
+    n_ct = _nunique_by(np.where(s_n, ks, -1), s["click_key"], n)
+    short = np.bincount(ks[ok], weights=(ctit[ok] <= 3), minlength=n)
+    long_ = np.bincount(ks[ok], weights=(ctit[ok] >= 24*3600), minlength=n)
+    sig["sh_short"] = np.where(n_ct>0, short/np.maximum(n_ct, 1), np.nan)
+    sig["sh_long"]  = np.where(n_ct>0, long_/np.maximum(n_ct, 1), np.nan)
+
+    # 야간 join: 퍼블리셔 지배 / dvc 다양성 / IP 팬아웃
+    gj = np.where(j_n, kj, -1)
+    pub_top, pub_cnt, pub_tot = _top_by(gj, j["pub_sub_rel_id"], n)
+    sig["pub_sub_rel_id"] = pub_top.array
+    sig["pub_share"] = np.where(pub_tot>0, pub_cnt/np.maximum(pub_tot, 1), 0.0)
+    clicks = _nunique_by(gj, j["click_key"], n)
+    uniq   = _nunique_by(gj, j["dvc_idx"], n)
+    sig["uniq_share"] = np.where(clicks>0, uniq/np.maximum(clicks, 1), np.nan)
+    ip_code = pd.factorize(j["user_ip"])[0]
+    m_ip = int(ip_code.max()) + 1 if len(ip_code) else 1
+    g_ip = np.where(gj >= 0, gj.astype("int64") * m_ip + ip_code, -1)     # (키, IP) 그룹
+    ip_keys, ip_inv = np.unique(g_ip, return_inverse=True)
+    n_dvc = _nunique_by(np.where(g_ip >= 0, ip_inv, -1), j["dvc_idx"], len(ip_keys))
+    live = ip_keys >= 0
+    max_dvc = np.zeros(n, dtype="int64")
+    np.maximum.at(max_dvc, ip_keys[live] // m_ip, n_dvc[live])
+    sig["max_dvc"] = max_dvc
+    sig["_k"] = np.arange(n)
+    return sig, kj
+
+def _scope_drilldown(cases, j, kj, n_sig):
+    """후보(의심/확정) 일자에 한해 mda/pub/dvc 최다 점유 계산. cases는 _k(신호표 위치) 보유."""
+    case_of = np.full(n_sig, -1)
+    case_of[cases["_k"].to_numpy()] = np.arange(len(cases))
+    keep = (kj >= 0) & j["hour"].isin(NIGHT).to_numpy()
+    keep[keep] = case_of[kj[keep]] >= 0
+    jc = j.loc[keep]
+    g = case_of[kj[keep]]
+    n = len(cases)
+
+    out = cases.copy()
+    mda_top, mda_cnt, mda_tot = _top_by(g, jc["mda_idx"], n)
+    mda_share = np.where(mda_tot>0, mda_cnt/np.maximum(mda_tot, 1), 0.0)
+
+    # 스코프: mda → pub (최소 pub로 귀속)
+    scope_type = np.where(mda_share >= MDA_SCOPE_TH, "mda", "pub")
+    scope_id = np.where(scope_type=="mda", mda_top.astype("Int64"), out["pub_sub_rel_id"].astype("Int64"))
+    scope_share = np.where(scope_type=="mda", mda_share, out["pub_share"])
+    out = out.assign(scope_type=scope_type, scope_id=scope_id, scope_share=scope_share)
+
+    # dvc 참고 메타(웹=0 제외): 전체 top / dominant pub 내부 top
+    is_d = jc["dvc_idx"].fillna(0).astype(int).to_numpy() != 0
+    gd = np.where(is_d, g, -1)
+    top, cnt, tot = _top_by(gd, jc["dvc_idx"], n)
+    has = tot > 0
+    out["dvc_top_id"]    = top.array
+    out["dvc_top_share"] = np.where(has, cnt/np.maximum(tot, 1), 0.0)
+    out["dvc_top_cnt"]   = np.where(has, cnt, 0)
+
+    case_pub = out["pub_sub_rel_id"].astype("Int64").to_numpy(dtype="float64", na_value=np.nan)
+    in_pub = (jc["pub_sub_rel_id"].to_numpy(dtype="float64", na_value=np.nan) == case_pub[g]) if n else np.zeros(0, bool)
+    top, cnt, tot = _top_by(np.where(is_d & in_pub, g, -1), jc["dvc_idx"], n)
+    has = tot > 0
+    out["dvc_top_in_pub_id"]  = top.array
+    out["dvc_in_pub_share"]   = np.where(has, cnt/np.maximum(tot, 1), 0.0)
+    out["dvc_top_in_pub_cnt"] = np.where(has, cnt, 0)
+
+    # pub 스코프일 때 dominant pub의 최다 mda
+    pub_mda, _, _ = _top_by(np.where(in_pub, g, -1), jc["mda_idx"], n)
+    out["pub_mda_idx"] = pub_mda.array
+    return out
+
 # -------- 최종 함수: abuse_4 (스코프=mda/pub, dvc는 메타) --------
 def detect_abuse4_night_scoped(df_rpt, df_join, df_settle):
     # 1) 정규화
@@ -40,13 +188,14 @@ def detect_abuse4_night_scoped(df_rpt, df_join, df_settle):
     r["dt"]   = _to_dt_date_time(r, "rpt_time_date", "rpt_time_time")
     r         = r[r["dt"].notna()]
     r["date"] = r["dt"].dt.date
+    r["dn"]   = _day_num(r["dt"])
     r["hour"] = r["dt"].dt.hour
     r["clk"]  = pd.to_numeric(r["rpt_time_clk"], errors="coerce").fillna(0).astype("int64")
 
     j = df_join.copy()
     j["dt"]   = _to_dt_any(j["click_date"])
     j         = j[j["dt"].notna()]
-    j["date"] = j["dt"].dt.date
+    j["dn"]   = _day_num(j["dt"])
     j["hour"] = j["dt"].dt.hour
     j["dvc_idx"]        = pd.to_numeric(j.get("dvc_idx", 0), errors="coerce").fillna(0).astype("Int64")
     j["pub_sub_rel_id"] = pd.to_numeric(j.get("pub_sub_rel_id", 0), errors="coerce").astype("Int64")
@@ -56,183 +205,40 @@ def detect_abuse4_night_scoped(df_rpt, df_join, df_settle):
     s = df_settle.copy()
     s["dt"]   = _to_dt_any(s["click_date"])
     s         = s[s["dt"].notna()]
-    s["date"] = s["dt"].dt.date
+    s["dn"]   = _day_num(s["dt"])
     s["hour"] = s["dt"].dt.hour
     s["ctit"] = pd.to_numeric(s["ctit"], errors="coerce")
 
-    # 2) 후보(ads×date)
-    day   = r.groupby(["ads_idx","date"], as_index=False).agg(total_clk=("clk","sum")).sort_values(["ads_idx","date"])
-    night = r[r["hour"].isin(NIGHT)].groupby(["ads_idx","date"], as_index=False).agg(night_clk=("clk","sum"))
-    base  = day.merge(night, on=["ads_idx","date"], how="left").fillna({"night_clk":0})
-    base["night_share"] = np.where(base["total_clk"]>0, base["night_clk"]/base["total_clk"], np.nan)
-    base["base_days"]   = base.groupby("ads_idx").cumcount() + 1
-
-    cand = base[(base["total_clk"]>=MIN_TOTAL) & (base["night_share"]>=NIGHT_SHARE) & (base["base_days"]>=REQUIRE_MIN_DAYS)].copy()
+    # 2) 신호 테이블 1패스 → 후보(ads×date)
+    sig, kj = night_signals(r, j, s)
+    cand = sig[(sig["total_clk"]>=MIN_TOTAL) & (sig["night_share"]>=NIGHT_SHARE) & (sig["base_days"]>=REQUIRE_MIN_DAYS)]
     if cand.empty:
-        cols = ["ads_idx","date","total_clk","night_clk","night_share","base_days","signals","severity",
-                "scope_type","scope_id","scope_share",
-                "dvc_top_id","dvc_top_share","dvc_top_cnt","dvc_in_pub_share","dvc_top_in_pub_id","dvc_top_in_pub_cnt",
-                "pub_mda_idx"]
-        return pd.DataFrame(columns=cols)
-    cand = cand.reset_index(drop=True)
-
-    # 3) 신호 5개
-    # (a) 전환률 급락
-    settles_d = s.groupby(["ads_idx","date"], as_index=False).agg(settles=("click_key","nunique"))
-    day_conv  = day.merge(settles_d, on=["ads_idx","date"], how="left").fillna({"settles":0})
-    day_conv["cr"] = np.where(day_conv["total_clk"]>0, day_conv["settles"]/day_conv["total_clk"], np.nan)
-    day_conv = day_conv.sort_values(["ads_idx","date"])
-    cr_med7  = (day_conv.groupby("ads_idx")["cr"].rolling(7, min_periods=3).median()
-                .reset_index(level=0, drop=True))
-    day_conv["cr_med7"] = cr_med7.values
-
-    s_n  = s[s["hour"].isin(NIGHT)].copy()
-    n_set = s_n.groupby(["ads_idx","date"], as_index=False).agg(night_settles=("click_key","nunique"))
-    ncv   = night.merge(n_set, on=["ads_idx","date"], how="left").fillna({"night_settles":0})
-    ncv["cr_night"] = np.where(ncv["night_clk"]>0, ncv["night_settles"]/ncv["night_clk"], np.nan)
-
-    conv   = (cand.merge(day_conv[["ads_idx","date","cr_med7"]], on=["ads_idx","date"], how="left")
-                   .merge(ncv[["ads_idx","date","cr_night"]],      on=["ads_idx","date"], how="left"))
-    f_conv = ((conv["cr_med7"].notna()) & (conv["cr_night"].notna()) & (conv["cr_night"] <= 0.5*conv["cr_med7"])).reset_index(drop=True)
-
-    # (b) 퍼블리셔 지배
-    jn = j[j["hour"].isin(NIGHT)]
-    pub_cnt = jn.groupby(["ads_idx","date","pub_sub_rel_id"]).size().reset_index(name="cnt")
-    pub_top = pd.DataFrame(columns=["ads_idx","date","pub_sub_rel_id","pub_share"])
-    if not pub_cnt.empty:
-        pub_tot = pub_cnt.groupby(["ads_idx","date"])["cnt"].sum().reset_index(name="tot")
-        pub_top = (pub_cnt.sort_values(["ads_idx","date","cnt"], ascending=[True,True,False])
-                          .drop_duplicates(["ads_idx","date"])
-                          .merge(pub_tot, on=["ads_idx","date"], how="left"))
-        pub_top["pub_share"] = np.where(pub_top["tot"]>0, pub_top["cnt"]/pub_top["tot"], 0.0)
-    f_pub = cand.merge(pub_top[["ads_idx","date","pub_share"]], on=["ads_idx","date"], how="left")["pub_share"].fillna(0).ge(PUB_SCOPE_TH).reset_index(drop=True)
-
-    # (c) dvc 다양성 저하(탐지 신호)
-    uv = jn.groupby(["ads_idx","date"]).agg(clicks=("click_key","nunique"), uniq=("dvc_idx","nunique")).reset_index()
-    uv["uniq_share"] = np.where(uv["clicks"]>0, uv["uniq"]/uv["clicks"], np.nan)
-    f_uniq = cand.merge(uv[["ads_idx","date","uniq_share"]], on=["ads_idx","date"], how="left")["uniq_share"].fillna(1).le(0.3).reset_index(drop=True)
-
-    # (d) CTIT 왜곡
-    s_n["short"] = s_n["ctit"].le(3)
-    s_n["long"]  = s_n["ctit"].ge(24*3600)
-    ct = s_n.groupby(["ads_idx","date"]).agg(n=("click_key","nunique"), s=("short","sum"), l=("long","sum")).reset_index()
-    ct["sh_short"] = np.where(ct["n"]>0, ct["s"]/ct["n"], np.nan)
-    ct["sh_long"]  = np.where(ct["n"]>0, ct["l"]/ct["n"], np.nan)
-    _tmp = cand.merge(ct[["ads_idx","date","sh_short","sh_long"]], on=["ads_idx","date"], how="left")
-    f_ctit = (_tmp["sh_short"].fillna(0).ge(0.6) | _tmp["sh_long"].fillna(0).ge(0.2)).reset_index(drop=True)
-
-    # (e) IP 팬아웃(탐지 신호)
-    ipfan  = jn.groupby(["ads_idx","date","user_ip"])["dvc_idx"].nunique().reset_index(name="n_dvc")
-    ipflag = ipfan.groupby(["ads_idx","date"])["n_dvc"].max().reset_index(name="max_dvc")
-    f_ip = cand.merge(ipflag, on=["ads_idx","date"], how="left")["max_dvc"].fillna(0).ge(5).reset_index(drop=True)
+        return pd.DataFrame(columns=OUT_COLS)
+
+    # 3) 신호 5개: 전환률 급락 / 퍼블리셔 지배 / dvc 다양성 저하 / CTIT 왜곡 / IP 팬아웃
+    f_conv = cand["cr_med7"].notna() & cand["cr_night"].notna() & (cand["cr_night"] <= 0.5*cand["cr_med7"])
+    f_pub  = cand["pub_share"].ge(PUB_SCOPE_TH)
+    f_uniq = cand["uniq_share"].fillna(1).le(0.3)
+    f_ctit = cand["sh_short"].fillna(0).ge(0.6) | cand["sh_long"].fillna(0).ge(0.2)
+    f_ip   = cand["max_dvc"].ge(5)
 
     # 4) signals & severity
-    signals = (
-        f_conv.values.astype("int8")
-        + f_pub.values.astype("int8")
-        + f_uniq.values.astype("int8")
-        + f_ctit.values.astype("int8")
-        + f_ip.values.astype("int8")
-    ).astype("int8")
-    sev = np.where(signals >= CONFIRM_SIGS, "확정",
-           np.where(signals >= SUSPECT_SIGS, "의심", "후보"))
+    signals = (f_conv.astype("int8") + f_pub.astype("int8") + f_uniq.astype("int8")
+               + f_ctit.astype("int8") + f_ip.astype("int8")).to_numpy().astype("int8")
+    sev = np.select([signals >= CONFIRM_SIGS, signals >= SUSPECT_SIGS], ["확정","의심"], "후보")
     cases = cand.assign(signals=signals, severity=sev)
     cases = cases[cases["severity"].isin(["의심","확정"])].reset_index(drop=True)
     if cases.empty:
-        cols = ["ads_idx","date","total_clk","night_clk","night_share","base_days","signals","severity",
-                "scope_type","scope_id","scope_share",
-                "dvc_top_id","dvc_top_share","dvc_top_cnt","dvc_in_pub_share","dvc_top_in_pub_id","dvc_top_in_pub_cnt",
-                "pub_mda_idx"]
-        return pd.DataFrame(columns=cols)
-
-    # 5) 스코프: mda → pub (끝)
-    # mda
-    mda_cnt = jn.groupby(["ads_idx","date","mda_idx"]).size().reset_index(name="cnt")
-    mda_top = pd.DataFrame(columns=["ads_idx","date","mda_idx","mda_share"])
-    if not mda_cnt.empty:
-        mda_tot = mda_cnt.groupby(["ads_idx","date"])["cnt"].sum().reset_index(name="tot")
-        mda_top = (mda_cnt.sort_values(["ads_idx","date","cnt"], ascending=[True,True,False])
-                           .drop_duplicates(["ads_idx","date"])
-                           .merge(mda_tot, on=["ads_idx","date"], how="left"))
-        mda_top["mda_share"] = np.where(mda_top["tot"]>0, mda_top["cnt"]/mda_top["tot"], 0.0)
-    cases = cases.merge(mda_top[["ads_idx","date","mda_idx","mda_share"]], on=["ads_idx","date"], how="left").fillna({"mda_share":0.0})
-
-    # pub
-    cases = cases.merge(pub_top[["ads_idx","date","pub_sub_rel_id","pub_share"]], on=["ads_idx","date"], how="left").fillna({"pub_share":0.0})
-
-    # pub별 mda_idx 매핑 준비 (pub_mda_map)
-    # 각 (ads_idx, date, pub_sub_rel_id)별로 가장 많은 mda_idx를 pub_mda_idx로 지정
-    pub_mda_map = pd.DataFrame()
-    if not jn.empty:
-        pub_mda_map = (
-            jn.groupby(["ads_idx", "date", "pub_sub_rel_id", "mda_idx"])
-              .size().reset_index(name="cnt")
-        )
-        # 각 pub_sub_rel_id별로 cnt가 가장 큰 mda_idx를 선택
-        pub_mda_map = (
-            pub_mda_map.sort_values(["ads_idx", "date", "pub_sub_rel_id", "cnt"], ascending=[True, True, True, False])
-                       .drop_duplicates(["ads_idx", "date", "pub_sub_rel_id"])
-                       .rename(columns={"mda_idx": "pub_mda_idx"})
-                       [["ads_idx", "date", "pub_sub_rel_id", "pub_mda_idx"]]
-        )
-
-    # 스코프 결정
-    scope_type = np.where(cases["mda_share"] >= MDA_SCOPE_TH, "mda",
-                   np.where(cases["pub_share"] >= PUB_SCOPE_TH, "pub", "pub"))  # 최소 pub로 귀속
-    scope_id = np.where(scope_type=="mda", cases["mda_idx"].astype("Int64"),
-                 cases["pub_sub_rel_id"].astype("Int64"))
-    scope_share = np.where(scope_type=="mda", cases["mda_share"], cases["pub_share"])
-
-    # 6) dvc 참고 메타(리포트 컬럼)
-    # 전체 top dvc (웹=0 제외)
-    jn_d = jn[jn["dvc_idx"].fillna(0).astype(int) != 0]
-    dvc_top = pd.DataFrame(columns=["ads_idx","date","dvc_top_id","dvc_top_share","dvc_top_cnt"])
-    if not jn_d.empty:
-        dvc_cnt = jn_d.groupby(["ads_idx","date","dvc_idx"]).size().reset_index(name="cnt")
-        dvc_tot = dvc_cnt.groupby(["ads_idx","date"])["cnt"].sum().reset_index(name="tot")
-        dvc_top = (dvc_cnt.sort_values(["ads_idx","date","cnt"], ascending=[True,True,False])
-                           .drop_duplicates(["ads_idx","date"])
-                           .merge(dvc_tot, on=["ads_idx","date"], how="left"))
-        dvc_top["dvc_top_share"] = np.where(dvc_top["tot"]>0, dvc_top["cnt"]/dvc_top["tot"], 0.0)
-        dvc_top = dvc_top.rename(columns={"dvc_idx":"dvc_top_id","cnt":"dvc_top_cnt"})
-        dvc_top = dvc_top[["ads_idx","date","dvc_top_id","dvc_top_share","dvc_top_cnt"]]
-
-    # dominant pub 내부 top dvc
-    dvc_in_pub_top = pd.DataFrame(columns=["ads_idx","date","pub_sub_rel_id","dvc_top_in_pub_id","dvc_in_pub_share","dvc_top_in_pub_cnt"])
-    if not jn_d.empty and not pub_cnt.empty:
-        dvc_in_pub = jn_d.groupby(["ads_idx","date","pub_sub_rel_id","dvc_idx"]).size().reset_index(name="cnt")
-        pub_tot2   = dvc_in_pub.groupby(["ads_idx","date","pub_sub_rel_id"])["cnt"].sum().reset_index(name="tot")
-        dvc_in_pub_top = (dvc_in_pub.sort_values(["ads_idx","date","pub_sub_rel_id","cnt"],
-                                                 ascending=[True,True,True,False])
-                                     .drop_duplicates(["ads_idx","date","pub_sub_rel_id"])
-                                     .merge(pub_tot2, on=["ads_idx","date","pub_sub_rel_id"], how="left"))
-        dvc_in_pub_top["dvc_in_pub_share"] = np.where(dvc_in_pub_top["tot"]>0, dvc_in_pub_top["cnt"]/dvc_in_pub_top["tot"], 0.0)
-        dvc_in_pub_top = dvc_in_pub_top.rename(columns={"dvc_idx":"dvc_top_in_pub_id","cnt":"dvc_top_in_pub_cnt"})
-        dvc_in_pub_top = dvc_in_pub_top[["ads_idx","date","pub_sub_rel_id","dvc_top_in_pub_id","dvc_in_pub_share","dvc_top_in_pub_cnt"]]
-
-    out = (cases.assign(scope_type=scope_type, scope_id=scope_id, scope_share=scope_share)
-                 .merge(dvc_top, on=["ads_idx","date"], how="left")
-                 .merge(dvc_in_pub_top, on=["ads_idx","date","pub_sub_rel_id"], how="left")
-                 .fillna({"dvc_top_share":0.0, "dvc_in_pub_share":0.0,
-                          "dvc_top_cnt":0, "dvc_top_in_pub_cnt":0})
-                 .drop(columns=["mda_idx","mda_share"], errors="ignore")
-                 .sort_values(["severity","signals","night_share"], ascending=[False,False,False])
-                 .reset_index(drop=True))
-
-    # pub_mda_idx 컬럼 추가: 스코프가 pub인 경우에만 pub_mda_idx를 표시, 아니면 NaN
-    if not pub_mda_map.empty:
-        out = out.merge(pub_mda_map, on=["ads_idx", "date", "pub_sub_rel_id"], how="left")
-    else:
-        out["pub_mda_idx"] = pd.NA
+        return pd.DataFrame(columns=OUT_COLS)
+
+    # 5~6) 스코프 + dvc 메타: 후보 일자만 드릴다운
+    out = _scope_drilldown(cases, j, kj, len(sig))
+    out = (out.sort_values(["severity","signals","night_share"], ascending=[False,False,False])
+              .reset_index(drop=True))
 
     # 스코프가 pub이 아닌 경우 pub_mda_idx를 NaN으로
     out["pub_mda_idx"] = np.where(out["scope_type"] == "pub", out["pub_mda_idx"], pd.NA)
-
-    cols = ["ads_idx","date","total_clk","night_clk","night_share","base_days","signals","severity",
-            "scope_type","scope_id","scope_share",
-            "dvc_top_id","dvc_top_share","dvc_top_cnt","dvc_in_pub_share","dvc_top_in_pub_id","dvc_top_in_pub_cnt",
-            "pub_mda_idx"]
-    return out[cols]
+    return out[OUT_COLS]
 
 abuse_4 = detect_abuse4_night_scoped(df_rpt, df_join, df_settle)
 
@@ -383,7 +389,7 @@ df_list_v1 = add_abuse4_rate_to_list(df_list_v1, df_join_v1)  # 광고별 0~1 
 df_settle_v1 = add_abuse4_to_settle(df_settle_v1, abuse_4)  # settle 추가
 
 # 저장
-df_join_v1.to_csv("df_join_v1.csv", index=False)
-df_rpt_v1.to_csv("df_rpt_v1.csv", index=False)
-df_list_v1.to_csv("df_list_v1.csv", index=False)
-df_settle_v1.to_csv("df_settle_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("join", df_join_v1, ["abuse_4"])
+abuse_store.save_columns("rpt", df_rpt_v1, ["abuse_4"])
+abuse_store.save_columns("list", df_list_v1, ["abuse_4"])
+abuse_store.save_columns("settle", df_settle_v1, ["abuse_4"])
\ No newline at end of file
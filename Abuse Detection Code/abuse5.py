@@ -6,17 +6,73 @@ MIN_INSTALL_IN_WIN = 2   # 창 내 설치/실행형 최소 개수
 USER_LEVEL = 1           # 0=느슨, 1=보통(권장), 2=엄격
 PUB_LEVEL  = 1           # 0=느슨, 1=보통(권장), 2=엄격
 
-CHUNK_DAYS        = 3    # 날짜 청크(일)
-CHUNK_OVERLAP_MIN = 10   # 청크 경계 오버랩(분)
+CHUNK_DAYS = 3           # 퍼블리셔-일 집계 파티션(일, 겹침 없음)
+MAX_PAIRS  = 20_000_000  # 유저 창 펼침(창×클릭) 배치 상한 → 메모리 상한
 
 INSTALL_TYPES = {1, 2}   # 1:설치형, 2:실행형
 
+from abuse_identity import encode_users, decode_users
+
+U_COLS = ["abuse_type","user_id","win_start","win_end","uniq_ads","install_cnt","ads_list","severity"]
+P_COLS = ["abuse_type","pub_sub_rel_id","mda_idx","date","sus_windows","sus_users","sus_ratio","sus_ads_topn","severity"]
+
+# ---------- 유저 슬라이딩 창 엔진 ----------
+def _sliding_window_counts(uid, ts, ads_code, inst, window_s, min_events, max_pairs=MAX_PAIRS):
+    """
+    (user, ts) 정렬 배열에서 클릭 i를 시작점으로 하는 창 [ts_i, ts_i+window_s)의
+    고유 광고 수·고유 설치형 광고 수를 1패스로 계산.
+    - 창 끝은 (user, ts) 단조 키에 대한 두 포인터(searchsorted)
+    - 창 안의 클릭 j는 같은 (user, 광고)의 직전 위치가 i보다 앞일 때만 '새 광고'로 센다
+    - 클릭 수가 min_events 미만인 창은 건너뜀(0), 펼침은 max_pairs 단위 배치
+    반환: (end, uniq, ninst) — end는 창의 배타적 끝 위치
+    """
+    n = len(uid)
+    idx = np.arange(n)
+    rel = ts - ts.min()
+    span = int(rel.max()) + window_s + 1
+    comp = uid * span + rel
+    end = np.searchsorted(comp, comp + window_s, side="left")
+
+    # 같은 (user, 광고)의 직전 위치(없으면 -1)
+    pair = uid * (int(ads_code.max()) + 2) + (ads_code + 1)
+    order = np.lexsort((idx, pair))
+    same = pair[order][1:] == pair[order][:-1]
+    prev = np.full(n, -1, dtype="int64")
+    prev[order[1:][same]] = order[:-1][same]
+    valid_ad = ads_code >= 0
+
+    uniq = np.zeros(n, dtype="int64")
+    ninst = np.zeros(n, dtype="int64")
+    cand = idx[(end - idx) >= min_events]
+    lens = end[cand] - cand
+    csum = np.cumsum(lens)
+    s = 0
+    while s < len(cand):
+        base = csum[s - 1] if s else 0
+        e = max(int(np.searchsorted(csum, base + max_pairs, side="right")), s + 1)
+        c, l = cand[s:e], lens[s:e]
+        rep = np.repeat(np.arange(len(c)), l)
+        jj = c[rep] + (np.arange(len(rep)) - np.repeat(np.cumsum(l) - l, l))
+        new = valid_ad[jj] & (prev[jj] < c[rep])
+        uniq[c] = np.bincount(rep, weights=new, minlength=len(c)).astype("int64")
+        ninst[c] = np.bincount(rep, weights=new & inst[jj], minlength=len(c)).astype("int64")
+        s = e
+    return end, uniq, ninst
+
+def _episodes(uid, ts, hit, window_s):
+    """기준 충족 창(hit 위치)을 유저별로 겹치는 것끼리 묶음 → (첫 창 위치, 마지막 창 위치, 그룹 시작 오프셋)."""
+    hu, ht = uid[hit], ts[hit]
+    new_ep = np.r_[True, (hu[1:] != hu[:-1]) | (ht[1:] >= ht[:-1] + window_s)]
+    starts = np.flatnonzero(new_ep)
+    last = hit[np.r_[starts[1:] - 1, len(hit) - 1]]
+    return hit[starts], last, starts
+
 def detect_multi_participation_chunked(
     df_join, df_list,
     *,
     window_min=WINDOW_MIN, k_thresh=K_THRESH, min_install_in_win=MIN_INSTALL_IN_WIN,
     user_level=USER_LEVEL, pub_level=PUB_LEVEL,
-    chunk_days=CHUNK_DAYS, chunk_overlap_min=CHUNK_OVERLAP_MIN,
+    chunk_days=CHUNK_DAYS,
     # ↓ 필요하면 세부 기준을 개별 오버라이드 할 수도 있음(보통은 건들 필요 없음)
     pub_min_sus_win=20, pub_min_sus_users=10, pub_ratio_thresh=0.05,
     install_types=INSTALL_TYPES, topn_ads=3
@@ -62,86 +118,108 @@ def detect_multi_participation_chunked(
     j = j[j["dt"].notna()].copy()
     j["dvc_idx"] = pd.to_numeric(j["dvc_idx"], errors="coerce").fillna(0).astype("int64")
     j["user_ip"] = j["user_ip"].astype(str).str.strip()
-    j["user_id"] = np.where(j["dvc_idx"].ne(0), "dvc:"+j["dvc_idx"].astype(str), "ip:"+j["user_ip"])
-    j = j[(j["user_id"]!="ip:") & (j["user_id"]!="ip:nan")]
+    j["user_id"] = encode_users(j["dvc_idx"], j["user_ip"], web_ok=~j["user_ip"].isin(["", "nan"]).to_numpy())
+    j = j[j["user_id"] >= 0]
     j = j[["user_id","dt","ads_idx","pub_sub_rel_id","mda_idx","is_install_like"]]
-
-    start = j["dt"].min().floor("D")
-    end   = j["dt"].max().ceil("D")
-    if pd.isna(start) or pd.isna(end):
-        empty_u = pd.DataFrame(columns=["abuse_type","user_id","win_start","win_end","uniq_ads","install_cnt","ads_list","severity"])
-        empty_p = pd.DataFrame(columns=["abuse_type","pub_sub_rel_id","mda_idx","date","sus_windows","sus_users","sus_ratio","sus_ads_topn","severity"])
-        return empty_u, empty_p
-
-    out_user_parts, out_pub_parts = [], []
-    cur = start; ol = pd.Timedelta(minutes=chunk_overlap_min)
-
-    while cur < end:
-        cur_end = min(cur + pd.Timedelta(days=chunk_days), end)
-        c = j.loc[(j["dt"] >= (cur - ol)) & (j["dt"] < (cur_end + ol))].copy()
-        if c.empty: cur = cur_end; continue
-
-        # 사전 필터
-        cnt_user = c.groupby("user_id", observed=True).size()
-        keep_users = cnt_user[cnt_user >= prefilter_user_min].index
-        c = c[c["user_id"].isin(keep_users)]
-        if c.empty: cur = cur_end; continue
-
-        c["win_start"] = c["dt"].dt.floor(f"{window_min}min")
-        c["date"] = c["win_start"].dt.date
-
-        # ===== 유저-창 집계 =====
-        base_u = (c.drop_duplicates(["user_id","win_start","ads_idx"])
-                    .groupby(["user_id","win_start"], as_index=False)
-                    .agg(uniq_ads=("ads_idx","nunique"),
-                         install_cnt=("is_install_like", lambda s: int(s.fillna(False).sum()))))
-        u_ads = (c.drop_duplicates(["user_id","win_start","ads_idx"])
-                   .groupby(["user_id","win_start"])["ads_idx"]
-                   .apply(lambda s: ",".join(map(str, sorted(s)))).reset_index(name="ads_list"))
-
-        # 1차 후보
-        u_flags = base_u[(base_u["uniq_ads"]>=k_thresh) & (base_u["install_cnt"]>=min_install_in_win)].copy()
+    j["is_install_like"] = j["is_install_like"].fillna(False).astype(bool)
+
+    # 사전 필터(전체 기간 1회 → 날짜 창/분할 실행 불가, LOGICS lookback/partition=None) + (user, time) 1회 정렬
+    j = j[j.groupby("user_id")["user_id"].transform("size") >= prefilter_user_min]
+    j = j.sort_values(["user_id","dt"], kind="stable").reset_index(drop=True)
+    if j.empty:
+        return pd.DataFrame(columns=U_COLS + ["user_key"]), pd.DataFrame(columns=P_COLS)
+
+    # ===== 유저 슬라이딩 창 =====
+    window_s = int(window_min) * 60
+    uid = pd.factorize(j["user_id"], sort=True)[0].astype("int64")   # 정렬 순서 그대로의 조밀 번호
+    ts = ((j["dt"] - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)).to_numpy().astype("int64")
+    ads_code = pd.factorize(j["ads_idx"])[0].astype("int64")
+    end, uniq, ninst = _sliding_window_counts(uid, ts, ads_code, j["is_install_like"].to_numpy(),
+                                              window_s, k_thresh)
+
+    hit = np.flatnonzero((uniq >= k_thresh) & (ninst >= min_install_in_win))
+    u_all = pd.DataFrame(columns=U_COLS)
+    if len(hit):
+        # 겹치는 창은 하나의 구간으로 묶고, 구간 지표는 구간 내 창의 최댓값
+        first, last, starts = _episodes(uid, ts, hit, window_s)
+        dt_arr = j["dt"].to_numpy()
+        u_flags = pd.DataFrame({
+            "user_id": j["user_id"].to_numpy()[first],
+            "win_start": dt_arr[first],
+            "win_end": dt_arr[last] + np.timedelta64(int(window_min), "m"),
+            "uniq_ads": np.maximum.reduceat(uniq[hit], starts),
+            "install_cnt": np.maximum.reduceat(ninst[hit], starts),
+        })
+        u_flags["abuse_type"] = "다중참여(user)"
+
+        # 신호 A/B/C (레벨 기반)
+        A = (u_flags["uniq_ads"]    >= (k_thresh + USER_K_MARGIN)).astype(int)
+        B = (u_flags["install_cnt"] >= (min_install_in_win + USER_INSTALL_MARGIN)).astype(int)
+        # C: USER_REPEAT_MIN은 10분 창 수 기준으로 튜닝됨 → 구간 수가 아니라, 같은 날 기준 충족 창의
+        #    시작이 걸친 고유 10분 버킷(floor, 에폭 기준) 수로 센다(긴 구간 1개도 버킷 여러 개로 계산)
+        hu, hb = uid[hit], ts[hit] // window_s
+        nb = np.r_[True, (hu[1:] != hu[:-1]) | (hb[1:] != hb[:-1])]   # hit은 (user, ts) 정렬 → 인접 비교로 고유화
+        n_bkt = pd.Series(1, index=pd.MultiIndex.from_arrays([hu[nb], hb[nb] * window_s // 86400])).groupby(level=[0, 1]).sum()
+        ep_day = pd.MultiIndex.from_arrays([uid[first], ts[first] // 86400])
+        C = (n_bkt.reindex(ep_day).to_numpy() >= USER_REPEAT_MIN).astype(int)
+
+        user_sigs = A + B + C
+        u_flags["severity"] = np.select(
+            [user_sigs >= USER_CONF_SIGS, user_sigs >= USER_SUS_SIGS],
+            ["확정","의심"], default="정상"
+        )
+        keep = (u_flags["severity"] != "정상").to_numpy()
+        u_flags = u_flags[keep].reset_index(drop=True)
         if not u_flags.empty:
-            u_flags = u_flags.merge(u_ads, on=["user_id","win_start"], how="left")
-            u_flags["win_end"] = u_flags["win_start"] + pd.Timedelta(minutes=window_min)
-            u_flags["abuse_type"] = "다중참여(user)"
-
-            # 신호 A/B/C (레벨 기반)
-            A = (u_flags["uniq_ads"]    >= (k_thresh + USER_K_MARGIN)).astype(int)
-            B = (u_flags["install_cnt"] >= (min_install_in_win + USER_INSTALL_MARGIN)).astype(int)
-            tmp = u_flags.copy(); tmp["date"] = tmp["win_start"].dt.date
-            C = (tmp.groupby(["user_id","date"])["win_start"].transform("count") >= USER_REPEAT_MIN).astype(int)
-
-            user_sigs = A + B + C
-            u_flags["severity"] = np.select(
-                [user_sigs >= USER_CONF_SIGS, user_sigs >= USER_SUS_SIGS],
-                ["확정","의심"], default="정상"
-            )
-            u_flags = u_flags[u_flags["severity"]!="정상"]
-            if not u_flags.empty:
-                u_flags["severity"] = pd.Categorical(u_flags["severity"], categories=["의심","확정"], ordered=True)
-                out_user_parts.append(u_flags[["abuse_type","user_id","win_start","win_end","uniq_ads","install_cnt","ads_list","severity"]])
-
-        # ===== 퍼블리셔-일 집계 =====
-        base_p = (c.drop_duplicates(["pub_sub_rel_id","mda_idx","user_id","win_start","ads_idx"])
-                    .groupby(["pub_sub_rel_id","mda_idx","user_id","win_start"], as_index=False)
-                    .agg(uniq_ads=("ads_idx","nunique"),
-                         install_cnt=("is_install_like", lambda s: int(s.fillna(False).sum()))))
+            # ads_list 문자열은 플래그된 구간에 대해서만 생성
+            a_pos, b_pos = first[keep], end[last[keep]]
+            n_pos = b_pos - a_pos
+            ep = np.repeat(np.arange(len(a_pos)), n_pos)
+            pos = np.repeat(a_pos, n_pos) + (np.arange(len(ep)) - np.repeat(np.cumsum(n_pos) - n_pos, n_pos))
+            ep_ads = (pd.DataFrame({"ep": ep, "ads_idx": j["ads_idx"].to_numpy()[pos]})
+                        .dropna().drop_duplicates().sort_values(["ep","ads_idx"]))
+            u_flags["ads_list"] = (ep_ads.groupby("ep")["ads_idx"]
+                                         .agg(lambda s: ",".join(map(str, s)))
+                                         .reindex(range(len(u_flags))).to_numpy())
+            u_flags["severity"] = pd.Categorical(u_flags["severity"], categories=["의심","확정"], ordered=True)
+            u_all = (u_flags[U_COLS]
+                       .sort_values(["severity","user_id","win_start"], ascending=[True, True, True])
+                       .reset_index(drop=True))
+    u_all["user_key"] = decode_users(u_all["user_id"]).to_numpy()   # 리포트용 역변환
+
+    # ===== 퍼블리셔-일 집계 (겹침 없는 날짜 파티션: 10분 버킷은 날짜를 넘지 않음) =====
+    out_pub_parts = []
+    by_time = np.argsort(j["dt"].to_numpy(), kind="stable")
+    day = j["dt"].to_numpy()[by_time].astype("datetime64[D]")
+    cuts = np.searchsorted(day, np.arange(day[0], day[-1] + 1, int(chunk_days)), side="left")
+    cuts = np.r_[cuts, len(day)]
+    keys_w = ["pub_sub_rel_id","mda_idx","user_id","win_start"]
+    keys_d = ["pub_sub_rel_id","mda_idx","date"]
+
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        if a >= b:
+            continue
+        c = j.iloc[by_time[a:b]]
+        c = c.assign(win_start=c["dt"].dt.floor(f"{window_min}min"))
+        c = c.assign(date=c["win_start"].dt.date)
+
+        c_dedup = c.drop_duplicates(keys_w + ["ads_idx"])
+        base_p = (c_dedup.groupby(keys_w, as_index=False)
+                         .agg(uniq_ads=("ads_idx","nunique"), install_cnt=("is_install_like","sum")))
         p_flags = base_p[(base_p["uniq_ads"]>=k_thresh) & (base_p["install_cnt"]>=min_install_in_win)].copy()
-        if not p_flags.empty:
-            p_flags["date"] = p_flags["win_start"].dt.date
+        p_flags["date"] = p_flags["win_start"].dt.date
 
         p_day_tot = (base_p.assign(date=base_p["win_start"].dt.date)
-                          .groupby(["pub_sub_rel_id","mda_idx","date"], as_index=False)
+                          .groupby(keys_d, as_index=False)
                           .size().rename(columns={"size":"total_user_windows"}))
         if not p_flags.empty:
-            p_day_hit = (p_flags.groupby(["pub_sub_rel_id","mda_idx","date"], as_index=False)
+            p_day_hit = (p_flags.groupby(keys_d, as_index=False)
                                .agg(sus_windows=("win_start","nunique"),
                                     sus_users=("user_id","nunique")))
         else:
-            p_day_hit = pd.DataFrame(columns=["pub_sub_rel_id","mda_idx","date","sus_windows","sus_users"])
+            p_day_hit = pd.DataFrame(columns=keys_d + ["sus_windows","sus_users"])
 
-        pub_daily = (p_day_tot.merge(p_day_hit, on=["pub_sub_rel_id","mda_idx","date"], how="left")
+        pub_daily = (p_day_tot.merge(p_day_hit, on=keys_d, how="left")
                                .fillna({"sus_windows":0,"sus_users":0}))
         pub_daily["sus_ratio"] = np.where(pub_daily["total_user_windows"]>0,
                                           pub_daily["sus_windows"]/pub_daily["total_user_windows"], np.nan)
@@ -152,66 +230,50 @@ def detect_multi_participation_chunked(
             (pub_daily["sus_users"]>=pub_min_sus_users) |
             (pub_daily["sus_ratio"]>=pub_ratio_thresh)
         ].copy()
+        if pub_flags.empty:
+            continue
 
+        # Top-N 광고 (의심창에서 빈번) — 의심창의 (창, 광고) 행만 모아 집계
+        if not p_flags.empty:
+            pf_ads = c_dedup[keys_w + ["ads_idx"]].merge(p_flags[keys_w + ["date"]], on=keys_w, how="inner")
+            daily_ads_cnt = (pf_ads.dropna(subset=["ads_idx"])
+                                   .groupby(keys_d + ["ads_idx"], as_index=False)
+                                   .size().rename(columns={"size":"cnt"}))
+            top = (daily_ads_cnt.sort_values(keys_d + ["cnt"], ascending=[True, True, True, False], kind="stable")
+                                .groupby(keys_d).head(topn_ads))
+            top["s"] = top["ads_idx"].astype("int64").astype(str) + "(" + top["cnt"].astype(str) + ")"
+            sus_ads_topn = top.groupby(keys_d)["s"].agg(",".join).reset_index(name="sus_ads_topn")
+            pub_flags = pub_flags.merge(sus_ads_topn, on=keys_d, how="left")
+        else:
+            pub_flags["sus_ads_topn"] = np.nan
+
+        # 퍼블리셔 severity (레벨 기반)
+        S1_sus  = (pub_flags["sus_windows"] >= (PUB_SUS_MULT  * pub_min_sus_win)).astype(int)
+        S2_sus  = (pub_flags["sus_users"]  >= (PUB_SUS_MULT  * pub_min_sus_users)).astype(int)
+        S3_sus  = (pub_flags["sus_ratio"]  >= (PUB_SUS_MULT  * pub_ratio_thresh)).astype(int)
+        S1_conf = (pub_flags["sus_windows"] >= (PUB_CONF_MULT * pub_min_sus_win)).astype(int)
+        S2_conf = (pub_flags["sus_users"]  >= (PUB_CONF_MULT * pub_min_sus_users)).astype(int)
+        S3_conf = (pub_flags["sus_ratio"]  >= (PUB_CONF_MULT * pub_ratio_thresh)).astype(int)
+
+        conf_sigs = S1_conf + S2_conf + S3_conf
+        sus_sigs  = S1_sus  + S2_sus  + S3_sus
+        pub_flags["severity"] = np.select(
+            [conf_sigs >= PUB_CONF_SIGS, sus_sigs >= PUB_SUS_SIGS],
+            ["확정","의심"], default="정상"
+        )
+        pub_flags = pub_flags[pub_flags["severity"]!="정상"]
         if not pub_flags.empty:
-            # Top-N 광고 (의심창에서 빈번)
-            p_win_ads = (c.drop_duplicates(["pub_sub_rel_id","mda_idx","user_id","win_start","ads_idx"])
-                           .groupby(["pub_sub_rel_id","mda_idx","user_id","win_start"])["ads_idx"]
-                           .apply(list).reset_index(name="ads_list"))
-            if not p_flags.empty:
-                p_flags_ads = p_flags.merge(p_win_ads, on=["pub_sub_rel_id","mda_idx","user_id","win_start"], how="left")
-                pf_exploded = (p_flags_ads.explode("ads_list")
-                                            .dropna(subset=["ads_list"])
-                                            .rename(columns={"ads_list":"ads_idx"}))
-                daily_ads_cnt = (pf_exploded.groupby(["pub_sub_rel_id","mda_idx","date","ads_idx"], as_index=False)
-                                               .size().rename(columns={"size":"cnt"}))
-                def _topn_str(g):
-                    g2 = g.sort_values("cnt", ascending=False).head(topn_ads)
-                    return ",".join([f"{int(a)}({int(c)})" for a,c in zip(g2["ads_idx"], g2["cnt"])])
-                sus_ads_topn = (daily_ads_cnt.groupby(["pub_sub_rel_id","mda_idx","date"])
-                                                .apply(_topn_str).reset_index(name="sus_ads_topn"))
-                pub_flags = pub_flags.merge(sus_ads_topn, on=["pub_sub_rel_id","mda_idx","date"], how="left")
-            else:
-                pub_flags["sus_ads_topn"] = np.nan
-
-            # 퍼블리셔 severity (레벨 기반)
-            S1_sus  = (pub_flags["sus_windows"] >= (PUB_SUS_MULT  * pub_min_sus_win)).astype(int)
-            S2_sus  = (pub_flags["sus_users"]  >= (PUB_SUS_MULT  * pub_min_sus_users)).astype(int)
-            S3_sus  = (pub_flags["sus_ratio"]  >= (PUB_SUS_MULT  * pub_ratio_thresh)).astype(int)
-            S1_conf = (pub_flags["sus_windows"] >= (PUB_CONF_MULT * pub_min_sus_win)).astype(int)
-            S2_conf = (pub_flags["sus_users"]  >= (PUB_CONF_MULT * pub_min_sus_users)).astype(int)
-            S3_conf = (pub_flags["sus_ratio"]  >= (PUB_CONF_MULT * pub_ratio_thresh)).astype(int)
-
-            conf_sigs = S1_conf + S2_conf + S3_conf
-            sus_sigs  = S1_sus  + S2_sus  + S3_sus
-            pub_flags["severity"] = np.select(
-                [conf_sigs >= PUB_CONF_SIGS, sus_sigs >= PUB_SUS_SIGS],
-                ["확정","의심"], default="정상"
-            )
-            pub_flags = pub_flags[pub_flags["severity"]!="정상"]
-            if not pub_flags.empty:
-                pub_flags["abuse_type"] = "다중참여(pub)"
-                pub_flags["severity"] = pd.Categorical(pub_flags["severity"], categories=["의심","확정"], ordered=True)
-                out_pub_parts.append(pub_flags[["abuse_type","pub_sub_rel_id","mda_idx","date","sus_windows","sus_users","sus_ratio","sus_ads_topn","severity"]])
-
-        cur = cur_end
+            pub_flags["abuse_type"] = "다중참여(pub)"
+            pub_flags["severity"] = pd.Categorical(pub_flags["severity"], categories=["의심","확정"], ordered=True)
+            out_pub_parts.append(pub_flags[P_COLS])
 
     # ---------- 합치기 ----------
-    if out_user_parts:
-        u_all = (pd.concat(out_user_parts, ignore_index=True)
-                   .drop_duplicates(["user_id","win_start"])
-                   .sort_values(["severity","user_id","win_start"], ascending=[True, True, True])
-                   .reset_index(drop=True))
-    else:
-        u_all = pd.DataFrame(columns=["abuse_type","user_id","win_start","win_end","uniq_ads","install_cnt","ads_list","severity"])
-
     if out_pub_parts:
         p_all = (pd.concat(out_pub_parts, ignore_index=True)
-                   .drop_duplicates(["pub_sub_rel_id","mda_idx","date"])
                    .sort_values(["severity","pub_sub_rel_id","date"], ascending=[True, True, True])
                    .reset_index(drop=True))
     else:
-        p_all = pd.DataFrame(columns=["abuse_type","pub_sub_rel_id","mda_idx","date","sus_windows","sus_users","sus_ratio","sus_ads_topn","severity"])
+        p_all = pd.DataFrame(columns=P_COLS)
 
     return u_all, p_all
 
@@ -226,20 +288,27 @@ def enrich_with_multi_participation_flags(df_join, u_flags, pub_flags):
     
     j = df_join.copy()
     j["dt"] = pd.to_datetime(j["click_date"], errors="coerce")
-    j["user_id"] = np.where(j["dvc_idx"].fillna(0).ne(0), "dvc:"+j["dvc_idx"].astype(str), "ip:"+j["user_ip"].astype(str))
+    j["user_id"] = encode_users(j["dvc_idx"], j["user_ip"].astype(str).str.strip())  # 탐지와 동일 인코딩
     severity_map_numeric = {'정상': 0, '의심': 1, '확정': 2}
 
     # --- 1단계: 유저(user_id) 기반 등급 부여 ---
+    # 플래그 구간 [win_start, win_end)에 속한 같은 유저의 클릭에 등급 (유저별 구간은 겹치지 않음)
+    j['abuse_user_sev'] = np.nan
     if not u_flags.empty:
-        j["win_start"] = j["dt"].dt.floor(f"{WINDOW_MIN}min") 
-        u_flags_mapped = u_flags[['user_id', 'win_start', 'severity']].copy()
-        u_flags_mapped['abuse_user_sev'] = u_flags_mapped['severity'].map(severity_map_numeric)
-        
-        # ▼▼▼ 수정된 부분: 필요한 'abuse_user_sev' 컬럼만 merge 하도록 명시 ▼▼▼
-        j = j.merge(u_flags_mapped[['user_id', 'win_start', 'abuse_user_sev']], on=['user_id', 'win_start'], how='left')
-        j.drop(columns=['win_start'], inplace=True, errors='ignore')
-    else:
-        j['abuse_user_sev'] = np.nan
+        ok = (j["user_id"] >= 0).to_numpy() & j["dt"].notna().to_numpy()
+        left = (pd.DataFrame({"_pos": np.flatnonzero(ok),
+                              "user_id": j["user_id"].to_numpy()[ok].astype("int64"),
+                              "dt": j["dt"].to_numpy()[ok]})
+                  .astype({"dt": "datetime64[ns]"}).sort_values("dt", kind="stable"))
+        right = (u_flags[['user_id', 'win_start', 'win_end']]
+                   .assign(abuse_user_sev=u_flags['severity'].astype(str).map(severity_map_numeric).to_numpy())
+                   .astype({"user_id": "int64", "win_start": "datetime64[ns]", "win_end": "datetime64[ns]"})
+                   .sort_values("win_start", kind="stable"))
+        m = pd.merge_asof(left, right, left_on="dt", right_on="win_start", by="user_id", direction="backward")
+        m = m[m["dt"] < m["win_end"]]
+        sev = np.full(len(j), np.nan)
+        sev[m["_pos"].to_numpy()] = m["abuse_user_sev"].to_numpy(dtype=float)
+        j['abuse_user_sev'] = sev
     
     # --- 2단계: 퍼블리셔(pub_sub_rel_id) 기반 등급 부여 ---
     if not pub_flags.empty:
@@ -282,5 +351,5 @@ df_join_v1 = enrich_with_multi_participation_flags(df_join_v1, u_flags, pub_flag
 df_list_v1 = build_list_with_multi_participation_rate(df_list_v1, df_join_v1)
 
 # 저장
-df_join_v1.to_csv("df_join_v1.csv", index=False)
-df_list_v1.to_csv("df_list_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("join", df_join_v1, ["abuse_5"])
+abuse_store.save_columns("list", df_list_v1, ["abuse_5"])
\ No newline at end of file
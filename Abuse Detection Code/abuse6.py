@@ -38,32 +38,72 @@ def _autoscale_ctit_seconds(s: pd.Series) -> pd.Series:
     out = (s / best_div).clip(lower=0, upper=7*24*3600)  # 최대 7일
     return out
 
-# 헬퍼: 행 단위 '짧음' 기준(초)
-def _ctit_short_sec_for_rows(df: pd.DataFrame) -> pd.Series:
-    sec = pd.Series(np.nan, index=df.index, dtype=float)
-    if "ads_category" in df.columns:
-        sec = df["ads_category"].map(SHORT_SEC_BY_CAT)
-    if "ads_type" in df.columns:
-        sec = sec.fillna(df["ads_type"].map(SHORT_SEC_BY_TYPE))
-    return sec.fillna(10.0)
-
-# 메인: CTIT 의심/확정만 반환(정상 제외)
-def detect_ctit_severity(
+# 헬퍼: 사전 → 정수 키 룩업 배열(없는 키/비정수/결측은 default)
+def _lookup(values, mapping: dict, default=np.nan) -> np.ndarray:
+    v = pd.to_numeric(pd.Series(np.asarray(values)), errors="coerce").to_numpy(dtype="float64")
+    lut = np.full(max(mapping) + 1, default, dtype="float64")
+    for k, x in mapping.items():
+        lut[k] = x
+    ok = np.isfinite(v) & (v >= 0) & (v < len(lut)) & (v == np.floor(v))
+    out = np.full(len(v), default, dtype="float64")
+    out[ok] = lut[v[ok].astype("int64")]
+    return out
+
+# 헬퍼: 광고별 '짧음' 기준(초) — 카테고리 우선, 없으면 타입, 둘 다 없으면 10초
+def _ctit_short_sec_by_ad(meta: pd.DataFrame) -> np.ndarray:
+    sec = _lookup(meta["ads_category"], SHORT_SEC_BY_CAT) if "ads_category" in meta.columns else np.full(len(meta), np.nan)
+    if "ads_type" in meta.columns:
+        sec = np.where(np.isnan(sec), _lookup(meta["ads_type"], SHORT_SEC_BY_TYPE), sec)
+    return np.where(np.isnan(sec), 10.0, sec)
+
+def _group_sums(code, n_grp, click_key, is_short, is_long):
+    """그룹 코드별 n(click_key 고유수)·short_n·long_n."""
+    ok = code >= 0
+    ck = pd.factorize(click_key)[0]
+    m = int(ck.max()) + 1 if len(ck) and ck.max() >= 0 else 1
+    pair = np.unique(code[ok & (ck >= 0)].astype("int64") * m + ck[ok & (ck >= 0)])
+    n = np.bincount(pair // m, minlength=n_grp)
+    short_n = np.bincount(code[ok], weights=is_short[ok], minlength=n_grp).astype("int64")
+    long_n  = np.bincount(code[ok], weights=is_long[ok], minlength=n_grp).astype("int64")
+    return n, short_n, long_n
+
+def _severity(g, short_th, pub_top_short_sh, pub_top_contrib, sus_mult, conf_long_mult):
+    base_ok   = g["n"] >= MIN_N_PER_DAY
+    short_hit = base_ok & (g["short_sh"] >= short_th)
+    long_hit  = base_ok & (g["long_sh"]  >= LONG_SHARE_TH)
+    short_near= base_ok & (g["short_sh"] >= short_th*sus_mult)
+    long_near = base_ok & (g["long_sh"]  >= LONG_SHARE_TH*sus_mult)
+    conf = (short_hit & long_hit) \
+           | (short_hit & (np.nan_to_num(pub_top_short_sh) >= PUB_TOP_SHORT_SH_TH)
+                       & (np.nan_to_num(pub_top_contrib) >= PUB_TOP_CONTRIB_TH)) \
+           | (base_ok & (g["long_sh"] >= LONG_SHARE_TH*conf_long_mult))
+    sus  = (~conf) & (short_near | long_near)
+    return np.select([conf, sus], [2, 1], default=0).astype("int8")
+
+# 메인 엔진: settle 행 1회 전처리 → 광고×날짜 / 퍼블리셔×날짜 동시 집계 + 행 위치 라벨
+def ctit_engine(
     df_settle: pd.DataFrame,
     df_list:   pd.DataFrame,
-    by: str = "ad_date",             # "ad_date" | "publisher_date"
     *,
     device_only: bool = False,
     sus_mult: float = 0.85,
     conf_long_mult: float = 1.5
-) -> pd.DataFrame:
+) -> dict:
+    """
+    반환: {"ad_date": 광고×날짜 의심/확정표, "publisher_date": 퍼블리셔×날짜 의심/확정표,
+           "row_sev": df_settle 행 위치별 abuse_6(0/1/2) = max(광고×날짜, 퍼블리셔×날짜)}
+    - click_date 파싱·CTIT 정규화·짧음/김 판정은 행마다 1회(짧음 기준은 ads_category/ads_type 룩업 배열)
+    - 퍼블리셔 그룹 합계로 광고 그룹의 퍼블리셔 쏠림(top 짧음 비율·기여도)을 같은 패스에서 계산
+    """
     # ---- 메타 최소 ----
     meta_cols = [c for c in ["ads_idx","ads_type","ads_category","ads_code","ads_name"] if c in df_list.columns]
-    meta = df_list[meta_cols].drop_duplicates("ads_idx")
+    meta = df_list[meta_cols].drop_duplicates("ads_idx").reset_index(drop=True)
+    ad_pos = pd.Index(meta["ads_idx"])
 
     # ---- 원본/전처리 ----
-    need_cols = ["mda_idx","ads_idx","pub_sub_rel_id","click_key","click_date","ctit","dvc_idx"]  # ← mda_idx 추가
+    need_cols = ["mda_idx","ads_idx","pub_sub_rel_id","click_key","click_date","ctit","dvc_idx"]
     st = df_settle[[c for c in need_cols if c in df_settle.columns]].copy()
+    st["_row"]    = np.arange(len(st))
     st["dt"]      = pd.to_datetime(st["click_date"], errors="coerce")
     st            = st[st["dt"].notna()].copy()
     st["date"]    = st["dt"].dt.date
@@ -71,220 +111,102 @@ def detect_ctit_severity(
     st["dvc_idx"] = pd.to_numeric(st.get("dvc_idx", 0), errors="coerce").fillna(0).astype("int64")
     if device_only:
         st = st[st["dvc_idx"] != 0]
-    # mda_idx 없는 행 제거
-    st = st.dropna(subset=["mda_idx"]).copy()
-    if st.empty:
-        base_cols = ["mda_idx","ads_idx","date","n","short_sh","long_sh","severity"]
-        if by=="publisher_date": base_cols.insert(3,"pub_sub_rel_id")
-        return pd.DataFrame(columns=base_cols)
-
-    # ---- CTIT(초) 정규화 + 라벨 원재료 ----
-    st["ctit"]      = _autoscale_ctit_seconds(st["ctit"])
-    st              = st.merge(meta, on="ads_idx", how="left", validate="m:1")
-    st["short_sec"] = _ctit_short_sec_for_rows(st)
-    st["is_short"]  = st["ctit"].le(st["short_sec"])
-    st["is_long"]   = st["ctit"].ge(LONG_SEC_DEFAULT)
-
-    # ---- 집계키 (mda_idx 포함) ----
-    if by == "ad_date":
-        keys = ["mda_idx","ads_idx","date"]
-    else:  # publisher_date
-        keys = ["mda_idx","ads_idx","date","pub_sub_rel_id"]
-
-    g = (st.groupby(keys, as_index=False)
-           .agg(n=("click_key","nunique"),
-                short_n=("is_short","sum"),
-                long_n=("is_long","sum")))
-
-    # 비율 + 타입별 기준
-    g = g.merge(meta[["ads_idx","ads_type"]], on="ads_idx", how="left")
-    g["short_sh"] = np.where(g["n"]>0, g["short_n"]/g["n"], np.nan)
-    g["long_sh"]  = np.where(g["n"]>0, g["long_n"]/g["n"], np.nan)
-    g["short_th"] = g["ads_type"].map(SHORT_SHARE_TH_BY_TYPE).fillna(0.8)
-    long_th       = LONG_SHARE_TH
-
-    base_ok   = g["n"] >= MIN_N_PER_DAY
-    short_hit = base_ok & (g["short_sh"] >= g["short_th"])
-    long_hit  = base_ok & (g["long_sh"]  >= long_th)
-    short_near= base_ok & (g["short_sh"] >= g["short_th"]*sus_mult)
-    long_near = base_ok & (g["long_sh"]  >= long_th*sus_mult)
-
-    # 퍼블리셔 쏠림(광고×날짜에서만) — mda_idx 포함해서 계산
-    if by == "ad_date":
-        sp = (st.groupby(["mda_idx","ads_idx","date","pub_sub_rel_id"], as_index=False)
-                .agg(n=("click_key","nunique"),
-                     short_n=("is_short","sum")))
-        if len(sp):
-            sp["short_sh"] = np.where(sp["n"]>0, sp["short_n"]/sp["n"], np.nan)
-            tot = (sp.groupby(["mda_idx","ads_idx","date"], as_index=False)["n"]
-                      .sum().rename(columns={"n":"n_total"}))
-            top = (sp.merge(tot, on=["mda_idx","ads_idx","date"])
-                     .sort_values(["mda_idx","ads_idx","date","short_sh"], ascending=[True,True,True,False])
-                     .drop_duplicates(["mda_idx","ads_idx","date"]))
-            top["pub_top_contrib"] = np.where(top["n_total"]>0, top["n"]/top["n_total"], np.nan)
-            g = g.merge(
-                top[["mda_idx","ads_idx","date","short_sh","pub_top_contrib"]]
-                    .rename(columns={"short_sh":"pub_top_short_sh"}),
-                on=["mda_idx","ads_idx","date"], how="left"
-            )
-        else:
-            g["pub_top_short_sh"] = np.nan
-            g["pub_top_contrib"]  = np.nan
-    else:
-        g["pub_top_short_sh"] = np.nan
-        g["pub_top_contrib"]  = np.nan
-
-    # ---- severity 분류(정상 제외) ----
-    conf = (short_hit & long_hit) \
-           | (short_hit & (g["pub_top_short_sh"].fillna(0)>=PUB_TOP_SHORT_SH_TH)
-                       & (g["pub_top_contrib"].fillna(0) >=PUB_TOP_CONTRIB_TH)) \
-           | (base_ok & (g["long_sh"] >= long_th*conf_long_mult))
-    sus  = (~conf) & (short_near | long_near)
-
-    g["severity"] = np.select([conf, sus], ["확정","의심"], default="정상")
-    g = g[g["severity"]!="정상"].copy()
-    g["severity"] = pd.Categorical(g["severity"], categories=["의심","확정"], ordered=True)
+    st = st.dropna(subset=["mda_idx"]).reset_index(drop=True)   # mda_idx 없는 행 제거
 
-    # ✅ ads_code/ads_name 붙이기(있을 때만)
+    row_sev = np.zeros(len(df_settle), dtype="int8")
+    if st.empty:
+        empty = pd.DataFrame(columns=["mda_idx","ads_idx","date","n","short_sh","long_sh","severity"])
+        return {"ad_date": empty, "publisher_date": empty.reindex(columns=["mda_idx","ads_idx","date","pub_sub_rel_id","n","short_sh","long_sh","severity"]),
+                "row_sev": row_sev}
+
+    # ---- CTIT(초) 정규화 + 짧음/김 ----
+    ctit = _autoscale_ctit_seconds(st["ctit"]).to_numpy()
+    ai = ad_pos.get_indexer(st["ads_idx"])
+    short_sec_ad = _ctit_short_sec_by_ad(meta)
+    short_sec = np.where(ai >= 0, short_sec_ad[np.clip(ai, 0, None)], 10.0) if len(meta) else np.full(len(st), 10.0)
+    is_short = ctit <= short_sec          # NaN CTIT는 False
+    is_long  = ctit >= LONG_SEC_DEFAULT
+    short_th_ad = _lookup(meta["ads_type"], SHORT_SHARE_TH_BY_TYPE, 0.8) if "ads_type" in meta.columns else np.full(len(meta), 0.8)
+
+    # ---- 그룹 코드(정렬 순서 = groupby 결과 순서) ----
+    ad_keys, pub_keys = ["mda_idx","ads_idx","date"], ["mda_idx","ads_idx","date","pub_sub_rel_id"]
+    def _ngroup(keys):   # 키 결측 행은 -1 (groupby dropna와 동일)
+        return st.groupby(keys, sort=True).ngroup().fillna(-1).to_numpy().astype("int64")
+    c_ad  = _ngroup(ad_keys)
+    c_pub = _ngroup(pub_keys) if "pub_sub_rel_id" in st.columns else np.full(len(st), -1)
+    n_ad, n_pub = int(c_ad.max()) + 1, int(c_pub.max()) + 1
+
+    def _table(code, n_grp, keys):
+        first = np.unique(code[code >= 0], return_index=True)[1] if n_grp else np.zeros(0, dtype="int64")
+        first = np.flatnonzero(code >= 0)[first]
+        g = st.iloc[first][keys].reset_index(drop=True)
+        g["n"], short_n, long_n = _group_sums(code, n_grp, st["click_key"], is_short, is_long)
+        g["short_sh"] = np.where(g["n"]>0, short_n/np.maximum(g["n"], 1), np.nan)
+        g["long_sh"]  = np.where(g["n"]>0, long_n/np.maximum(g["n"], 1), np.nan)
+        gi = ad_pos.get_indexer(g["ads_idx"])
+        short_th = np.where(gi >= 0, short_th_ad[np.clip(gi, 0, None)], 0.8) if len(meta) else np.full(len(g), 0.8)
+        return g, short_th, first
+
+    ad_g, ad_th, _ = _table(c_ad, n_ad, ad_keys)
+    pub_g, pub_th, pub_first = _table(c_pub, n_pub, pub_keys)
+
+    # ---- 퍼블리셔 쏠림(광고×날짜): 퍼블리셔 그룹 → 소속 광고 그룹 ----
+    top_sh = np.full(n_ad, np.nan)
+    top_contrib = np.full(n_ad, np.nan)
+    if n_pub:
+        parent = c_ad[pub_first]
+        n_total = np.bincount(parent, weights=pub_g["n"], minlength=n_ad)
+        sh = pub_g["short_sh"].to_numpy()
+        order = np.lexsort((np.arange(n_pub), np.where(np.isnan(sh), np.inf, -sh), parent))
+        head = order[np.r_[True, parent[order][1:] != parent[order][:-1]]]
+        top_sh[parent[head]] = sh[head]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            top_contrib[parent[head]] = np.where(n_total[parent[head]] > 0,
+                                                 pub_g["n"].to_numpy()[head] / n_total[parent[head]], np.nan)
+
+    sev_ad  = _severity(ad_g, ad_th, top_sh, top_contrib, sus_mult, conf_long_mult)
+    sev_pub = _severity(pub_g, pub_th, np.full(n_pub, np.nan), np.full(n_pub, np.nan), sus_mult, conf_long_mult)
+
+    # ---- 행 위치 라벨: max(광고×날짜, 퍼블리셔×날짜) ----
+    sev_row = sev_ad[c_ad]
+    has_pub = c_pub >= 0
+    sev_row[has_pub] = np.maximum(sev_row[has_pub], sev_pub[c_pub[has_pub]])
+    row_sev[st["_row"].to_numpy()] = sev_row
+
+    # ---- 출력(정상 제외) ----
     add_meta = [c for c in ["ads_code","ads_name"] if c in meta.columns]
-    if add_meta:
-        g = g.merge(meta[["ads_idx"]+add_meta], on="ads_idx", how="left")
-
-    # ---- 출력 슬림(존재하는 컬럼만 안전 선택) ----
-    preferred = ["mda_idx","ads_idx"] + [c for c in ["ads_code","ads_name"] if c in g.columns]
-    if by=="publisher_date":
-        preferred += ["pub_sub_rel_id"]
-    preferred += ["date","n","short_sh","long_sh","severity"]
-
-    out_cols = [c for c in preferred if c in g.columns]
-    out = g[out_cols].sort_values(
-        ["severity","mda_idx","ads_idx","short_sh","long_sh"] if {"short_sh","long_sh"}.issubset(g.columns)
-        else ["severity","mda_idx","ads_idx"],
-        ascending=[True,True,True,False,False] if {"short_sh","long_sh"}.issubset(g.columns) else [True,True,True]
-    ).reset_index(drop=True)
-    return out
-
-# 결과
-# 광고×날짜 (퍼블리셔 쏠림 승격 로직 포함)
-ctit_ad_flags = detect_ctit_severity(
-    df_settle, df_list, by="ad_date",
+    def _out(g, sev, by):
+        g = g[sev > 0].copy()
+        g["severity"] = pd.Categorical(np.where(sev[sev > 0] == 2, "확정", "의심"), categories=["의심","확정"], ordered=True)
+        if add_meta:
+            g = g.merge(meta[["ads_idx"]+add_meta], on="ads_idx", how="left")
+        preferred = ["mda_idx","ads_idx"] + add_meta + (["pub_sub_rel_id"] if by=="publisher_date" else []) \
+                    + ["date","n","short_sh","long_sh","severity"]
+        return (g[[c for c in preferred if c in g.columns]]
+                .sort_values(["severity","mda_idx","ads_idx","short_sh","long_sh"], ascending=[True,True,True,False,False])
+                .reset_index(drop=True))
+
+    return {"ad_date": _out(ad_g, sev_ad, "ad_date"), "publisher_date": _out(pub_g, sev_pub, "publisher_date"),
+            "row_sev": row_sev}
+
+# 호환: 집계 수준 1개만 필요할 때
+def detect_ctit_severity(df_settle, df_list, by: str = "ad_date", **kw) -> pd.DataFrame:
+    return ctit_engine(df_settle, df_list, **kw)[by]
+
+# 결과 (광고×날짜: 퍼블리셔 쏠림 승격 포함 / 퍼블리셔×날짜) — 1회 계산
+ctit_res = ctit_engine(
+    df_settle, df_list,
     device_only=False,      # 웹 포함하려면 False, 웹 제외하려면 True
     sus_mult=0.85,          # 의심선(낮출수록 의심↑)  예: 0.80 ~ 0.95
     conf_long_mult=1.5      # 긴 쪽 확정선(낮출수록 확정↑) 예: 1.3 ~ 2.0
 )
+ctit_ad_flags, ctit_pub_flags = ctit_res["ad_date"], ctit_res["publisher_date"]
 
-# 퍼블리셔×날짜
-ctit_pub_flags = detect_ctit_severity(
-    df_settle, df_list, by="publisher_date",
-    sus_mult=0.85, conf_long_mult=1.5
-)
-
-SEV2NUM = {"정상":0, "의심":1, "확정":2}
-
-def _prep_flags_unique(flag_df: pd.DataFrame, by: str) -> pd.DataFrame:
-    """
-    detect_ctit_severity 출력표를 병합-안전형으로 축약:
-    - date 통일
-    - severity -> sev_code(Int8)
-    - 키별 max(sev_code)로 1행화 (중복 제거)
-    - 반환 키:
-        ad_date:        [mda_idx, ads_idx, date, sev_code]
-        publisher_date: [mda_idx, ads_idx, date, pub_sub_rel_id, sev_code]
-    """
-    if flag_df is None or flag_df.empty:
-        return pd.DataFrame()
-
-    f = flag_df.copy()
-    f["date"] = pd.to_datetime(f["date"], errors="coerce").dt.date
-
-    if by == "ad_date":
-        keys = ["mda_idx","ads_idx","date"]
-    else:
-        keys = ["mda_idx","ads_idx","date","pub_sub_rel_id"]
-
-    keep = [c for c in keys + ["severity"] if c in f.columns]
-    f = f[keep].copy()
-
-    # 타입 정규화
-    for col in [c for c in ["mda_idx","ads_idx","pub_sub_rel_id"] if c in f.columns]:
-        f[col] = pd.to_numeric(f[col], errors="coerce")
-
-    f["sev_code"] = f["severity"].map(SEV2NUM).astype("Int8")
-
-    # 키별 1행화 (최댓값)
-    f = (f.groupby(keys, observed=True, as_index=False)["sev_code"].max())
-    return f
-
-
-def enrich_settle_with_ctit_flags(df_settle, ctit_ad_flags, ctit_pub_flags, *, strict=True):
-    """
-    df_settle에 abuse_6(0/1/2) '하나'만 추가. 행 수는 반드시 보존.
-    - ad_date, publisher_date 플래그는 키별 유일화 후 병합(m:1)
-    - 내부 보조 컬럼은 모두 제거
-    """
-    s = df_settle.copy()
-    n0 = len(s)
-
-    # 키/날짜 정규화
-    s["dt"]   = pd.to_datetime(s["click_date"], errors="coerce")
-    s["date"] = s["dt"].dt.date
-    for col in [c for c in ["mda_idx","ads_idx","pub_sub_rel_id"] if c in s.columns]:
-        s[col] = pd.to_numeric(s[col], errors="coerce")
-
-    # 1) 광고×날짜 플래그 (mda 포함)
-    ad_u = _prep_flags_unique(ctit_ad_flags, by="ad_date")
-    if not ad_u.empty:
-        try:
-            s = s.merge(ad_u.rename(columns={"sev_code":"_ad_sev"}),
-                        on=[c for c in ["mda_idx","ads_idx","date"] if c in s.columns],
-                        how="left",
-                        validate="m:1")
-        except Exception as e:
-            if strict:
-                raise
-            # 혹시 모를 중복을 한 번 더 방어
-            ad_u = (ad_u.groupby([c for c in ad_u.columns if c not in ["sev_code"]], observed=True)
-                        .agg(sev_code=("sev_code","max")).reset_index()) \
-                   .rename(columns={"sev_code":"_ad_sev"})
-            s = s.merge(ad_u, on=[c for c in ["mda_idx","ads_idx","date"] if c in s.columns], how="left")
-    else:
-        s["_ad_sev"] = pd.Series(pd.NA, index=s.index, dtype="Int8")
-
-    # 2) 퍼블리셔×날짜 플래그 (mda 포함)
-    pub_u = _prep_flags_unique(ctit_pub_flags, by="publisher_date")
-    if not pub_u.empty:
-        keys = [c for c in ["mda_idx","ads_idx","date","pub_sub_rel_id"] if c in s.columns]
-        try:
-            s = s.merge(pub_u.rename(columns={"sev_code":"_pub_sev"}),
-                        on=keys, how="left", validate="m:1")
-        except Exception as e:
-            if strict:
-                raise
-            pub_u = (pub_u.groupby(keys, observed=True)
-                        .agg(sev_code=("sev_code","max")).reset_index()) \
-                   .rename(columns={"sev_code":"_pub_sev"})
-            s = s.merge(pub_u, on=keys, how="left")
-    else:
-        s["_pub_sev"] = pd.Series(pd.NA, index=s.index, dtype="Int8")
-
-    # 3) 최종 abuse_6 = max(ad, pub)  (결측→0)
-    s["_ad_sev"]  = pd.to_numeric(s["_ad_sev"], errors="coerce").fillna(0).astype("int8")
-    s["_pub_sev"] = pd.to_numeric(s["_pub_sev"], errors="coerce").fillna(0).astype("int8")
-    s["abuse_6"]  = s[["_ad_sev","_pub_sev"]].max(axis=1).astype("int8")
-
-    # 보조 컬럼 제거 → abuse_6 하나만 남김
-    s.drop(columns=["dt","date","_ad_sev","_pub_sev"], inplace=True, errors="ignore")
-
-    # 행수 검증
-    n1 = len(s)
-    if n1 != n0:
-        raise RuntimeError(f"행수 불일치: before={n0}, after={n1}. (우측 테이블 중복 키로 인한 확장 가능성)")
-
-    # 새 컬럼 확인 (디버그 원하면 주석 해제)
-    # new_cols = [c for c in s.columns if c not in df_settle.columns or c=="abuse_6"]
-    # print({"new_columns": new_cols})
-
-    return s
+def enrich_settle_with_ctit_flags(df_settle: pd.DataFrame, row_sev: np.ndarray) -> pd.DataFrame:
+    """df_settle에 abuse_6(0/1/2) '하나'만 추가. 엔진의 행 위치 라벨을 그대로 붙이므로 행 수/순서 보존."""
+    if len(row_sev) != len(df_settle):
+        raise RuntimeError(f"행수 불일치: settle={len(df_settle)}, 라벨={len(row_sev)}")
+    return df_settle.assign(abuse_6=np.asarray(row_sev, dtype="int8"))
 
 def build_list_with_ctit_rate(df_list: pd.DataFrame, df_settle_v1: pd.DataFrame) -> pd.DataFrame:
     """
@@ -318,7 +240,7 @@ def build_list_with_ctit_rate(df_list: pd.DataFrame, df_settle_v1: pd.DataFrame)
 
 # ===== 3) df_settle 라벨 전파 (행수 보존 + abuse_6 하나만 추가) =====
 n0 = len(df_settle_v1)
-df_settle_v1 = enrich_settle_with_ctit_flags(df_settle_v1, ctit_ad_flags, ctit_pub_flags)  # 행수 동일 유지
+df_settle_v1 = enrich_settle_with_ctit_flags(df_settle_v1, ctit_res["row_sev"])  # 행수 동일 유지
 assert len(df_settle_v1) == n0, "행수 변하면 안 됨!"
 assert "abuse_6" in df_settle_v1.columns and df_settle_v1.filter(regex="^_ad_sev|_pub_sev$").empty, "abuse_6만 남아야 함"
 
@@ -326,5 +248,5 @@ assert "abuse_6" in df_settle_v1.columns and df_settle_v1.filter(regex="^_ad_sev
 df_list_v1 = build_list_with_ctit_rate(df_list_v1, df_settle_v1)
 
 # 확인 후 저장
-df_settle_v1.to_csv("df_settle_v1.csv", index=False)
-df_list_v1.to_csv("df_list_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("settle", df_settle_v1, ["abuse_6"])
+abuse_store.save_columns("list", df_list_v1, ["abuse_6"])
\ No newline at end of file
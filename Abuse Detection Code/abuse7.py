@@ -24,6 +24,8 @@ TOPK = 8
 SEV2TXT = {0: "정상", 1: "의심", 2: "확정"}
 TXT2SEV = {"정상": 0, "의심": 1, "확정": 2}
 
+from abuse_rolling import group_stats
+
 # ---------- 유틸 ----------
 def _check_cols(df, need, opt=None, name="df"):
     opt = opt or []
@@ -59,18 +61,16 @@ def build_media_baseline_from_rpt(df_rpt: pd.DataFrame) -> pd.DataFrame:
                .agg(turn=("turn","sum"), earn=("earn","sum")))
     daily["unit_price"] = np.where(daily["turn"]>0, daily["earn"]/daily["turn"], np.nan)
 
-    base = (daily.groupby("mda_idx", observed=True)
-                 .agg(turn_mean=("turn","mean"),
-                      turn_median=("turn","median"),
-                      turn_std=("turn","std"),
-                      turn_count=("turn","count"),
-                      earn_mean=("earn","mean"),
-                      earn_median=("earn","median"),
-                      earn_std=("earn","std"),
-                      up_mean=("unit_price","mean"),
-                      up_median=("unit_price","median"),
-                      up_std=("unit_price","std"))
-                 .reset_index())
+    # mda별 평균/중앙값/표준편차/건수: 정렬 1회 커널
+    codes, mda = pd.factorize(daily["mda_idx"], sort=True)
+    base = pd.DataFrame({"mda_idx": np.asarray(mda)})
+    for col, pre in (("turn","turn"), ("earn","earn"), ("unit_price","up")):
+        st = group_stats(daily[col], codes)
+        base[f"{pre}_mean"], base[f"{pre}_median"], base[f"{pre}_std"] = st["mean"], st["median"], st["std"]
+        if pre == "turn":
+            base["turn_count"] = st["count"]
+    base = base[["mda_idx","turn_mean","turn_median","turn_std","turn_count",
+                 "earn_mean","earn_median","earn_std","up_mean","up_median","up_std"]]
 
     # 규모 라벨 (turn_mean 기준)
     base["media_size"] = pd.cut(
@@ -111,55 +111,47 @@ def detect_subpub_spikes_tuned(df_settle: pd.DataFrame, media_baseline: pd.DataF
     b = media_baseline[use_cols].copy()
     gg = g.merge(b, on="mda_idx", how="left")
 
-    # 필터: 일 최소 볼륨
-    gg = gg[gg["volume"] >= MIN_DAILY_VOLUME].copy()
-
-    # 임계 계산 함수
-    def _thr(ms):
-        if ms == "large":
-            return PRICE_SPIKE_RATIO*1.5, PRICE_SPIKE_Z_SCORE*1.2
-        elif ms == "medium":
-            return PRICE_SPIKE_RATIO, PRICE_SPIKE_Z_SCORE
-        else:  # small
-            return PRICE_SPIKE_RATIO*0.8, PRICE_SPIKE_Z_SCORE*0.8
-
-    # 이상치 산출
-    rows = []
-    for _, r in gg.iterrows():
-        base_p  = r["up_mean"]
-        base_sd = r["up_std"] if pd.notna(r["up_std"]) and r["up_std"]>0 else (r["up_mean"]*0.3 if pd.notna(r["up_mean"]) else np.nan)
-        cur_p   = r["unit_price"]
-        ms      = r["media_size"]
-
-        if not np.isfinite(base_p) or not np.isfinite(base_sd) or not np.isfinite(cur_p):
-            continue
-
-        ratio_thr, z_thr = _thr(ms)
-        price_ratio = cur_p / base_p if base_p>0 else np.inf
-        z_score     = (cur_p - base_p) / base_sd if base_sd>0 else np.inf
-        vol_ratio   = (r["volume"]/r["turn_mean"]) if (pd.notna(r["turn_mean"]) and r["turn_mean"]>0) else 1.0
-
-        is_price_spike  = (price_ratio >= ratio_thr) or (z_score >= z_thr)
-        is_volume_spike = (vol_ratio   >= VOLUME_SPIKE_RATIO)
-        is_extreme      = (cur_p >= 5000)
-
-        if (is_price_spike and is_volume_spike) or is_extreme:
-            severity_score = float(price_ratio * (abs(z_score)+1) * vol_ratio)
-            
-            # sus_mult, conf_mult 적용한 임계값 계산
-            sus_threshold = 10 * SUS_MULT
-            conf_threshold = 25 * CONF_MULT
-            
-            sev = 2 if (is_extreme and cur_p>=10000) or (severity_score>=conf_threshold) else (1 if severity_score>=sus_threshold or is_extreme else 0)
-            if sev>0:
-                rows.append({
-                    "date": r["date"], "mda_idx": r["mda_idx"], "pub_sub_rel_id": r["pub_sub_rel_id"],
-                    "n_settle": int(r["volume"]), "sum_earn": float(r["total_earn"]), "eps": float(cur_p),
-                    "price_ratio": float(price_ratio), "z_score": float(z_score), "volume_ratio": float(vol_ratio),
-                    "media_size": ms, "severity": SEV2TXT[sev], "risk_score": float(severity_score)
-                })
-
-    subpub = pd.DataFrame(rows)
+    # 규모별 임계(_thr): media_size 조회 — large ×(1.5, 1.2), medium ×1, 그 외(small/결측) ×0.8
+    ms = gg["media_size"].astype(object)
+    ratio_thr = PRICE_SPIKE_RATIO   * ms.map({"large": 1.5, "medium": 1.0}).fillna(0.8).to_numpy(dtype=float)
+    z_thr     = PRICE_SPIKE_Z_SCORE * ms.map({"large": 1.2, "medium": 1.0}).fillna(0.8).to_numpy(dtype=float)
+
+    # 이상치 산출(컬럼 연산)
+    base_p  = gg["up_mean"].to_numpy(dtype=float)
+    up_std  = gg["up_std"].to_numpy(dtype=float)
+    base_sd = np.where(up_std > 0, up_std, base_p * 0.3)          # std 결측/0 → 평균의 30%
+    cur_p   = gg["unit_price"].to_numpy(dtype=float)
+    volume  = gg["volume"].to_numpy(dtype=float)
+    turn_m  = gg["turn_mean"].to_numpy(dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_ratio = np.where(base_p > 0, cur_p / base_p, np.inf)
+        z_score     = np.where(base_sd > 0, (cur_p - base_p) / base_sd, np.inf)
+        vol_ratio   = np.where(turn_m > 0, volume / turn_m, 1.0)
+        severity_score = price_ratio * (np.abs(z_score) + 1) * vol_ratio
+
+    valid = (volume >= MIN_DAILY_VOLUME) & np.isfinite(base_p) & np.isfinite(base_sd) & np.isfinite(cur_p)
+    is_price_spike  = (price_ratio >= ratio_thr) | (z_score >= z_thr)
+    is_volume_spike = vol_ratio >= VOLUME_SPIKE_RATIO
+    is_extreme      = cur_p >= 5000
+
+    # sus_mult, conf_mult 적용한 임계값
+    sus_threshold  = 10 * SUS_MULT
+    conf_threshold = 25 * CONF_MULT
+    sev = np.select(
+        [(is_extreme & (cur_p >= 10000)) | (severity_score >= conf_threshold),
+         (severity_score >= sus_threshold) | is_extreme],
+        [2, 1], default=0)
+    hit = valid & ((is_price_spike & is_volume_spike) | is_extreme) & (sev > 0)
+
+    subpub = pd.DataFrame({
+        "date": gg["date"].to_numpy()[hit], "mda_idx": gg["mda_idx"].to_numpy()[hit],
+        "pub_sub_rel_id": gg["pub_sub_rel_id"].to_numpy()[hit],
+        "n_settle": volume[hit].astype(int), "sum_earn": gg["total_earn"].to_numpy(dtype=float)[hit],
+        "eps": cur_p[hit], "price_ratio": price_ratio[hit], "z_score": z_score[hit],
+        "volume_ratio": vol_ratio[hit], "media_size": ms.to_numpy()[hit],
+        "severity": pd.Series(sev[hit]).map(SEV2TXT).to_numpy(), "risk_score": severity_score[hit],
+    })
     if subpub.empty:
         return pd.DataFrame(columns=["date","mda_idx","pub_sub_rel_id","n_settle","sum_earn","eps",
                                      "price_ratio","z_score","volume_ratio","media_size",
@@ -299,5 +291,5 @@ mda_flags, subpub_top = detect_mda_spikes_and_drilldown(df_rpt_v1, df_settle_v1)
 df_rpt_v1, df_settle_v1 = apply_abuse7_labels(df_rpt_v1, df_settle_v1, mda_flags, subpub_top)
 
 # 저장
-df_settle_v1.to_csv("df_settle_v1.csv", index=False)
-df_rpt_v1.to_csv("df_rpt_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("settle", df_settle_v1, ["abuse_7"])
+abuse_store.save_columns("rpt", df_rpt_v1, ["abuse_7"])
\ No newline at end of file
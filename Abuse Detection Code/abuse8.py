@@ -12,6 +12,9 @@ P95_Q, P99_Q, P999_Q = 0.95, 0.99, 0.999
 # 시간 컬럼 후보
 TIME_COLS = ["click_time","click_date"]
 
+# 스트리밍 피처 빌더: 일 경계에 맞춘 시간 청크(5/10/60분 버킷은 청크를 넘지 않음)
+STREAM_CHUNK_DAYS = 7
+
 # 라벨 임계(보수)
 CONFIRM_HITS_MIN   = 3     # 확정 최소 룰수
 SUSPECT_HITS_MIN   = 2     # 의심 최소 룰수
@@ -28,19 +31,16 @@ MEDIA_SERVER_PATTERNS = [
     r'^15\.165\.', r'^13\.125\.', r'^52\.79\.', r'^34\.64\.', r'^175\.126\.'
 ]
 
-def _is_media_server_ip(ip_str):
-    """휴리스틱: 매체사 서버 IP 프리픽스 매칭(정확히 하려면 CIDR 기반으로 교체 권장)."""
-    if ip_str is None: return False
-    s = str(ip_str).strip()
-    if not s or s == "nan": return False
-    for pat in MEDIA_SERVER_PATTERNS:
-        if re.match(pat, s):
-            return True
-    return False
+from abuse_ip_class import is_media_server_ip
+
+def _is_media_server_ip(ips):
+    """휴리스틱: 매체사 서버 IP 프리픽스 매칭 → 행 단위 bool 배열(CIDR 구간 비교, 고유 IP 단위 메모)."""
+    return is_media_server_ip(ips, MEDIA_SERVER_PATTERNS)
 
 # 유틸 ==============================================================================
 
 import numpy as np, pandas as pd
+from abuse_ip_quality import ip_group_stats
 
 def _check_cols(df, need, name="df"):
     miss = [c for c in need if c not in df.columns]
@@ -79,33 +79,10 @@ def _ip_quality(df: pd.DataFrame):
         out["ip_unreliable"] = False
         return key, out
 
+    # rows/unique_ip/top1_ip/top1_share 1패스 집계(abuse1/2와 공용 캐시)
     key = _pick_group_key(df)
-    if key is None:
-        vc = df["user_ip"].astype(str).value_counts(dropna=False)
-        rows = int(len(df)); uniq = int(vc.size)
-        top1_ip = vc.index[0] if len(vc) else ""
-        top1_share = float(vc.iloc[0]/rows) if rows else 1.0
-        out = pd.DataFrame([{
-            "group_key": -1, "rows": rows, "unique_ip": uniq,
-            "top1_share": top1_share, "top1_ip": top1_ip
-        }])
-    else:
-        grp = df.groupby(key, observed=True)
-        rows = grp.size()
-        uniq = grp["user_ip"].apply(lambda s: s.astype(str).nunique())
-        top1_counts = grp["user_ip"].apply(lambda s: s.astype(str).value_counts().iloc[0] if len(s) else 0)
-        top1_ips    = grp["user_ip"].apply(lambda s: s.astype(str).value_counts().index[0] if len(s) else "")
-        out = pd.DataFrame({
-            "group_key": rows.index,
-            "rows": rows.values,
-            "unique_ip": uniq.values,
-            "top1_count": top1_counts.values,
-            "top1_ip": top1_ips.values
-        })
-        out["top1_share"] = (out["top1_count"] / out["rows"]).astype(float)
-
-    out["unique_ratio"] = out["unique_ip"].clip(lower=1) / out["rows"].clip(lower=1)
-    out["media_server_detected"] = out["top1_ip"].apply(_is_media_server_ip)
+    out = ip_group_stats(df, key)
+    out["media_server_detected"] = _is_media_server_ip(out["top1_ip"])
     out["ip_unreliable"] = (
         (out["rows"] >= MIN_ROWS_FOR_IP_CHECK)
         & (~out["media_server_detected"])
@@ -121,53 +98,205 @@ def _drop_dvc_zero(df: pd.DataFrame) -> pd.DataFrame:
 
 # 피처 ==============================================================================
 
+def _codes(s: pd.Series):
+    """category/일반 컬럼 → (int64 코드, 값 Index). 결측은 -1."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy().astype("int64"), s.cat.categories
+    c, u = pd.factorize(s)
+    return c.astype("int64"), pd.Index(u)
+
+def _per_key_counts(keys: np.ndarray):
+    """패킹 키 배열 → (고유 키, 개수)."""
+    return np.unique(keys, return_counts=True)
+
+def _dense_pair(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(a, b) 정수 쌍 → 조밀 코드(0..고유쌍-1). a를 먼저 조밀화해 a×(b 범위) 패킹이 int64를 넘지 않게 한다."""
+    ia = np.unique(a, return_inverse=True)[1].astype("int64")
+    return np.unique(ia * (int(b.max()) + 1) + b, return_inverse=True)[1].astype("int64")
+
+def _reduce(keys: tuple, cnt: np.ndarray):
+    """키 열 튜플(패킹 없음) 기준 정렬 후 같은 키끼리 cnt 합산 → (고유 키 열 튜플, 합계)."""
+    if not len(cnt):
+        return keys, cnt
+    order = np.lexsort(keys[::-1])
+    ks = tuple(k[order] for k in keys)
+    new = np.zeros(len(cnt), dtype=bool)
+    new[0] = True
+    for k in ks:
+        new[1:] |= k[1:] != k[:-1]
+    start = np.flatnonzero(new)
+    return tuple(k[start] for k in ks), np.add.reduceat(cnt[order], start)
+
+class _Tally:
+    """
+    청크별 (키 열들, 개수) 조각 누적. 대기 조각이 누적분 크기 이상 쌓이면 정렬·병합(합산)해
+    메모리는 고유 키 수의 약 2배 + 청크 1개, 병합 총비용은 청크 수가 아니라 누적 크기 기준(분할 상환).
+    """
+    def __init__(self, ncols: int):
+        self.keys = tuple(np.zeros(0, dtype="int64") for _ in range(ncols))
+        self.cnt = np.zeros(0, dtype="int64")
+        self.pend, self.n_pend = [], 0
+
+    def add(self, keys: tuple, cnt: np.ndarray) -> None:
+        self.pend.append((keys, cnt))
+        self.n_pend += len(cnt)
+        if self.n_pend >= len(self.cnt):
+            self._compact()
+
+    def _compact(self) -> None:
+        parts = [(self.keys, self.cnt)] + self.pend
+        keys = tuple(np.concatenate([p[0][i] for p in parts]) for i in range(len(self.keys)))
+        self.keys, self.cnt = _reduce(keys, np.concatenate([p[1] for p in parts]))
+        self.pend, self.n_pend = [], 0
+
+    def result(self):
+        """(고유 키 열 튜플 — 사전순 정렬, 합계)."""
+        if self.pend:
+            self._compact()
+        return self.keys, self.cnt
+
+    def hist(self, ent: np.ndarray, val: np.ndarray) -> None:
+        """(엔티티, 값) 관측 1건씩 → 히스토그램 누적."""
+        self.add((ent, val), np.ones(len(ent), dtype="int64"))
+
+def _hist_quantile(t: _Tally, q: float) -> pd.Series:
+    """
+    (엔티티, 값) 히스토그램에서 엔티티별 분위수.
+    값을 개수만큼 펼친 groupby.quantile(linear)과 같은 보간: v[lo] + (v[lo+1]-v[lo])×frac.
+    """
+    (ent, val), cnt = t.result()
+    if not len(cnt):
+        return pd.Series(dtype="float64")
+    first = np.flatnonzero(np.r_[True, ent[1:] != ent[:-1]])
+    csum = np.cumsum(cnt)
+    n = np.add.reduceat(cnt, first)
+    off = csum[first] - cnt[first]                    # 엔티티 시작 순위
+    pos = q * (n - 1)
+    lo = np.floor(pos).astype("int64")
+    frac = pos - lo
+    v_lo = val[np.searchsorted(csum, off + lo, side="right")].astype("float64")
+    v_hi = val[np.searchsorted(csum, off + np.minimum(lo + 1, n - 1), side="right")].astype("float64")
+    return pd.Series(np.where(frac == 0, v_lo, v_lo + (v_hi - v_lo) * frac), index=ent[first])
+
 def _compute_features(df: pd.DataFrame):
-    """IP/Device 피처 계산(서버 IP 제외, dvc_idx==0 제외)."""
+    """
+    IP/Device 피처 계산(서버 IP 제외, dvc_idx==0 제외).
+    시간순 1회 정렬 후 일 경계 청크로 스트리밍하며, 행 대신 정수 코드 키의 누적 집계(_Tally)만 유지:
+    - (dvc, ip) 고유쌍: ip_count / device_count
+    - 버킷별 고유 수(청크 내에서 완결) → (엔티티, 값) 히스토그램: ip_change_speed / burst5_ip / daily_actions_p95
+    - (ip, dvc) 활동일 합: device_repeat_rate_ip, 가산 집계: active_days_*, ads_overlap_rate / ads_overlap_windows
+    메모리는 행 수가 아니라 (dvc, ip) 고유쌍·(엔티티, 값) 히스토그램 크기(각 2배 이내) + 청크 1개에 비례.
+    """
     d = _drop_dvc_zero(df)
 
     # 서버 IP 제거(선택)
-    if "user_ip" in d.columns:
-        mask_server = d["user_ip"].apply(_is_media_server_ip).fillna(False)
-        d = d.loc[~mask_server].copy()
-
-    # Device 피처
-    if "user_ip" in d.columns:
-        dev_ip = d[["dvc_idx","user_ip"]].drop_duplicates()
-        dev_ip_cnt = dev_ip.groupby("dvc_idx", observed=True)["user_ip"].nunique().rename("ip_count")
+    has_ip = "user_ip" in d.columns
+    if has_ip:
+        d = d.loc[~_is_media_server_ip(d["user_ip"])]
+    has_ads = "ads_idx" in d.columns
+
+    dvc, dvc_vals = _codes(d["dvc_idx"])
+    ip, ip_vals = _codes(d["user_ip"]) if has_ip else (np.zeros(len(d), dtype="int64"), pd.Index(["na"]))
+    ads = _codes(d["ads_idx"])[0] if has_ads else None
+    day = d["t"].to_numpy().astype("datetime64[D]").astype("int64")
+    b5, b10, b1h = (d[c].to_numpy().astype("int64") for c in ("b5","b10","b1h"))
+    n_dvc, n_ip = max(len(dvc_vals), 1), max(len(ip_vals), 1)
+
+    # 누적 상태
+    pair_dev_ip = _Tally(2)                              # (dvc, ip) 고유쌍
+    act_dev  = np.zeros(n_dvc, dtype="int64")            # 활동일 수
+    act_ip   = np.zeros(n_ip, dtype="int64")
+    ipdev_days = _Tally(2)                               # (ip, dvc) 활동일 수 합
+    ovl_win  = np.zeros(n_ip, dtype="int64")             # (ip, ads, b10) 창 수
+    ovl_hit  = np.zeros(n_ip, dtype="int64")             # 그중 디바이스 2대 이상
+    spd, dly, bst = _Tally(2), _Tally(2), _Tally(2)      # (엔티티, 버킷 값) 히스토그램
+
+    order = np.argsort(day, kind="stable")
+    day_s = day[order]
+    if len(day_s):
+        edges = np.r_[np.arange(day_s[0], day_s[-1] + 1, STREAM_CHUNK_DAYS), day_s[-1] + 1]
+        cuts = np.searchsorted(day_s, edges, side="left")
     else:
-        dev_ip_cnt = d.groupby("dvc_idx", observed=True).size().rename("ip_count")
-    dev_b1h = (d[["dvc_idx","b1h","user_ip"]].drop_duplicates()
-               if "user_ip" in d.columns else d[["dvc_idx","b1h"]].drop_duplicates().assign(user_ip="na"))
-    ip_change_speed = (dev_b1h.groupby(["dvc_idx","b1h"], observed=True)["user_ip"].nunique()
-                       .groupby("dvc_idx", observed=True).quantile(P99_Q).rename("ip_change_speed"))
-    daily_actions_p95 = (d.groupby(["dvc_idx","day"], observed=True).size()
-                         .groupby("dvc_idx", observed=True).quantile(P95_Q).rename("daily_actions_p95"))
-    active_days_dev = d.groupby("dvc_idx", observed=True)["day"].nunique().rename("active_days_device")
-    dev_feat = pd.concat([dev_ip_cnt, ip_change_speed, daily_actions_p95, active_days_dev], axis=1).fillna(0)
-
-    # IP 피처
+        cuts = np.zeros(1, dtype="int64")
+
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        if a >= b:
+            continue
+        ix = order[a:b]
+        cd, ci, cy = dvc[ix], ip[ix], day[ix] - day_s[a]
+        ok_ip = ci >= 0
+        n_day = int(cy.max()) + 1
+
+        # Device: (dvc, ip) 쌍, (dvc, 1h) 고유 IP 수, (dvc, day) 행 수
+        k_di = np.unique(cd[ok_ip] * n_ip + ci[ok_ip])
+        pair_dev_ip.add((k_di // n_ip, k_di % n_ip), np.ones(len(k_di), dtype="int64"))
+        h = b1h[ix] - b1h[ix].min()
+        n_h = int(h.max()) + 1
+        k_dh, _ = _per_key_counts(cd * n_h + h)                              # 모든 (dvc, 1h) 버킷
+        k_dhi = np.unique((cd[ok_ip] * n_h + h[ok_ip]) * n_ip + ci[ok_ip])   # 결측 IP 제외 고유 IP
+        dh_of_ip, dh_cnt = _per_key_counts(k_dhi // n_ip)
+        cnt = np.zeros(len(k_dh), dtype="int64")
+        cnt[np.searchsorted(k_dh, dh_of_ip)] = dh_cnt
+        spd.hist(k_dh // n_h, cnt)
+        k_dd, c_dd = _per_key_counts(cd * n_day + cy)
+        dly.hist(k_dd // n_day, c_dd)
+        act_dev += np.bincount(k_dd // n_day, minlength=n_dvc)
+
+        if not has_ip or not ok_ip.any():
+            continue
+        # IP: (ip, dvc, day) / (ip, 5m) 고유 디바이스 수 / (ip, day) / (ip, ads, 10m)
+        ci, cd, cy = ci[ok_ip], cd[ok_ip], cy[ok_ip]
+        k_id, c_id = _per_key_counts(np.unique((ci * n_dvc + cd) * n_day + cy) // n_day)
+        ipdev_days.add((k_id // n_dvc, k_id % n_dvc), c_id)
+        act_ip += np.bincount(np.unique(ci * n_day + cy) // n_day, minlength=n_ip)
+
+        m5 = b5[ix][ok_ip] - b5[ix][ok_ip].min()
+        n_5 = int(m5.max()) + 1
+        k_i5 = np.unique((ci * n_5 + m5) * n_dvc + cd) // n_dvc
+        i5, c5 = _per_key_counts(k_i5)
+        bst.hist(i5 // n_5, c5)
+
+        if has_ads:
+            ca = ads[ix][ok_ip]
+            ok_a = ca >= 0
+            if not ok_a.any():
+                continue
+            # (ip, ads, 10m) 창 → 청크 내 조밀 코드로 줄인 뒤 디바이스와 결합(세 코드 곱 패킹의 int64 오버플로 방지)
+            wi = ci[ok_a]
+            m10 = b10[ix][ok_ip][ok_a]
+            w = _dense_pair(_dense_pair(wi, ca[ok_a]), m10 - m10.min())
+            ip_of_w = np.zeros(int(w.max()) + 1, dtype="int64")
+            ip_of_w[w] = wi
+            k_w, c_w = _per_key_counts(np.unique(w * n_dvc + cd[ok_a]) // n_dvc)
+            ip_w = ip_of_w[k_w]
+            ovl_win += np.bincount(ip_w, minlength=n_ip)
+            ovl_hit += np.bincount(ip_w, weights=(c_w >= 2), minlength=n_ip).astype("int64")
+
+    # ---------- Device 피처 ----------
+    dev_codes = np.unique(dvc)
+    dev_codes = dev_codes[dev_codes >= 0]
+    (pair_dvc, pair_ip), _ = pair_dev_ip.result()
+    dev_feat = pd.DataFrame({
+        "ip_count": np.bincount(pair_dvc, minlength=n_dvc)[dev_codes],
+        "ip_change_speed": _hist_quantile(spd, P99_Q).reindex(dev_codes).to_numpy(),
+        "daily_actions_p95": _hist_quantile(dly, P95_Q).reindex(dev_codes).to_numpy(),
+        "active_days_device": act_dev[dev_codes],
+    }, index=pd.Index(dvc_vals.take(dev_codes), name="dvc_idx")).fillna(0)
+
+    # ---------- IP 피처 ----------
     ip_feat = None
-    if "user_ip" in d.columns and len(d):
-        ip_dev_cnt = d.groupby("user_ip", observed=True)["dvc_idx"].nunique().rename("device_count")
-        ip_dev_day = d[["user_ip","dvc_idx","day"]].drop_duplicates()
-        device_repeat_rate_ip = (ip_dev_day.groupby(["user_ip","dvc_idx"], observed=True)["day"].nunique()
-                                 .groupby("user_ip", observed=True).mean().rename("device_repeat_rate_ip"))
-        burst5_ip = (d[["user_ip","b5","dvc_idx"]].drop_duplicates()
-                     .groupby(["user_ip","b5"], observed=True)["dvc_idx"].nunique()
-                     .groupby("user_ip", observed=True).quantile(P95_Q).rename("burst5_ip"))
-        active_days_ip = d.groupby("user_ip", observed=True)["day"].nunique().rename("active_days_ip")
-
-        if "ads_idx" in d.columns:
-            cnt = (d[["user_ip","ads_idx","b10","dvc_idx"]].drop_duplicates()
-                   .groupby(["user_ip","ads_idx","b10"], observed=True)["dvc_idx"].nunique())
-            ads_overlap_rate    = (cnt >= 2).astype("int8").groupby("user_ip", observed=True).mean().rename("ads_overlap_rate")
-            ads_overlap_windows = cnt.groupby("user_ip", observed=True).size().rename("ads_overlap_windows")
-        else:
-            ads_overlap_rate    = pd.Series(0.0, index=ip_dev_cnt.index, name="ads_overlap_rate")
-            ads_overlap_windows = pd.Series(0,   index=ip_dev_cnt.index, name="ads_overlap_windows")
-
-        ip_feat = pd.concat([ip_dev_cnt, device_repeat_rate_ip, burst5_ip,
-                             ads_overlap_rate, ads_overlap_windows, active_days_ip], axis=1).fillna(0)
+    if has_ip and len(d):
+        ip_codes = np.unique(ip)
+        ip_codes = ip_codes[ip_codes >= 0]
+        (pip, _), pdays = ipdev_days.result()              # 같은 (ip, dvc)의 청크별 활동일은 누적 시 합산됨
+        ip_feat = pd.DataFrame({
+            "device_count": np.bincount(pair_ip, minlength=n_ip)[ip_codes],
+            "device_repeat_rate_ip": pd.Series(pdays, dtype="float64").groupby(pip).mean().reindex(ip_codes).to_numpy(),
+            "burst5_ip": _hist_quantile(bst, P95_Q).reindex(ip_codes).to_numpy(),
+            "ads_overlap_rate": np.where(ovl_win > 0, ovl_hit / np.maximum(ovl_win, 1), np.nan)[ip_codes],
+            "ads_overlap_windows": ovl_win[ip_codes],
+            "active_days_ip": act_ip[ip_codes],
+        }, index=pd.Index(ip_vals.take(ip_codes), name="user_ip")).fillna(0)
     return ip_feat, dev_feat
 
 def _ensure_scores(ip_feat: pd.DataFrame | None, dev_feat: pd.DataFrame):
@@ -383,4 +512,4 @@ df_join_v1, stats = apply_abuse8_labels(
 )
 
 # 저장
-df_join_v1.to_csv("df_join_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("join", df_join_v1, ["abuse_8"])
\ No newline at end of file
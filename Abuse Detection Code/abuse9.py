@@ -46,19 +46,11 @@ def _check_required_columns(df, req, name="DataFrame"):
     miss = [c for c in req if c not in df.columns]
     if miss: raise ValueError(f"{name} 필수 컬럼 누락: {miss}")
 
-def _is_media_server_ip(ip):
-    if pd.isna(ip): return False
-    s = str(ip).strip()
-    return any(re.match(p, s) for p in MEDIA_SERVER_PATTERNS)
+from abuse_ip_class import is_valid_web_ip
 
-def _is_private_ip(ip):
-    if pd.isna(ip): return False
-    s = str(ip).strip()
-    return any(re.match(p, s) for p in [r'^10\.', r'^192\.168\.', r'^172\.(1[6-9]|2[0-9]|3[01])\.'])
-
-def _is_valid_ip_for_analysis(ip):
-    if pd.isna(ip): return False
-    return not (_is_media_server_ip(ip) or _is_private_ip(ip))
+def _is_valid_ip_for_analysis(ips):
+    """결측·매체사 서버·사설 IP 제외 마스크(행 단위). 판정은 고유 IP 단위로 1회(abuse_ip_class)."""
+    return is_valid_web_ip(ips, MEDIA_SERVER_PATTERNS)
 
 def _preprocess_data(df):
     req = ['click_date','mda_idx','pub_sub_rel_id','dvc_idx','user_ip']
@@ -71,73 +63,112 @@ def _preprocess_data(df):
         if c in x.columns: x[c] = pd.to_numeric(x[c], errors='coerce')
     return x
 
-# ===== 패턴 분석 =====
-def _analyze_temporal_concentration(pub):
-    mx = pub['hour'].value_counts(normalize=True).max()
-    if mx >= CONFIRMED_TIME_CONCENTRATION: return "확정", f"시간 집중도 {mx*100:.1f}%"
-    if mx >= SUSPICIOUS_TIME_CONCENTRATION: return "의심", f"시간 집중도 {mx*100:.1f}%"
-    return "정상", None
-
-def _analyze_device_concentration(pub, is_mega=False):
-    app = pub[pub['dvc_idx']!=0]
-    if len(app)<=100: return "정상", []
-    cnts = app['dvc_idx'].value_counts()
-    avg = len(app)/len(cnts)
-    top = (cnts.iloc[0]/len(app)) if len(cnts)>0 else 0
-    conf_th = MEGA_DEVICE_PER_CLICK_CONFIRMED if is_mega else CONFIRMED_DEVICE_PER_CLICK
-    sus_th  = MEGA_DEVICE_PER_CLICK_SUSPICIOUS if is_mega else SUSPICIOUS_DEVICE_PER_CLICK
-    reasons, sev = [], "정상"
-    if avg>=conf_th: sev="확정"; reasons.append(f"디바이스당 {avg:.0f}클릭")
-    elif avg>=sus_th: sev="의심"; reasons.append(f"디바이스당 {avg:.0f}클릭")
-    if top>=CONFIRMED_SINGLE_DEVICE_SHARE: sev="확정"; reasons.append(f"단일 디바이스 {top*100:.1f}%")
-    elif top>=SUSPICIOUS_SINGLE_DEVICE_SHARE and sev=="정상":
-        sev="의심"; reasons.append(f"단일 디바이스 {top*100:.1f}%")
-    return sev, reasons
-
-def _analyze_ip_concentration(pub, is_mega=False):
-    web = pub[pub['dvc_idx']==0]
-    if len(web)<=100: return "정상", []
-    vw = web[web['user_ip'].apply(_is_valid_ip_for_analysis)]
-    if len(vw)<=50: return "정상", []
-    cnts = vw['user_ip'].value_counts()
-    avg = len(vw)/len(cnts)
-    top = (cnts.iloc[0]/len(vw)) if len(cnts)>0 else 0
-    conf_th = MEGA_IP_PER_CLICK_CONFIRMED if is_mega else CONFIRMED_IP_PER_CLICK
-    sus_th  = MEGA_IP_PER_CLICK_SUSPICIOUS if is_mega else SUSPICIOUS_IP_PER_CLICK
-    reasons, sev = [], "정상"
-    if avg>=conf_th: sev="확정"; reasons.append(f"IP당 {avg:.0f}클릭")
-    elif avg>=sus_th: sev="의심"; reasons.append(f"IP당 {avg:.0f}클릭")
-    if top>=CONFIRMED_SINGLE_IP_SHARE: sev="확정"; reasons.append(f"단일 IP {top*100:.1f}%")
-    elif top>=SUSPICIOUS_SINGLE_IP_SHARE and sev=="정상":
-        sev="의심"; reasons.append(f"단일 IP {top*100:.1f}%")
-    return sev, reasons
-
-def _determine_final_severity(sevs):
-    return "확정" if "확정" in sevs else ("의심" if "의심" in sevs else "정상")
+# ===== 패턴 분석 (컬럼형: 전 퍼블리셔 동시 계산) =====
+def _pair_stats(g, codes, mask, n):
+    """그룹 g별 (mask 행의) 고유 codes 수와 최다 code 건수. codes<0(결측)은 제외."""
+    ok = mask & (g >= 0) & (codes >= 0)
+    m = int(codes.max()) + 1 if ok.any() else 1
+    pk, pc = np.unique(g[ok].astype("int64") * m + codes[ok], return_counts=True)
+    grp = pk // m
+    uniq = np.bincount(grp, minlength=n)
+    top = np.zeros(n, dtype="int64")
+    np.maximum.at(top, grp, pc)
+    return uniq, top
+
+def _grade(avg, top, conf_th, sus_th, conf_sh, sus_sh, active):
+    """평균/최다점유 기준 등급(0/1/2)과 사유 플래그 (평균 사유, 점유 사유)."""
+    avg_lv = np.select([avg >= conf_th, avg >= sus_th], [2, 1], 0)
+    top_lv = np.select([top >= conf_sh, (top >= sus_sh) & (avg_lv == 0)], [2, 1], 0)
+    sev = np.where(top_lv == 2, 2, np.maximum(avg_lv, top_lv))
+    return np.where(active, sev, 0), active & (avg_lv > 0), active & (top_lv > 0)
+
+def _concentration_table(d):
+    """
+    (mda_idx, pub_sub_rel_id)별 시간 집중도 / 디바이스당·IP당 클릭 / 단일 디바이스·IP 점유를 한 번에 계산.
+    거대 퍼블리셔 임계는 np.where로 행별 선택.
+    """
+    grp = d.groupby(['mda_idx','pub_sub_rel_id'], sort=True)
+    g = grp.ngroup().fillna(-1).to_numpy().astype("int64")
+    n = int(g.max()) + 1
+    keys = grp.size().reset_index()[['mda_idx','pub_sub_rel_id']]
+    total = np.bincount(g[g >= 0], minlength=n)
+
+    dvc = d['dvc_idx'].to_numpy(dtype="float64")
+    app, web = ~(dvc == 0), (dvc == 0)          # NaN dvc는 app 쪽(기존 != 0 과 동일)
+    hour = d['hour'].to_numpy(dtype="float64")
+    valid_ip = web & _is_valid_ip_for_analysis(d['user_ip'])
+
+    # 시간 집중도: 최다 시간대 비율(시간 결측 제외)
+    h_codes = np.where(np.isnan(hour), -1, hour).astype("int64")
+    n_hour = np.bincount(g[(g >= 0) & (h_codes >= 0)], minlength=n)
+    _, h_top = _pair_stats(g, h_codes, np.ones(len(d), dtype=bool), n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_mx = np.where(n_hour > 0, h_top / n_hour, np.nan)
+
+    # 디바이스(앱) / IP(웹, 분석 가능 IP)
+    dv_codes = pd.factorize(d['dvc_idx'])[0]
+    ip_codes = pd.factorize(d['user_ip'])[0]
+    app_n = np.bincount(g[(g >= 0) & app], minlength=n)
+    web_n = np.bincount(g[(g >= 0) & web], minlength=n)
+    vw_n  = np.bincount(g[(g >= 0) & valid_ip], minlength=n)
+    dv_uniq, dv_top = _pair_stats(g, dv_codes, app, n)
+    ip_uniq, ip_top = _pair_stats(g, ip_codes, valid_ip, n)
+
+    t = keys.assign(total_clicks=total, app_clicks=app_n, web_clicks=web_n)
+    t['is_mega_publisher'] = total >= MEGA_PUBLISHER_THRESHOLD
+    mega = t['is_mega_publisher'].to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t['t_mx']   = t_mx
+        t['dv_avg'] = np.where(dv_uniq > 0, app_n / np.maximum(dv_uniq, 1), np.inf)
+        t['dv_top'] = np.where(app_n > 0, dv_top / np.maximum(app_n, 1), 0.0)
+        t['ip_avg'] = np.where(ip_uniq > 0, vw_n / np.maximum(ip_uniq, 1), np.inf)
+        t['ip_top'] = np.where(vw_n > 0, ip_top / np.maximum(vw_n, 1), 0.0)
+
+    t['t_sev'] = np.select([t_mx >= CONFIRMED_TIME_CONCENTRATION, t_mx >= SUSPICIOUS_TIME_CONCENTRATION], [2, 1], 0)
+    t['d_sev'], t['d_avg_r'], t['d_top_r'] = _grade(
+        t['dv_avg'].to_numpy(), t['dv_top'].to_numpy(),
+        np.where(mega, MEGA_DEVICE_PER_CLICK_CONFIRMED, CONFIRMED_DEVICE_PER_CLICK),
+        np.where(mega, MEGA_DEVICE_PER_CLICK_SUSPICIOUS, SUSPICIOUS_DEVICE_PER_CLICK),
+        CONFIRMED_SINGLE_DEVICE_SHARE, SUSPICIOUS_SINGLE_DEVICE_SHARE, app_n > 100)
+    t['i_sev'], t['i_avg_r'], t['i_top_r'] = _grade(
+        t['ip_avg'].to_numpy(), t['ip_top'].to_numpy(),
+        np.where(mega, MEGA_IP_PER_CLICK_CONFIRMED, CONFIRMED_IP_PER_CLICK),
+        np.where(mega, MEGA_IP_PER_CLICK_SUSPICIOUS, SUSPICIOUS_IP_PER_CLICK),
+        CONFIRMED_SINGLE_IP_SHARE, SUSPICIOUS_SINGLE_IP_SHARE, (web_n > 100) & (vw_n > 50))
+    return t
+
+def _reasons(t):
+    """사유 문자열(시간 → 디바이스 → IP 순, '; '로 연결)."""
+    parts = [
+        (t['t_sev'] > 0, t['t_mx'].map(lambda v: f"시간 집중도 {v*100:.1f}%")),
+        (t['d_avg_r'],   t['dv_avg'].map(lambda v: f"디바이스당 {v:.0f}클릭")),
+        (t['d_top_r'],   t['dv_top'].map(lambda v: f"단일 디바이스 {v*100:.1f}%")),
+        (t['i_avg_r'],   t['ip_avg'].map(lambda v: f"IP당 {v:.0f}클릭")),
+        (t['i_top_r'],   t['ip_top'].map(lambda v: f"단일 IP {v*100:.1f}%")),
+    ]
+    cols = [np.where(np.asarray(on, dtype=bool), txt.to_numpy(dtype=object), "") for on, txt in parts]
+    return pd.Series(["; ".join(x for x in row if x) for row in zip(*cols)], index=t.index, dtype=object)
 
 # ===== 탐지 Core =====
 def detect_publisher_abuse_patterns(df):
     d = _preprocess_data(df)
-    out = []
-    for (mda, pub), g in d.groupby(['mda_idx','pub_sub_rel_id']):
-        if len(g)<MIN_PUBLISHER_CLICKS: continue
-        mega = len(g)>=MEGA_PUBLISHER_THRESHOLD
-        t_sev, t_r = _analyze_temporal_concentration(g)
-        d_sev, d_rs= _analyze_device_concentration(g, mega)
-        i_sev, i_rs= _analyze_ip_concentration(g, mega)
-        final = _determine_final_severity([t_sev,d_sev,i_sev])
-        reasons=[]
-        if t_r: reasons.append(t_r)
-        reasons+=d_rs+i_rs
-        if final!="정상" and reasons:
-            out.append({
-                'mda_idx':mda,'pub_sub_rel_id':pub,'total_clicks':len(g),
-                'severity':final,'reasons':'; '.join(reasons),
-                'is_mega_publisher':mega,
-                'app_clicks':int((g['dvc_idx']!=0).sum()),
-                'web_clicks':int((g['dvc_idx']==0).sum())
-            })
-    return pd.DataFrame(out)
+    cols = ['mda_idx','pub_sub_rel_id','total_clicks','severity','reasons','is_mega_publisher','app_clicks','web_clicks']
+    if d.empty:
+        return pd.DataFrame()
+    t = _concentration_table(d)
+    t = t[t['total_clicks'] >= MIN_PUBLISHER_CLICKS]
+    sev = t[['t_sev','d_sev','i_sev']].max(axis=1)
+    t = t[sev > 0].assign(severity=np.where(sev[sev > 0] == 2, "확정", "의심"))
+    if t.empty:
+        return pd.DataFrame()
+    t['reasons'] = _reasons(t)
+    return t.loc[t['reasons'] != "", cols].reset_index(drop=True)
+
+def _pub_diversity(rows, key, heavy):
+    """heavy 엔티티별 'N매체/M퍼블리셔' (groupby 1회)."""
+    nun = rows[rows[key].isin(heavy.index)].groupby(key)[['mda_idx','pub_sub_rel_id']].nunique()
+    nun = nun.reindex(heavy.index)
+    return [f"{a}매체/{b}퍼블리셔" for a, b in zip(nun['mda_idx'], nun['pub_sub_rel_id'])]
 
 def detect_individual_suspicious_cases(df):
     cases=[]
@@ -145,22 +176,16 @@ def detect_individual_suspicious_cases(df):
     if len(app)>0:
         vc=app['dvc_idx'].value_counts()
         ext=vc[vc>=INDIVIDUAL_DEVICE_THRESHOLD]
-        for dev,clk in ext.items():
-            sub=app[app['dvc_idx']==dev]
-            nun=sub[['mda_idx','pub_sub_rel_id']].nunique()
-            cases.append({'type':'Device','entity':dev,'clicks':int(clk),
-                          'pub_diversity':f"{nun['mda_idx']}매체/{nun['pub_sub_rel_id']}퍼블리셔"})
+        for (dev,clk),div in zip(ext.items(), _pub_diversity(app, 'dvc_idx', ext)):
+            cases.append({'type':'Device','entity':dev,'clicks':int(clk),'pub_diversity':div})
     web=df[df['dvc_idx']==0]
     if len(web)>0:
-        vw=web[web['user_ip'].apply(_is_valid_ip_for_analysis)]
+        vw=web[_is_valid_ip_for_analysis(web['user_ip'])]
         if len(vw)>0:
             vc=vw['user_ip'].value_counts()
             ext=vc[vc>=INDIVIDUAL_IP_THRESHOLD]
-            for ip,clk in ext.items():
-                sub=vw[vw['user_ip']==ip]
-                nun=sub[['mda_idx','pub_sub_rel_id']].nunique()
-                cases.append({'type':'IP','entity':ip,'clicks':int(clk),
-                              'pub_diversity':f"{nun['mda_idx']}매체/{nun['pub_sub_rel_id']}퍼블리셔"})
+            for (ip,clk),div in zip(ext.items(), _pub_diversity(vw, 'user_ip', ext)):
+                cases.append({'type':'IP','entity':ip,'clicks':int(clk),'pub_diversity':div})
     return cases
 
 def detect_abuse_main(df):
@@ -242,4 +267,4 @@ abuse_results, individual_cases = detect_abuse_main(df_join)
 df_join_v1, stats = apply_abuse_labels(df_join_v1, abuse_results, cap_abuse_rate=DEFAULT_CAP_ABUSE_RATE)
 
 # 저장
-df_join_v1.to_csv("df_join_v1.csv", index=False)
\ No newline at end of file
+abuse_store.save_columns("join", df_join_v1, ["abuse_9"])
\ No newline at end of file
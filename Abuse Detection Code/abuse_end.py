@@ -1,26 +1,57 @@
 # 정상 / 어뷰징 데이터 분류
+# - 라벨 컬럼(abuse_N)을 비트마스크 1개 컬럼(abuse_bits, N번 로직 = N-1번째 비트)으로 압축해 저장
+# - clean/abuse는 비트마스크 기준 지연 뷰(접근할 때만 행 선택), 전체 복사본을 미리 만들지 않음
+# - 물리 출력은 qqqq/{table}/part=clean|abuse/ 컬럼형 파일 (abuse_store.write_partitions)
+BITS_COL = "abuse_bits"
+
+def pack_label_bits(df, label_cols):
+    """abuse_N > 0 이면 (N-1)번째 비트를 켠 uint16 배열."""
+    bits = np.zeros(len(df), dtype="uint16")
+    for c in label_cols:
+        if c in df.columns:
+            n = int(c.split("_")[1])
+            v = pd.to_numeric(df[c], errors="coerce").fillna(0).to_numpy()
+            bits |= np.where(v > 0, np.uint16(1 << (n - 1)), np.uint16(0))
+    return bits
+
+class LabelSplit:
+    """비트마스크 기반 정상/어뷰징 지연 뷰."""
+    def __init__(self, df, bits):
+        self.df, self.bits = df, bits
+
+    @property
+    def abuse_mask(self):
+        return self.bits != 0
+
+    @property
+    def clean(self):
+        return self.df.loc[~self.abuse_mask]
+
+    @property
+    def abuse(self):
+        return self.df.loc[self.abuse_mask]
+
+    def has(self, logic):
+        """특정 로직(abuse_N의 N)이 켜진 행 마스크."""
+        return (self.bits & np.uint16(1 << (logic - 1))) != 0
+
 def split_by_labels(df, label_cols):
-    cols = [c for c in label_cols if c in df.columns]
-    if not cols:
-        return df.copy(), df.iloc[0:0].copy()
-    arr = pd.DataFrame({c: pd.to_numeric(df[c], errors="coerce") for c in cols}).fillna(0).astype("int8")
-    mask_abuse = arr.gt(0).any(axis=1)
-    return df.loc[~mask_abuse].copy(), df.loc[mask_abuse].copy()
+    bits = pack_label_bits(df, label_cols)
+    df[BITS_COL] = bits
+    return LabelSplit(df, bits)
 
 # 라벨 컬럼 정의
 join_labels   = ["abuse_1","abuse_2","abuse_3","abuse_4","abuse_5","abuse_8","abuse_9","abuse_10"]
 settle_labels = ["abuse_2","abuse_4","abuse_6","abuse_7","abuse_10"]
 rpt_labels    = ["abuse_3","abuse_4","abuse_7"]
 
-# 분리 (변수에만 저장)
-df_join_clean,   df_join_abuse   = split_by_labels(df_join_v1,   join_labels)
-df_settle_clean, df_settle_abuse = split_by_labels(df_settle_v1, settle_labels)
-df_rpt_clean,    df_rpt_abuse    = split_by_labels(df_rpt_v1,    rpt_labels)
-
-# 분류된 데이터 저장
-df_join_clean.to_csv("qqqq/df_join_clean.csv", encoding="utf-8-sig", index=False)
-df_join_abuse.to_csv("qqqq/df_join_abuse.csv", encoding="utf-8-sig", index=False)
-df_settle_clean.to_csv("qqqq/df_settle_clean.csv", encoding="utf-8-sig", index=False)
-df_settle_abuse.to_csv("qqqq/df_settle_abuse.csv", encoding="utf-8-sig", index=False)
-df_rpt_clean.to_csv("qqqq/df_rpt_clean.csv", encoding="utf-8-sig", index=False)
-df_rpt_abuse.to_csv("qqqq/df_rpt_abuse.csv", encoding="utf-8-sig", index=False)
\ No newline at end of file
+# 분리 (비트마스크 + 지연 뷰)
+join_split   = split_by_labels(df_join_v1,   join_labels)
+settle_split = split_by_labels(df_settle_v1, settle_labels)
+rpt_split    = split_by_labels(df_rpt_v1,    rpt_labels)
+
+# 비트마스크 사이드카 + 파티션 파일 저장
+for _table, _split in (("join", join_split), ("settle", settle_split), ("rpt", rpt_split)):
+    abuse_store.save_columns(_table, _split.df, [BITS_COL])
+    _rows = abuse_store.write_partitions(_table, _split.df, _split.abuse_mask)
+    print(f"[abuse_end] {_table}: 정상 {_rows['clean']:,} / 어뷰징 {_rows['abuse']:,}")
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+사용자 식별자 정수 인코더.
+
+- (디바이스 dvc_idx | 가드 통과 웹 user_ip | click_key 폴백)을 조밀한 int64 user_id로 변환.
+  "dvc:123" / "ip:1.2.3.4" 문자열을 행마다 만들지 않고, 고유값 단위로만 사전에 등록한다.
+- 같은 프로세스 안에서는 같은 원값 → 항상 같은 id (탐지 ↔ 라벨 전파 merge 키로 그대로 사용 가능).
+- 리포트용 역변환: decode_users(ids) → "dvc:…"/"ip:…"/"ck:…" 문자열, lookup_table(ids) → 매핑 테이블.
+- id = 사전 위치 × len(KINDS) + 종류 번호, 결측은 MISSING(-1).
+"""
+
+import numpy as np
+import pandas as pd
+
+# ===== 전역 파라미터 =====
+KINDS   = ("dvc", "ip", "ck")   # 종류 번호 = 인덱스 (문자열 접두어와 동일)
+MISSING = -1                    # 식별 불가(웹 IP 가드 탈락 등)
+
+
+class UserIdentity:
+    """종류별 고유값 사전. 새 값은 뒤에 추가만 하므로 기존 id는 바뀌지 않는다."""
+
+    def __init__(self):
+        self._vocab = {"dvc": pd.Index([], dtype="int64"),
+                       "ip":  pd.Index([], dtype=object),
+                       "ck":  pd.Index([], dtype=object)}
+
+    def encode(self, kind: str, values) -> np.ndarray:
+        """values → int64 id (NaN은 MISSING). 비용은 행 수가 아니라 고유값 수에 비례하는 사전 조회."""
+        k = KINDS.index(kind)
+        codes, uniq = pd.factorize(np.asarray(values))
+        vocab = self._vocab[kind]
+        pos = vocab.get_indexer(uniq)
+        if (pos < 0).any():
+            vocab = vocab.append(pd.Index(uniq[pos < 0], dtype=vocab.dtype))
+            self._vocab[kind] = vocab
+            pos = vocab.get_indexer(uniq)
+        ids = pos.astype("int64")[codes] * len(KINDS) + k
+        ids[codes < 0] = MISSING
+        return ids
+
+    def decode(self, ids) -> pd.Series:
+        """id → "종류:원값" 문자열 (MISSING은 NaN)."""
+        ids = np.asarray(ids, dtype="int64")
+        out = np.full(len(ids), np.nan, dtype=object)
+        for k, kind in enumerate(KINDS):
+            m = (ids >= 0) & (ids % len(KINDS) == k)
+            if m.any():
+                raw = self._vocab[kind].take(ids[m] // len(KINDS))
+                out[m] = (kind + ":" + raw.astype(str)).to_numpy()
+        return pd.Series(out, dtype=object)
+
+    def lookup_table(self, ids=None) -> pd.DataFrame:
+        """리포트용 역조회 테이블 [user_id, kind, value, user_key]. ids=None이면 등록된 전체."""
+        if ids is None:
+            ids = np.concatenate([np.arange(len(v), dtype="int64") * len(KINDS) + k
+                                  for k, v in enumerate(self._vocab.values())])
+        ids = np.unique(np.asarray(ids, dtype="int64"))
+        ids = ids[ids >= 0]
+        kind = np.asarray(KINDS, dtype=object)[ids % len(KINDS)]
+        key = self.decode(ids)
+        return pd.DataFrame({"user_id": ids, "kind": kind,
+                             "value": key.str.split(":", n=1).str[1].to_numpy(),
+                             "user_key": key.to_numpy()})
+
+
+IDENTITY = UserIdentity()   # 프로세스 공용 사전
+
+
+def encode_users(dvc, ip=None, web_ok=True, fallback=None) -> np.ndarray:
+    """
+    행 단위 user_id(int64) 생성. 우선순위: dvc_idx≠0 → (web_ok인) user_ip → fallback(click_key) → MISSING.
+    - ip는 호출 측에서 정규화한 문자열(strip 등)을 넘긴다.
+    - web_ok는 스칼라 또는 행 단위 bool 배열(IP 가드 결과).
+    """
+    dvc = pd.to_numeric(pd.Series(np.asarray(dvc)), errors="coerce").fillna(0).astype("int64").to_numpy()
+    out = np.full(len(dvc), MISSING, dtype="int64")
+
+    is_dev = dvc != 0
+    if is_dev.any():
+        out[is_dev] = IDENTITY.encode("dvc", dvc[is_dev])
+
+    if ip is not None:
+        use_ip = ~is_dev & np.broadcast_to(np.asarray(web_ok, dtype=bool), is_dev.shape)
+        if use_ip.any():
+            out[use_ip] = IDENTITY.encode("ip", np.asarray(ip, dtype=object)[use_ip])
+
+    if fallback is not None:
+        rest = out == MISSING
+        if rest.any():
+            out[rest] = IDENTITY.encode("ck", np.asarray(fallback, dtype=object)[rest])
+    return out
+
+def decode_users(ids) -> pd.Series:
+    """user_id → "dvc:…"/"ip:…"/"ck:…" (리포트 표시용)."""
+    return IDENTITY.decode(ids)
+
+def lookup_table(ids=None) -> pd.DataFrame:
+    return IDENTITY.lookup_table(ids)
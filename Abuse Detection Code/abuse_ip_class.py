@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+IP 분류기(공용) — 매체사 서버 IP / 사설 IP / 분석 가능 웹 IP 판정 (abuse8·abuse9·abuse10).
+
+- 고유 IP 단위로만 계산: 행 → factorize → 고유값 분류 → codes로 펼침. 한 번 본 IP는 메모에서 재사용.
+- 정상 IPv4 문자열은 uint32로 변환해 CIDR 구간 검사(정렬된 구간 searchsorted)로 판정.
+- MEDIA_SERVER_PATTERNS의 '^a\\.b\\.' 형태 프리픽스 정규식은 CIDR 구간으로 컴파일.
+  구간으로 바꿀 수 없는 패턴이나 IPv4로 파싱되지 않는 문자열은 기존 정규식(re.match)과 동일하게 판정.
+- 입력 문자열은 기존 헬퍼와 동일하게 str(ip).strip() 기준, 결측은 어느 분류에도 속하지 않음.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+# ===== 전역 파라미터 =====
+PRIVATE_PATTERNS = [r'^10\.', r'^192\.168\.', r'^172\.(1[6-9]|2[0-9]|3[01])\.']
+PRIVATE_CIDRS    = [("10.0.0.0", 8), ("192.168.0.0", 16), ("172.16.0.0", 12)]
+
+MEDIA  = 1   # 비트 플래그
+PRIVATE = 2
+NULL   = 4
+
+_CLASSIFIERS = {}   # 패턴 튜플 → IpClassifier
+
+
+# ================= 유틸 =================
+def _cidr(ip: str, bits: int) -> tuple:
+    a, b, c, d = (int(x) for x in ip.split("."))
+    lo = (a << 24) | (b << 16) | (c << 8) | d
+    return lo, lo + (1 << (32 - bits)) - 1
+
+def _prefix_range(pat: str):
+    """'^43\\.203\\.' → (lo, hi). 순수 옥텟 프리픽스가 아니면 None."""
+    m = re.fullmatch(r"\^((?:\d{1,3}\\\.){1,4})", pat)
+    if not m:
+        return None
+    octs = [int(x) for x in m.group(1).split("\\.") if x != ""]
+    if any(o > 255 for o in octs):
+        return None
+    lo = 0
+    for o in octs + [0] * (4 - len(octs)):
+        lo = (lo << 8) | o
+    return lo, lo + (1 << (8 * (4 - len(octs)))) - 1
+
+def _merge_ranges(ranges) -> tuple:
+    if not ranges:
+        return np.array([], dtype="int64"), np.array([], dtype="int64")
+    r = sorted(ranges)
+    out = [list(r[0])]
+    for lo, hi in r[1:]:
+        if lo <= out[-1][1] + 1:
+            out[-1][1] = max(out[-1][1], hi)
+        else:
+            out.append([lo, hi])
+    a = np.asarray(out, dtype="int64")
+    return a[:, 0], a[:, 1]
+
+def _in_ranges(u32: np.ndarray, los: np.ndarray, his: np.ndarray) -> np.ndarray:
+    if len(los) == 0:
+        return np.zeros(len(u32), dtype=bool)
+    i = np.searchsorted(los, u32, side="right") - 1
+    return (i >= 0) & (u32 <= his[np.clip(i, 0, None)])
+
+def parse_ipv4(strs) -> tuple:
+    """정규형 IPv4 문자열 → (uint32(int64 보관), ok 마스크). 선행 0·범위 초과·옥텟 수 불일치는 ok=False."""
+    s = pd.Series(np.asarray(strs, dtype=object)).astype(str)
+    parts = s.str.split(".", n=4, expand=True).reindex(columns=range(5))
+    ok = parts[3].notna().to_numpy() & parts[4].isna().to_numpy()
+    u32 = np.zeros(len(s), dtype="int64")
+    for k in range(4):
+        p = parts[k].fillna("")
+        num = pd.to_numeric(p.where(p.str.fullmatch(r"0|[1-9]\d{0,2}"), None), errors="coerce")
+        ok &= num.notna().to_numpy() & (num.fillna(256).to_numpy() <= 255)
+        u32 = (u32 << 8) | num.fillna(0).to_numpy().astype("int64")
+    return np.where(ok, u32, 0), ok
+
+
+class IpClassifier:
+    """매체 서버 패턴 1세트에 대한 분류기. 결과는 고유 IP 문자열 → 플래그 메모에 누적."""
+
+    def __init__(self, media_patterns):
+        rngs = [_prefix_range(p) for p in media_patterns]
+        self.media_los, self.media_his = _merge_ranges([r for r in rngs if r is not None])
+        rest = [p for p, r in zip(media_patterns, rngs) if r is None]
+        self.media_rx_rest = re.compile("|".join(f"(?:{p})" for p in rest)) if rest else None
+        self.media_rx = re.compile("|".join(f"(?:{p})" for p in media_patterns)) if media_patterns else None
+        self.priv_los, self.priv_his = _merge_ranges([_cidr(ip, b) for ip, b in PRIVATE_CIDRS])
+        self.priv_rx = re.compile("|".join(f"(?:{p})" for p in PRIVATE_PATTERNS))
+        self._memo = {}
+
+    def _classify_unique(self, uniq: np.ndarray) -> np.ndarray:
+        """고유 문자열(strip 완료) 배열 → uint8 플래그."""
+        u32, ok = parse_ipv4(uniq)
+        media = _in_ranges(u32, self.media_los, self.media_his) & ok
+        priv  = _in_ranges(u32, self.priv_los, self.priv_his) & ok
+        s = pd.Series(uniq, dtype=object)
+        if self.media_rx_rest is not None:
+            media[ok] |= s[ok].str.match(self.media_rx_rest).to_numpy(dtype=bool)
+        if (~ok).any():
+            bad = s[~ok]
+            if self.media_rx is not None:
+                media[~ok] = bad.str.match(self.media_rx).to_numpy(dtype=bool)
+            priv[~ok] = bad.str.match(self.priv_rx).to_numpy(dtype=bool)
+        return (media * MEDIA | priv * PRIVATE).astype("uint8")
+
+    def flags(self, ips) -> np.ndarray:
+        """행 단위 uint8 플래그(MEDIA|PRIVATE|NULL). 비용은 고유 IP 수에 비례."""
+        codes, uniq = pd.factorize(pd.Series(np.asarray(ips, dtype=object)))
+        keys = pd.Index(uniq).astype(str).str.strip().to_numpy(dtype=object)
+        uf = np.fromiter((self._memo.get(k, 255) for k in keys), dtype="uint8", count=len(keys))
+        new = uf == 255
+        if new.any():
+            uf[new] = self._classify_unique(keys[new])
+            self._memo.update(zip(keys[new], uf[new]))
+        out = np.full(len(codes), NULL, dtype="uint8")
+        hit = codes >= 0
+        out[hit] = uf[codes[hit]]
+        return out
+
+
+def get_classifier(media_patterns) -> IpClassifier:
+    key = tuple(media_patterns)
+    if key not in _CLASSIFIERS:
+        _CLASSIFIERS[key] = IpClassifier(key)
+    return _CLASSIFIERS[key]
+
+def is_media_server_ip(ips, media_patterns) -> np.ndarray:
+    return (get_classifier(media_patterns).flags(ips) & MEDIA) > 0
+
+def is_private_ip(ips, media_patterns=()) -> np.ndarray:
+    return (get_classifier(media_patterns).flags(ips) & PRIVATE) > 0
+
+def is_valid_web_ip(ips, media_patterns) -> np.ndarray:
+    """결측 아님 & 매체 서버 아님 & 사설 아님."""
+    return get_classifier(media_patterns).flags(ips) == 0
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+그룹별 IP 품질 요약(공용) — abuse1/abuse2 `_ip_bad_groups`, abuse8 `_ip_quality`가 함께 사용.
+
+- user_ip를 1회 factorize → (그룹, IP) 쌍을 해시 집계 1패스로 세어
+  rows / unique_ip / top1_count / top1_ip / top1_share / unique_ratio 를 한 번에 계산.
+  (그룹마다 apply로 nunique·value_counts를 따로 돌리지 않음)
+- 임계치 판정은 호출 측(각 로직의 IP_TOP_SHARE_TH 등)에서 한다. 여기서는 원시 통계만.
+- 같은 행 집합(그룹키·IP 내용 동일)에 대한 재호출은 캐시에서 바로 반환 → 가드 정책/로직 간 재사용.
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# ===== 전역 파라미터 =====
+CACHE_SIZE = 8          # 최근 결과 보관 개수
+_CACHE = OrderedDict()  # fingerprint → 통계 DataFrame
+
+
+def _fingerprint(df: pd.DataFrame, key: str | None) -> tuple:
+    """(그룹키, user_ip) 내용 해시. 행 순서와 무관한 합/XOR로 요약."""
+    cols = [c for c in (key, "user_ip") if c is not None]
+    h = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    xor = int(np.bitwise_xor.reduce(h)) if len(h) else 0
+    return (key, len(df), int(h.sum(dtype=np.uint64)), xor)
+
+def ip_group_stats(df: pd.DataFrame, key: str | None) -> pd.DataFrame:
+    """
+    그룹별 IP 통계. key=None이면 전체를 group_key=-1 한 그룹으로 본다.
+    반환: [group_key, rows, unique_ip, top1_count, top1_ip, top1_share, unique_ratio] (group_key 오름차순)
+    - IP는 문자열 기준(결측도 하나의 값으로 집계), 그룹키 결측 행은 제외(groupby와 동일)
+    """
+    fp = _fingerprint(df, key)
+    if fp in _CACHE:
+        _CACHE.move_to_end(fp)
+        return _CACHE[fp].copy()
+
+    ip_codes, ip_uniq = pd.factorize(df["user_ip"].astype(str), use_na_sentinel=False)
+    if key is None:
+        g_codes, g_uniq = np.zeros(len(df), dtype="int64"), pd.Index([-1])
+    else:
+        g_codes, g_uniq = pd.factorize(df[key], sort=True)
+        keep = g_codes >= 0
+        g_codes, ip_codes = g_codes[keep], ip_codes[keep]
+    n_grp, n_ip = len(g_uniq), max(len(ip_uniq), 1)
+
+    # (그룹, IP) 쌍 해시 집계 — 쌍 번호는 첫 등장 순서
+    pair = g_codes.astype("int64") * n_ip + ip_codes
+    p_codes, p_uniq = pd.factorize(pair)
+    p_cnt = np.bincount(p_codes, minlength=len(p_uniq))
+    p_grp, p_ip = p_uniq // n_ip, p_uniq % n_ip
+
+    rows = np.bincount(g_codes, minlength=n_grp)
+    uniq = np.bincount(p_grp, minlength=n_grp)
+
+    # 그룹별 최다 IP: (그룹, 건수 내림차순, 첫 등장) 정렬 후 그룹 첫 행
+    top1_count = np.zeros(n_grp, dtype="int64")
+    top1_ip = np.full(n_grp, "", dtype=object)
+    if len(p_uniq):
+        order = np.lexsort((np.arange(len(p_uniq)), -p_cnt, p_grp))
+        head = order[np.r_[True, p_grp[order][1:] != p_grp[order][:-1]]]
+        top1_count[p_grp[head]] = p_cnt[head]
+        top1_ip[p_grp[head]] = np.asarray(ip_uniq, dtype=object)[p_ip[head]]
+
+    out = pd.DataFrame({
+        "group_key": np.asarray(g_uniq),
+        "rows": rows, "unique_ip": uniq,
+        "top1_count": top1_count, "top1_ip": top1_ip,
+    })
+    out["top1_share"] = np.where(out["rows"] > 0, out["top1_count"] / out["rows"].clip(lower=1), 1.0)
+    out["unique_ratio"] = out["unique_ip"].clip(lower=1) / out["rows"].clip(lower=1)
+
+    _CACHE[fp] = out
+    while len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return out.copy()
+
+def clear_cache() -> None:
+    _CACHE.clear()
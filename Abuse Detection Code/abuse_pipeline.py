@@ -0,0 +1,549 @@
+# -*- coding: utf-8 -*-
+"""
+어뷰징 파이프라인 단일 프로세스 실행기.
+
+- 원천 4개 테이블(list/join/settle/rpt)을 1회만 로드(abuse_store)하고,
+  click_date 파싱·id 컬럼 정수화를 한 번만 해 둔 공유 프레임을 모든 단계에 넘긴다.
+- abuse1.py … abuse10.py, abuse_end.py를 노트북 셀처럼 하나의 네임스페이스에서 순서대로 실행한다.
+- 마지막에 scoring_proper.proper_scoring을 같은 프로세스에서 join 어뷰징 뷰로 바로 호출(중간 파일 없음).
+- run_parallel: LOGICS에 선언된 의존 그래프대로 서로 독립인 로직을 프로세스 풀에서 동시에 실행.
+  워커는 fork로 공유 프레임을 읽기 전용(copy-on-write)으로 공유하고, 라벨 병합만 부모에서 직렬로 한다.
+- run_incremental: 원천에 새 날짜 행만 append된 경우, lookback이 유한한 로직(현재 abuse6뿐)만
+  [새 날짜 - 2×lookback, …] 구간만 다시 돌려 [새 날짜 - lookback, …] 행 라벨만 갱신(소급 영향 포함).
+  나머지 로직(lookback=None, 전체 이력 기준 피처)은 매번 전체 이력으로 다시 돌린다. 로직별 집계 상태
+  (위반 인덱스·누적 집계 등)를 저장해 새 행만 접는 방식은 구현하지 않았으므로, 증분 모드는 전체 탐지기의
+  증분 실행이 아니며 야간 비용은 여전히 이력 길이에 비례한다. append가 아닌 변경은 전체 재계산.
+- check_incremental: 마지막 날짜를 새로 append된 날로 보고, 창 실행 로직의 라벨이 전체 실행과 같은지 확인.
+- run_out_of_core: 원천 전체를 메모리에 올리지 않고 로직별 메모리 예산(MEMORY_BUDGET_GB) 안에서 나눠 실행.
+  partition="date"는 날짜 구간(+앞뒤 lookback 문맥), ("hash", 키)는 키(테이블별 지정 가능) 해시 슬롯 단위로 base에서 해당 행만 읽고,
+  파티션별 라벨 조각·광고별 비율 집계는 abuse_store 스필 파일로 내린 뒤 마지막에 사이드카로 합친다.
+  partition=None(교차 키 피처) 로직은 전체 프레임으로 실행하고 예산 초과 시 경고만 남긴다.
+  메모리 상한이 보장되는 것은 분할 로직(abuse3/4/6/7/9)뿐이다. 분할 불가 로직(abuse1/2/5/8/10) 실행과 마지막
+  v1 조립·abuse_end·스코어링은 원천 4개 테이블 전체를 올리므로, 최대 메모리는 이 단계들이 결정한다.
+  → 1년치 원천이 고정 메모리(예: 32GB)에 들어간다는 보장은 없다. 유저 id 해시 분할로도 정확히 나눌 수 없음:
+    abuse1/2의 IP 가드는 전체 기준 IP 그룹 통계, abuse5는 매체-일 단위로 여러 유저를 합산,
+    abuse8은 IP-디바이스 그래프 피처, abuse10은 네 테이블 교차 피처를 쓴다.
+
+사용:
+    python abuse_pipeline.py            # 전체 실행 + 스코어링
+    python abuse_pipeline.py --parallel # 독립 로직 병렬 실행 + 스코어링
+    python abuse_pipeline.py --incremental # 새로 append된 날짜만 라벨링 + 스코어링
+    python abuse_pipeline.py --check-incremental # 창 실행 라벨 == 전체 실행 라벨 확인(저장 없음)
+    python abuse_pipeline.py --out-of-core # 메모리 예산 내 분할 실행 + 스코어링
+    ns = run_pipeline(score=False)      # 라벨링까지만
+"""
+
+import os
+import re
+import math
+import sys
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import pandas as pd
+import numpy as np
+
+import abuse_store
+
+# ===== 전역 파라미터 =====
+SOURCES = {   # table → (원천 경로, read_csv 옵션)
+    "list":   ("csv_output/1_IVE_광고목록.csv", {}),
+    "join":   ("csv_output/3_IVE_광고참여정보.csv", {}),
+    "settle": ("csv_output/2_IVE_광고적립.csv", {}),
+    "rpt":    ("csv_output/아이브1년치_참여데이터.csv", {"index_col": 0}),
+}
+STAGES = ("abuse1.py", "abuse2.py", "abuse3.py", "abuse4.py", "abuse5.py",
+          "abuse6.py", "abuse7.py", "abuse8.py", "abuse9.py", "abuse10.py",
+          "abuse_end.py")
+
+# 로직 의존 그래프: script=단계 스크립트, reads=읽는 원천 테이블, labels=라벨을 다는 테이블, deps=선행 로직
+# 각 로직은 원천 컬럼만 읽고 자기 abuse_N만 추가하므로 현재는 서로 독립(deps 비어 있음).
+# 다른 로직의 라벨을 입력으로 쓰는 로직이 생기면 deps에 선언 → 스케줄러가 순서를 보장.
+# lookback=라벨 1행이 의존하는 과거 일수(증분 실행 창), None=전체 이력 의존(증분에서도 전체 재계산)
+#   abuse5는 유저별 전체 기간 클릭 수 사전 필터를 쓰므로 창으로 자르면 라벨이 달라짐 → None
+#   abuse3은 행 수 기준 롤링(ROLL_WIN)·광고/매체별 전체 기간 Top-K, abuse4는 광고별 누적 일수(base_days)·
+#   7행 롤링 중앙값(cr_med7)을 쓰므로 일수 창이 아님 → None (check_incremental로 확인)
+# rate=(원천 테이블, 분모 필터) — 증분 실행 후 df_list 광고별 비율을 저장된 행 라벨로 다시 계산
+# partition=분할 실행 단위: "date"(lookback 창, 유한 lookback 필수), ("hash", 키)(키가 같은 행은 같은 파티션), None(분할 불가, 전체 실행)
+#   ("hash", {table: 키}) — 테이블별 키. 엔티티 이력(행 수 롤링·Top-K·누적 일수)을 쓰는 로직은 날짜가 아니라 엔티티 키로 분할
+#   abuse3: 광고 급증(rpt)은 ads_idx, 매체 급증(join)은 pub_sub_rel_id / abuse4: 전부 (ads_idx, date) 기준 → ads_idx
+LOGICS = {
+    "abuse1":  {"script": "abuse1.py",  "reads": ("list","join"),                 "labels": ("join","list"),          "deps": (), "lookback": None, "partition": None},
+    "abuse2":  {"script": "abuse2.py",  "reads": ("list","join","settle"),        "labels": ("join","list","settle"), "deps": (), "lookback": None, "partition": None},
+    "abuse3":  {"script": "abuse3.py",  "reads": ("list","join","rpt"),           "labels": ("rpt","join","list"),    "deps": (), "lookback": None, "rate": ("rpt", "install"), "partition": ("hash", {"rpt": "ads_idx", "join": "pub_sub_rel_id"})},
+    "abuse4":  {"script": "abuse4.py",  "reads": ("list","join","settle","rpt"),  "labels": ("join","rpt","list","settle"), "deps": (), "lookback": None, "rate": ("join", "night"), "partition": ("hash", "ads_idx")},
+    "abuse5":  {"script": "abuse5.py",  "reads": ("list","join"),                 "labels": ("join","list"),          "deps": (), "lookback": None, "partition": None},
+    "abuse6":  {"script": "abuse6.py",  "reads": ("list","settle"),               "labels": ("settle","list"),        "deps": (), "lookback": 0,  "rate": ("settle", None), "partition": "date"},
+    "abuse7":  {"script": "abuse7.py",  "reads": ("settle","rpt"),                "labels": ("settle","rpt"),         "deps": (), "lookback": None, "partition": ("hash", "mda_idx")},
+    "abuse8":  {"script": "abuse8.py",  "reads": ("join",),                       "labels": ("join",),                "deps": (), "lookback": None, "partition": None},
+    "abuse9":  {"script": "abuse9.py",  "reads": ("join",),                       "labels": ("join",),                "deps": (), "lookback": None, "partition": ("hash", "mda_idx")},
+    "abuse10": {"script": "abuse10.py", "reads": ("list","join","settle","rpt"),  "labels": ("join","list","settle"), "deps": (), "lookback": None, "partition": None},
+}
+
+TIME_COLS = {"join": ("click_date",), "settle": ("click_date",)}   # 1회 파싱할 시각 컬럼
+ID_COLS   = ("ads_idx", "mda_idx", "pub_sub_rel_id", "dvc_idx")    # 1회 정수화할 id 컬럼
+DAY_COLS  = {"join": "click_date", "settle": "click_date", "rpt": "rpt_time_date"}   # 증분 창 기준 날짜 컬럼
+NIGHT_HOURS   = range(1, 7)   # abuse4 비율 분모(야간 행)
+INSTALL_TYPES = {1, 2}        # abuse3 비율 분모(설치/실행형 광고)
+
+# ---- 분할 실행(out-of-core) ----
+MEMORY_BUDGET_GB   = {"default": 8.0}   # 로직별 작업 메모리 예산(GB). 로직 이름 키로 개별 지정(예: "abuse4": 12.0)
+WORKING_SET_FACTOR = 6.0                # 로직 내부 복사·merge로 늘어나는 배수(pandas 행 메모리 대비 추정)
+HASH_SLOTS         = 4096               # 키 해시 슬롯(파티션 = 슬롯 % 파티션 수 → 테이블 간 같은 키는 같은 파티션)
+NO_DAY = np.iinfo("int32").min          # 날짜 없음(파싱 실패) 코드
+
+EXPORTS = (("list", "df_list_v1.csv"),)   # 하위 소비자(예측/추천 스크립트)용 CSV 내보내기: (table, 경로)
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+_FRAMES = None   # 프로세스 내 공유 프레임 캐시
+
+
+# ================= 정규화 =================
+def _parse_time_once(s: pd.Series) -> pd.Series:
+    """문자열 시각을 datetime64로 1회 파싱. 일부라도 파싱 실패하면(에폭 등) 원본 유지 → 각 단계 파서가 처리."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    dt = pd.to_datetime(s, errors="coerce")
+    return dt if int(dt.notna().sum()) == int(s.notna().sum()) else s
+
+def _compact_id(s: pd.Series) -> pd.Series:
+    """숫자형 id를 결측 없으면 최소 정수형으로 축소. 비숫자 값이 섞이면 원본 유지."""
+    num = pd.to_numeric(s, errors="coerce")
+    if int(num.notna().sum()) != int(s.notna().sum()):
+        return s
+    if num.isna().any() or not np.array_equal(num, np.floor(num)):
+        return num
+    return pd.to_numeric(num.astype("int64"), downcast="integer")
+
+def normalize_frames(frames: dict) -> dict:
+    """시각 컬럼 파싱·id 정수화를 테이블별로 1회만 적용(행 순서/행수 보존)."""
+    out = {}
+    for name, df in frames.items():
+        d = df.copy()
+        for c in TIME_COLS.get(name, ()):
+            if c in d.columns:
+                d[c] = _parse_time_once(d[c])
+        for c in ID_COLS:
+            if c in d.columns:
+                d[c] = _compact_id(d[c])
+        out[name] = d
+    return out
+
+def load_frames(reload: bool = False):
+    """공유 프레임(df_list, df_join, df_settle, df_rpt) 반환. 같은 프로세스에서는 1회만 로드."""
+    global _FRAMES
+    if _FRAMES is None or reload:
+        raw = {t: abuse_store.read_source(t, p, **kw) for t, (p, kw) in SOURCES.items()}
+        _FRAMES = normalize_frames(raw)
+    return _FRAMES["list"], _FRAMES["join"], _FRAMES["settle"], _FRAMES["rpt"]
+
+
+# ================= 실행 =================
+def run_stages(stages=STAGES, ns: dict | None = None) -> dict:
+    """단계 스크립트를 하나의 네임스페이스에서 순서대로 실행하고 네임스페이스를 반환."""
+    if CODE_DIR not in sys.path:
+        sys.path.insert(0, CODE_DIR)
+    ns = {"__name__": "__abuse_pipeline__"} if ns is None else ns
+    for stage in stages:
+        path = os.path.join(CODE_DIR, stage)
+        with open(path, "r", encoding="utf-8") as f:
+            code = compile(f.read(), path, "exec")
+        t0 = time.time()
+        ns["__file__"] = path
+        exec(code, ns)
+        print(f"[pipeline] {stage} 완료 ({time.time()-t0:.1f}s)")
+    return ns
+
+def _score(ns: dict) -> dict:
+    from scoring_proper import proper_scoring
+    ns["mda_scores"], ns["pub_scores"], ns["user_scores"], ns["overall_scores"] = \
+        proper_scoring(ns["join_split"].abuse)
+    return ns
+
+def _mark_labeled() -> None:
+    for table in SOURCES:
+        abuse_store.mark_labeled(table)
+
+def export_outputs() -> None:
+    """모든 로직의 라벨이 사이드카에 병합된 뒤(abuse_end 전) EXPORTS를 CSV로 1회 내보낸다."""
+    for table, path in EXPORTS:
+        abuse_store.export_csv(table, path)
+        print(f"[pipeline] {path} 내보내기 완료")
+
+def run_pipeline(stages=STAGES, score: bool = True) -> dict:
+    """라벨링 전 단계 + (옵션) 스코어링을 단일 프로세스에서 실행."""
+    load_frames()
+    if tuple(stages) != STAGES:
+        ns = run_stages(stages)
+        return _score(ns) if score else ns
+    ns = run_stages(STAGES[:-1])
+    export_outputs()
+    ns = run_stages(STAGES[-1:], ns)
+    _mark_labeled()
+    return _score(ns) if score else ns
+
+
+# ================= 병렬 실행 (의존 그래프) =================
+def _base_namespace(frames: dict | None = None) -> dict:
+    """원천 프레임 + v1 캐리어(얕은 복사)로 채운 단계 실행용 네임스페이스. frames로 부분 프레임 지정 가능."""
+    if frames is None:
+        df_list, df_join, df_settle, df_rpt = load_frames()
+    else:
+        df_list, df_join, df_settle, df_rpt = (frames[t] for t in ("list", "join", "settle", "rpt"))
+    return {
+        "__name__": "__abuse_pipeline__", "pd": pd, "np": np, "re": re,
+        "abuse_store": abuse_store, "abuse_pipeline": sys.modules[__name__],
+        "df_list": df_list, "df_join": df_join, "df_settle": df_settle, "df_rpt": df_rpt,
+        "df_list_v1": df_list.copy(deep=False), "df_join_v1": df_join.copy(deep=False),
+        "df_settle_v1": df_settle.copy(deep=False), "df_rpt_v1": df_rpt.copy(deep=False),
+    }
+
+def _run_logic(name: str):
+    """워커: 로직 1개를 독립 네임스페이스에서 실행하고 라벨 컬럼만 돌려준다(파일 쓰기 없음)."""
+    abuse_store.defer_writes()
+    run_stages((LOGICS[name]["script"],), _base_namespace())
+    return name, abuse_store.take_pending()
+
+def _ready(done: set, running: set) -> list:
+    out = [n for n, spec in LOGICS.items()
+           if n not in done and n not in running and set(spec["deps"]) <= done]
+    if not out and not running and len(done) < len(LOGICS):
+        raise ValueError(f"LOGICS 의존 그래프에 순환/미정의 선행이 있습니다: {sorted(set(LOGICS) - done)}")
+    return out
+
+def run_parallel(max_workers: int | None = None, score: bool = True) -> dict:
+    """
+    LOGICS 의존 그래프대로 독립 로직을 프로세스 풀에서 동시에 실행.
+    - 공유 프레임은 부모에서 1회 로드 후 fork로 읽기 전용 공유
+    - 라벨 사이드카 저장(병합)은 부모에서 완료 순서대로 직렬 처리
+    - 모든 로직 완료 후 CSV 내보내기(부모 1회) → v1 프레임을 메모리에서 조립 → abuse_end → (옵션) 스코어링
+    fork를 쓸 수 없는 플랫폼에서는 run_pipeline(순차)로 대체.
+    """
+    load_frames()
+    if "fork" not in mp.get_all_start_methods():
+        print("[pipeline] fork 미지원 플랫폼 → 순차 실행")
+        return run_pipeline(score=score)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("fork")) as ex:
+        running = {}
+        while len(results) < len(LOGICS):
+            for name in _ready(set(results), set(running.values())):
+                running[ex.submit(_run_logic, name)] = name
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name, writes = fut.result()
+                del running[fut]
+                for table, col, values in writes:
+                    abuse_store.save_columns(table, pd.DataFrame({col: values}), [col])
+                results[name] = writes
+                print(f"[pipeline] {name} 라벨 병합 완료")
+    export_outputs()
+
+    # v1 프레임 조립(로직 선언 순서 = 순차 실행 시 컬럼 순서)
+    ns = _base_namespace()
+    for name in LOGICS:
+        for table, col, values in results[name]:
+            ns[f"df_{table}_v1"][col] = values
+    ns = run_stages(("abuse_end.py",), ns)
+    _mark_labeled()
+    return _score(ns) if score else ns
+
+
+# ================= 증분 실행 (일 단위 append) =================
+def _row_days(df: pd.DataFrame, table: str) -> np.ndarray:
+    """행별 날짜(datetime64[D]). 파싱 실패는 NaT."""
+    dt = pd.to_datetime(df[DAY_COLS[table]], errors="coerce")
+    return dt.to_numpy().astype("datetime64[D]")
+
+def _rate_mask(table: str, df: pd.DataFrame, df_list: pd.DataFrame, kind) -> np.ndarray:
+    """광고별 비율 분모 행 마스크."""
+    if kind == "night":
+        return pd.to_datetime(df["click_date"], errors="coerce").dt.hour.isin(NIGHT_HOURS).to_numpy()
+    if kind == "install":
+        types = df["ads_idx"].map(df_list.drop_duplicates("ads_idx").set_index("ads_idx")["ads_type"])
+        return types.isin(INSTALL_TYPES).to_numpy()
+    return np.ones(len(df), dtype=bool)
+
+def _refresh_list_rate(name: str, df_list: pd.DataFrame) -> None:
+    """저장된 행 라벨 전체로 df_list 광고별 비율(abuse_N) 사이드카를 다시 계산."""
+    table, kind = LOGICS[name]["rate"]
+    col = "abuse_" + name[len("abuse"):]
+    cols = ["ads_idx"] + (["click_date"] if kind == "night" else [])
+    src = abuse_store.load_table(table, columns=cols, sidecars=[col])
+    den = _rate_mask(table, src, df_list, kind)
+    hit = pd.to_numeric(src[col], errors="coerce").fillna(0).gt(0)[den]
+    rate = hit.groupby(src.loc[den, "ads_idx"]).mean()
+    vals = df_list["ads_idx"].map(rate).fillna(0.0).clip(0, 1)
+    abuse_store.update_columns("list", col, pd.Series(vals.to_numpy(), index=pd.RangeIndex(len(df_list))))
+
+def _window_frames(days: dict, start: np.datetime64) -> tuple:
+    """날짜 ≥ start(또는 날짜 없음) 행만 남긴 부분 프레임(행 번호 0부터 재부여)과 테이블별 원천 _rid."""
+    df_list, df_join, df_settle, df_rpt = load_frames()
+    frames, rids = {"list": df_list}, {}
+    for table, df in (("join", df_join), ("settle", df_settle), ("rpt", df_rpt)):
+        rids[table] = np.flatnonzero(np.isnat(days[table]) | (days[table] >= start))
+        frames[table] = df.iloc[rids[table]].reset_index(drop=True)
+    return frames, rids
+
+def _run_window(spec: dict, days: dict, first: np.datetime64) -> list:
+    """
+    lookback 창 실행: [first-2L, …] 행으로 로직 실행(파일 쓰기 없음) → [first-L, …](+날짜 없음) 행 라벨만 반환.
+    반환: [(table, col, _rid 인덱스 Series)] — df_list 비율은 창 일부로 계산되므로 제외.
+    """
+    lb = np.timedelta64(int(spec["lookback"]), "D")
+    affected = first - lb
+    frames, rids = _window_frames(days, affected - lb)
+    abuse_store.defer_writes(row_ids=rids)
+    run_stages((spec["script"],), _base_namespace(frames))
+    out = []
+    for table, col, values in abuse_store.take_pending():
+        if table == "list":
+            continue
+        d = days[table][values.index.to_numpy()]
+        out.append((table, col, values[np.isnat(d) | (d >= affected)]))
+    return out
+
+def run_incremental(score: bool = True) -> dict | None:
+    """
+    일 단위 append 증분 실행.
+    - 새 행 = 테이블별 labeled_rows 이후 행. 새 행의 최소 날짜 D 기준으로
+      lookback=L 로직은 [D-2L, …] 구간만 실행(문맥), [D-L, …] 행 라벨만 사이드카에 덮어쓴다(새 행 + 소급 영향 행).
+    - lookback=None 로직은 전체 프레임으로 실행해 전체 갱신(로직별 집계 상태를 저장하지 않으므로
+      이 로직들의 비용은 새 행 수가 아니라 전체 이력 길이에 비례).
+    - df_list 비율은 로직별 rate 선언대로 저장된 행 라벨 전체로 재계산.
+    - 처음 실행이거나 기존 행이 바뀐 경우(append 아님)는 run_pipeline으로 전체 재계산.
+    """
+    df_list, df_join, df_settle, df_rpt = load_frames()
+    done = {t: abuse_store.labeled_rows(t) for t in SOURCES}
+    if any(done[t] == 0 for t in SOURCES):
+        print("[pipeline] 증분 기준 없음(최초 실행/원천 변경) → 전체 실행")
+        return run_pipeline(score=score)
+
+    days = {t: _row_days(df, t) for t, df in (("join", df_join), ("settle", df_settle), ("rpt", df_rpt))}
+    new_days = np.concatenate([d[done[t]:] for t, d in days.items()])
+    new_days = new_days[~np.isnat(new_days)]
+    if not len(new_days):
+        print("[pipeline] 새 행 없음 → 건너뜀")
+        return None
+    first = new_days.min()
+    print(f"[pipeline] 증분 실행: {first} 이후 새 행 기준")
+
+    for name, spec in LOGICS.items():
+        t0 = time.time()
+        lb = spec["lookback"]
+        if lb is None:
+            abuse_store.defer_writes()
+            run_stages((spec["script"],), _base_namespace())
+            for table, col, values in abuse_store.take_pending():
+                abuse_store.save_columns(table, pd.DataFrame({col: values}), [col])
+        else:
+            for table, col, values in _run_window(spec, days, first):
+                abuse_store.update_columns(table, col, values)
+            if "rate" in spec:   # 광고별 비율은 저장된 행 라벨 전체로 재계산
+                _refresh_list_rate(name, df_list)
+        print(f"[pipeline] {name} 증분 갱신 완료 ({time.time()-t0:.1f}s)")
+
+    export_outputs()
+
+    # v1 프레임 = base + 갱신된 사이드카
+    ns = _base_namespace()
+    for table in SOURCES:
+        ns[f"df_{table}_v1"] = abuse_store.load_table(table)
+    ns = run_stages(("abuse_end.py",), ns)
+    _mark_labeled()
+    return _score(ns) if score else ns
+
+
+def check_incremental() -> dict:
+    """
+    마지막 날짜를 새로 append된 하루로 보고, lookback이 유한한 로직마다
+    창 실행(run_incremental과 같은 경로) 라벨이 전체 실행 라벨과 같은지 비교. 저장소에는 쓰지 않는다.
+    반환: {로직: 불일치 행 수}. lookback=None 로직은 증분에서도 전체 실행이므로 대상 아님.
+    """
+    df_list, df_join, df_settle, df_rpt = load_frames()
+    days = {t: _row_days(df, t) for t, df in (("join", df_join), ("settle", df_settle), ("rpt", df_rpt))}
+    valid = np.concatenate([d[~np.isnat(d)] for d in days.values()])
+    if not len(valid):
+        print("[pipeline] 날짜가 있는 행 없음 → 확인 생략")
+        return {}
+    last = valid.max()
+    result = {}
+    for name, spec in LOGICS.items():
+        if spec["lookback"] is None:
+            continue
+        abuse_store.defer_writes()
+        run_stages((spec["script"],), _base_namespace())
+        full = {(table, col): values for table, col, values in abuse_store.take_pending()}
+        bad = 0
+        for table, col, values in _run_window(spec, days, last):
+            ref = pd.Series(full[(table, col)]).iloc[values.index.to_numpy()]   # 전체 실행 값은 행 순서 배열
+            a = pd.to_numeric(values, errors="coerce").astype("float64").fillna(-1).to_numpy()
+            b = pd.to_numeric(ref, errors="coerce").astype("float64").fillna(-1).to_numpy()
+            bad += int((a != b).sum())
+        result[name] = bad
+        print(f"[pipeline] {name} 증분 확인({last}): 불일치 {bad:,}행")
+    return result
+
+# ================= 분할 실행 (out-of-core) =================
+def _budget_bytes(name: str) -> float:
+    return MEMORY_BUDGET_GB.get(name, MEMORY_BUDGET_GB["default"]) * 1024**3
+
+def _work_bytes(tables) -> float:
+    """테이블 전체를 로직에 넣었을 때의 추정 작업 메모리(바이트)."""
+    return sum(abuse_store.base_rows(t) * abuse_store.row_bytes(t) for t in tables) * WORKING_SET_FACTOR
+
+def _day_codes(s: pd.Series) -> np.ndarray:
+    d = pd.to_datetime(s, errors="coerce").to_numpy().astype("datetime64[D]")
+    return np.where(np.isnat(d), NO_DAY, d.astype("int64")).astype("int32")
+
+def _hash_slots(s: pd.Series) -> np.ndarray:
+    """키 → 해시 슬롯. 숫자 기준으로 맞춰 테이블마다 dtype(int/float)이 달라도 같은 슬롯."""
+    v = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64")
+    return (pd.util.hash_array(v) % HASH_SLOTS).astype("int16")
+
+def _partitions(name: str, spec: dict, tables: list):
+    """(파티션 번호, table → 읽을 _rid, table → 라벨을 남길 행 마스크) 순회. 컬럼 1개 스캔으로만 배정."""
+    budget, need = _budget_bytes(name), _work_bytes(tables)
+    if spec["partition"] == "date":
+        if spec["lookback"] is None:
+            raise ValueError(f"{name}: 전체 이력 의존(lookback=None) 로직은 날짜 분할할 수 없습니다.")
+        lb = int(spec["lookback"])
+        days = {t: abuse_store.scan_column(t, DAY_COLS[t], _day_codes) for t in tables}
+        valid = np.concatenate([d[d != NO_DAY] for d in days.values()])
+        if not len(valid):
+            yield 0, {t: np.arange(len(d)) for t, d in days.items()}, {t: np.ones(len(d), bool) for t, d in days.items()}
+            return
+        d0, d1 = int(valid.min()), int(valid.max())
+        per_day = need / (d1 - d0 + 1)
+        span = max(1, int(budget // max(per_day, 1)) - 2 * lb)
+        if (span + 2 * lb) * per_day > budget:
+            print(f"[pipeline] {name}: 1일 + 문맥 {2*lb}일도 예산 초과 → 1일 단위로 실행")
+        for k, a in enumerate(range(d0, d1 + 1, span)):
+            b = a + span
+            rids, keep = {}, {}
+            for t, d in days.items():
+                nat = d == NO_DAY   # 날짜 없는 행은 모든 파티션의 문맥, 라벨은 첫 파티션에서만
+                rids[t] = np.flatnonzero(nat | ((d >= a - lb) & (d < b + lb)))
+                dk = d[rids[t]]
+                keep[t] = ((dk >= a) & (dk < b) & (dk != NO_DAY)) | ((dk == NO_DAY) & (k == 0))
+            yield k, rids, keep
+    else:
+        key = spec["partition"][1]
+        keys = key if isinstance(key, dict) else dict.fromkeys(tables, key)
+        slots = {t: abuse_store.scan_column(t, keys[t], _hash_slots) for t in tables}
+        n = min(max(1, math.ceil(need / budget)), HASH_SLOTS)
+        for k in range(n):
+            rids = {t: np.flatnonzero(s % n == k) for t, s in slots.items()}
+            yield k, rids, {t: np.ones(len(r), bool) for t, r in rids.items()}
+
+def _run_partitioned(name: str, spec: dict, df_list: pd.DataFrame) -> list:
+    """
+    파티션마다 필요한 행만 base에서 읽어 로직 실행 → 남길 행 라벨을 스필.
+    rate 선언이 있으면 광고별 (분자, 분모) 집계도 스필해 두었다가 합산으로 비율 재계산. 반환: [(table, col)].
+    """
+    tables = [t for t in spec["reads"] if t != "list"]
+    other = [t for t in ("join", "settle", "rpt") if t not in tables]
+    empty = normalize_frames({t: abuse_store.read_rows(t, np.zeros(0, dtype="int64")) for t in other})
+    rate, out, list_dtype = spec.get("rate"), [], {}
+    for k, rids, keep in _partitions(name, spec, tables):
+        frames = normalize_frames({t: abuse_store.read_rows(t, rids[t]) for t in tables})
+        frames.update(empty, list=df_list)
+        abuse_store.defer_writes(row_ids={**rids, **{t: np.zeros(0, dtype="int64") for t in other}})
+        run_stages((spec["script"],), _base_namespace(frames))
+        for table, col, values in abuse_store.take_pending():
+            if table == "list":
+                list_dtype[col] = pd.Series(values).dtype   # 광고별 비율은 파티션 일부 기준 → 아래에서 집계 합산으로 재계산
+                continue
+            m = keep[table]
+            abuse_store.spill(table, col, values[m].to_frame(col), k)
+            if rate and table == rate[0]:
+                f = frames[table].loc[m]
+                den = _rate_mask(table, f, df_list, rate[1])
+                hit = pd.to_numeric(values[m], errors="coerce").fillna(0).gt(0).to_numpy()
+                agg = pd.DataFrame({"hit": hit[den].astype("int64"), "den": 1}).groupby(f["ads_idx"].to_numpy()[den]).sum()
+                abuse_store.spill("list", f"{col}_rate", agg, k)
+            if (table, col) not in out:
+                out.append((table, col))
+        print(f"[pipeline] {name} 파티션 {k} 완료 ({', '.join(f'{t} {len(r):,}행' for t, r in rids.items())})")
+
+    for col, dtype in list_dtype.items():
+        if rate:
+            agg = abuse_store.read_spill("list", f"{col}_rate")
+            agg = agg.groupby(level=0).sum() if len(agg) else pd.DataFrame({"hit": [], "den": []})
+            vals = df_list["ads_idx"].map(agg["hit"] / agg["den"]).fillna(0.0).clip(0, 1)
+            abuse_store.clear_spill("list", f"{col}_rate")
+        else:
+            raise ValueError(f"{name}: 분할 실행에서 df_list 라벨을 합치려면 LOGICS에 rate 선언이 필요합니다.")
+        side = pd.DataFrame({col: vals.astype(dtype).to_numpy()}, index=pd.RangeIndex(len(df_list), name=abuse_store.RID_COL))
+        abuse_store.spill("list", col, side, 0)
+        out.append(("list", col))
+    return out
+
+def _run_whole(name: str, spec: dict) -> list:
+    """분할 불가 로직: 전체 프레임으로 실행(예산 초과 시 경고), 라벨은 다른 로직과 같이 스필로 모은다."""
+    need = _work_bytes(spec["reads"])
+    if need > _budget_bytes(name):
+        print(f"[pipeline] 경고: {name}는 분할 불가 로직 — 추정 {need/1024**3:.1f}GB > 예산 {_budget_bytes(name)/1024**3:.1f}GB")
+    abuse_store.defer_writes()
+    run_stages((spec["script"],), _base_namespace())
+    out = []
+    for table, col, values in abuse_store.take_pending():
+        side = pd.DataFrame({col: values}, index=pd.RangeIndex(len(values), name=abuse_store.RID_COL))
+        abuse_store.spill(table, col, side, 0)
+        out.append((table, col))
+    return out
+
+def run_out_of_core(score: bool = True) -> dict:
+    """
+    메모리 예산 내 분할 실행.
+    - 분할 가능한 로직을 먼저(원천 전체를 올리지 않은 상태에서) 파티션 단위로 실행하고,
+      분할 불가 로직은 그 뒤에 공유 프레임으로 실행한다.
+    - 모든 로직의 라벨 조각은 스필 파일에 모아 두었다가 LOGICS 순서대로 사이드카에 합친다.
+    - 이후 CSV 내보내기 → v1 조립 → abuse_end → (옵션) 스코어링은 run_incremental과 같다.
+    예산이 지켜지는 것은 분할 로직 구간뿐이고, 분할 불가 로직과 v1 조립 이후는 전체 테이블을 메모리에 올린다
+    (최대 메모리 상한은 보장하지 않음 — 모듈 설명 참고).
+    """
+    bad = [n for n, spec in LOGICS.items() if spec["partition"] == "date" and spec["lookback"] is None]
+    if bad:
+        raise ValueError(f"전체 이력 의존(lookback=None) 로직은 날짜 분할할 수 없습니다: {bad}")
+    global _FRAMES
+    _FRAMES = None
+    for t, (p, kw) in SOURCES.items():
+        abuse_store.ensure_source(t, p, **kw)
+    df_list = normalize_frames({"list": abuse_store.load_table("list", sidecars=[])})["list"]
+
+    outs = {}
+    order = [n for n in LOGICS if LOGICS[n]["partition"] is not None] + \
+            [n for n in LOGICS if LOGICS[n]["partition"] is None]
+    for name in order:
+        t0 = time.time()
+        spec = LOGICS[name]
+        outs[name] = _run_partitioned(name, spec, df_list) if spec["partition"] is not None else _run_whole(name, spec)
+        print(f"[pipeline] {name} 분할 실행 완료 ({time.time()-t0:.1f}s)")
+
+    for name in LOGICS:
+        for table, col in outs[name]:
+            abuse_store.merge_spill(table, col)
+    export_outputs()
+
+    ns = _base_namespace()
+    for table in SOURCES:
+        ns[f"df_{table}_v1"] = abuse_store.load_table(table)
+    ns = run_stages(("abuse_end.py",), ns)
+    _mark_labeled()
+    return _score(ns) if score else ns
+
+
+if __name__ == "__main__":
+    sys.modules.setdefault("abuse_pipeline", sys.modules[__name__])
+    if "--check-incremental" in sys.argv[1:]:
+        check_incremental()
+    elif "--incremental" in sys.argv[1:]:
+        run_incremental()
+    elif "--out-of-core" in sys.argv[1:]:
+        run_out_of_core()
+    elif "--parallel" in sys.argv[1:]:
+        run_parallel()
+    else:
+        run_pipeline()
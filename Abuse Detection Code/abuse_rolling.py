@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+그룹별 롤링/요약 통계 커널(공용) — abuse3 폭증 탐지, abuse7 베이스라인.
+
+- 입력은 (그룹, 시간) 순으로 정렬된 1차원 값 배열 + 그룹 코드. 그룹마다 DataFrame을 복사하지 않는다.
+- rolling_stats: 그룹 시작 오프셋으로 창을 잘라 (n, window) 뷰 한 장에서 median/std/count를 동시에 계산.
+  pandas rolling(window, min_periods).median()/.std(ddof)/.count()와 같은 값(NaN은 건너뜀).
+- group_stats: 그룹 전체 구간의 count/mean/median/std를 정렬 1회로 계산.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+
+# ===== 전역 파라미터 =====
+BATCH_ROWS = 2_000_000   # rolling_stats 창 뷰 배치 행 수(메모리 상한 = BATCH_ROWS × window)
+
+
+def group_offsets(codes) -> np.ndarray:
+    """정렬된 그룹 코드 → 행별 그룹 시작 위치."""
+    codes = np.asarray(codes)
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype="int64")
+    start = np.r_[True, codes[1:] != codes[:-1]]
+    return np.maximum.accumulate(np.where(start, np.arange(n), 0))
+
+def rolling_stats(values, codes, window: int, min_periods: int | None = None, ddof: int = 0):
+    """
+    그룹별 후행 롤링 (median, std, count). codes가 같은 행은 연속(정렬)이어야 한다.
+    count < min_periods인 위치의 median/std는 NaN.
+    """
+    v = np.asarray(values, dtype="float64")
+    n = len(v)
+    min_periods = window if min_periods is None else min_periods
+    med = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    cnt = np.zeros(n, dtype="int64")
+    if n == 0:
+        return med, std, cnt
+
+    g0 = group_offsets(codes)
+    pad = np.r_[np.full(window - 1, np.nan), v]          # 앞쪽 패딩 → 창 뷰 인덱스가 음수가 되지 않음
+    lag = np.arange(window - 1, -1, -1)                  # 창 안의 각 칸이 현재 행에서 몇 칸 앞인지
+    for a in range(0, n, BATCH_ROWS):
+        b = min(a + BATCH_ROWS, n)
+        rows = np.arange(a, b)
+        mat = np.lib.stride_tricks.sliding_window_view(pad, window)[a:b].copy()
+        mat[(rows[:, None] - lag[None, :]) < g0[a:b, None]] = np.nan   # 다른 그룹 값은 제외
+        c = np.count_nonzero(~np.isnan(mat), axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            m = np.nanmedian(mat, axis=1)
+            s = np.nanstd(mat, axis=1, ddof=ddof)
+        ok = c >= max(min_periods, 1)
+        med[a:b] = np.where(ok, m, np.nan)
+        std[a:b] = np.where(ok & (c > ddof), s, np.nan)
+        cnt[a:b] = c
+    return med, std, cnt
+
+def group_stats(values, codes, ddof: int = 1) -> pd.DataFrame:
+    """
+    그룹 전체 통계 [code, count, mean, median, std] (code 오름차순, 비결측 기준).
+    codes는 0..G-1 정수(정렬 불필요), 음수 코드는 제외.
+    """
+    v = np.asarray(values, dtype="float64")
+    codes = np.asarray(codes, dtype="int64")
+    n_grp = int(codes.max()) + 1 if len(codes) and codes.max() >= 0 else 0
+    keep = (codes >= 0) & ~np.isnan(v)
+    v, codes = v[keep], codes[keep]
+
+    cnt = np.bincount(codes, minlength=n_grp)
+    tot = np.bincount(codes, weights=v, minlength=n_grp)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = tot / cnt
+        dev = v - mean[codes]
+        var = np.bincount(codes, weights=dev * dev, minlength=n_grp) / (cnt - ddof)
+    std = np.where(cnt > ddof, np.sqrt(np.clip(var, 0, None)), np.nan)
+
+    # 중앙값: (그룹, 값) 정렬 1회 후 그룹 가운데 두 칸 평균
+    order = np.lexsort((v, codes))
+    sv = v[order]
+    start = np.r_[0, np.cumsum(cnt)[:-1]]
+    lo = start + (cnt - 1) // 2
+    hi = start + cnt // 2
+    has = cnt > 0
+    median = np.full(n_grp, np.nan)
+    median[has] = (sv[lo[has]] + sv[hi[has]]) / 2
+
+    return pd.DataFrame({"code": np.arange(n_grp), "count": cnt,
+                         "mean": np.where(has, mean, np.nan), "median": median, "std": std})
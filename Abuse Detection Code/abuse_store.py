@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+어뷰징 단계 간 공유 컬럼형 저장소.
+
+- 원천 CSV는 최초 1회만 파싱해 테이블별 base 파일(Parquet)로 보관하고,
+  원천 파일 크기/수정시각이 바뀌었을 때만 다시 파싱한다.
+- 각 abuse 단계는 전체 테이블을 다시 쓰지 않고, 자신이 추가한 컬럼(abuse_N 등)만
+  행 번호(_rid)를 키로 한 사이드카 파일로 저장한다.
+- 읽을 때는 base(컬럼 프로젝션) + 필요한 사이드카를 _rid 기준으로 붙여 v1 테이블을 복원한다.
+- 정상/어뷰징 분리 결과는 라벨 비트마스크 기준 파티션 파일(part=clean / part=abuse)로 저장한다.
+- 원천이 기존 행 뒤에 행만 추가된 경우(일 단위 append)는 사이드카를 유지하고,
+  라벨이 끝난 행수(labeled_rows)를 기록해 증분 실행이 새 행만 골라 처리할 수 있게 한다.
+- 분할 실행(out-of-core)용: base를 배치로 훑어 컬럼 1개만 스캔(scan_column)하거나 지정 _rid 행만 읽고(read_rows),
+  파티션별 중간 결과는 {table}/_spill/{name}/part-NNNNN 파일로 내려 두었다가 마지막에 한 번 합친다.
+- pyarrow가 없으면 pickle로 저장한다(dtype 보존, 프로젝션은 로드 후 적용).
+"""
+
+import os
+import json
+import shutil
+import pandas as pd
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_ARROW = True
+except ImportError:
+    _HAS_ARROW = False
+
+# ===== 전역 파라미터 =====
+STORE_DIR = "abuse_store"       # 저장소 루트
+RID_COL   = "_rid"              # 행 번호 키(원천 테이블의 0..n-1 위치)
+BASE_NAME = "_base"             # 원천 테이블 파일명
+META_NAME = "_meta.json"        # 원천 서명/행수 기록
+PART_DIR  = "qqqq"              # 정상/어뷰징 파티션 출력 루트
+PART_FILE = "data"              # 파티션 내 파일명
+SPILL_DIR = "_spill"            # 분할 실행 중간 결과 디렉터리
+SCAN_ROWS = 1_000_000           # base 배치 읽기 행 수(분할 실행 메모리 = 파티션 + 배치 1개)
+SAMPLE_ROWS = 10_000            # 행당 메모리 추정 표본 행 수
+EXT = ".parquet" if _HAS_ARROW else ".pkl"
+
+_PENDING = None                 # 지연 쓰기 모드일 때 (table, col, values) 누적 (병렬 워커용)
+_ROW_IDS = None                 # 지연 쓰기 + 부분 테이블 모드: table → 원천 행 번호(_rid) 배열
+
+
+# ================= 유틸 =================
+def _table_dir(table: str) -> str:
+    return os.path.join(STORE_DIR, table)
+
+def _path(table: str, name: str) -> str:
+    return os.path.join(_table_dir(table), name + EXT)
+
+def _signature(path: str) -> dict:
+    st = os.stat(path)
+    return {"src": os.path.abspath(path), "size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+
+def _read_meta(table: str) -> dict:
+    p = os.path.join(_table_dir(table), META_NAME)
+    if not os.path.exists(p):
+        return {}
+    with open(p, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_meta(table: str, meta: dict) -> None:
+    with open(os.path.join(_table_dir(table), META_NAME), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """혼합 타입 object 컬럼은 결측을 유지한 채 문자열로 맞춰 Parquet 저장이 가능하게 한다."""
+    out = df
+    for c in df.columns:
+        if df[c].dtype != object:
+            continue
+        s = df[c]
+        kinds = set(map(type, s.dropna().head(10000)))
+        if len(kinds) > 1:
+            if out is df:
+                out = df.copy()
+            out[c] = s.where(s.isna(), s.astype(str))
+    return out
+
+def _write(df: pd.DataFrame, path: str) -> None:
+    tmp = path + ".tmp"
+    if _HAS_ARROW:
+        _arrow_safe(df).to_parquet(tmp, index=True)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
+
+def _fingerprint(df: pd.DataFrame) -> list:
+    """행 내용 해시 요약 [행수, 합, XOR] — append 판별(기존 행이 그대로인지)에 사용."""
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    xor = int(np.bitwise_xor.reduce(h)) if len(h) else 0
+    return [int(len(df)), int(h.sum(dtype=np.uint64)), xor]
+
+def _fill_na(df: pd.DataFrame) -> pd.DataFrame:
+    # Parquet 문자열 결측(None)을 CSV 로드와 동일하게 NaN으로 통일
+    for c in df.columns:
+        if df[c].dtype == object:
+            df[c] = df[c].fillna(np.nan)
+    return df
+
+def _read(path: str, columns=None) -> pd.DataFrame:
+    if _HAS_ARROW:
+        return _fill_na(pd.read_parquet(path, columns=columns))
+    df = pd.read_pickle(path)
+    return df if columns is None else df[list(columns)]
+
+
+# ================= 원천 로드 =================
+def _refresh_source(table: str, path: str, **read_csv_kwargs) -> pd.DataFrame | None:
+    """원천 서명이 바뀌었으면 CSV를 파싱해 base를 갱신하고 그 프레임을, 최신이면 None을 반환."""
+    os.makedirs(_table_dir(table), exist_ok=True)
+    sig = _signature(path)
+    meta = _read_meta(table)
+    base = _path(table, BASE_NAME)
+
+    if meta.get("source") == sig and os.path.exists(base):
+        return None
+
+    df = pd.read_csv(path, **read_csv_kwargs)
+    old = meta.get("rows", 0)
+    appended = (bool(meta) and os.path.exists(base) and 0 < old <= len(df)
+                and list(map(str, df.columns)) == meta.get("columns")
+                and _fingerprint(df.iloc[:old]) == meta.get("fingerprint"))
+    if appended:
+        _write(df, base)
+        meta.update(source=sig, rows=int(len(df)), fingerprint=_fingerprint(df))
+        _write_meta(table, meta)
+        return df
+
+    for f in os.listdir(_table_dir(table)):
+        if f.endswith(EXT) or f == META_NAME:
+            os.remove(os.path.join(_table_dir(table), f))
+    shutil.rmtree(os.path.join(_table_dir(table), SPILL_DIR), ignore_errors=True)
+    _write(df, base)
+    _write_meta(table, {"source": sig, "rows": int(len(df)), "columns": list(map(str, df.columns)),
+                        "fingerprint": _fingerprint(df), "labeled_rows": 0, "sidecars": []})
+    return df
+
+def read_source(table: str, path: str, **read_csv_kwargs) -> pd.DataFrame:
+    """
+    원천 CSV를 base 테이블로 로드. 원천 서명이 같으면 CSV를 다시 파싱하지 않는다.
+    read_csv_kwargs(dtype, index_col 등)는 최초 파싱에만 쓰이며 dtype은 base 파일에 그대로 보존된다.
+    원천이 바뀌면 이전 단계 사이드카는 행 번호가 어긋나므로 함께 폐기한다.
+    단, 기존 행이 그대로이고 뒤에 행만 추가된 경우(append)는 사이드카·labeled_rows를 유지한다.
+    """
+    df = _refresh_source(table, path, **read_csv_kwargs)
+    return _read(_path(table, BASE_NAME)) if df is None else df
+
+def ensure_source(table: str, path: str, **read_csv_kwargs) -> int:
+    """read_source와 같은 규칙으로 base만 최신화하고 행수를 반환(base를 메모리에 올리지 않음)."""
+    _refresh_source(table, path, **read_csv_kwargs)
+    return base_rows(table)
+
+def base_rows(table: str) -> int:
+    meta = _read_meta(table)
+    if not meta:
+        raise KeyError(f"'{table}' base가 없습니다. read_source로 먼저 적재하세요.")
+    return int(meta["rows"])
+
+def labeled_rows(table: str) -> int:
+    """라벨링이 끝난 원천 행수. 이후 행(append된 새 행)이 증분 실행 대상."""
+    return int(_read_meta(table).get("labeled_rows", 0))
+
+def mark_labeled(table: str) -> None:
+    """현재 base 전체를 라벨링 완료로 기록(파이프라인 실행 성공 후 호출)."""
+    meta = _read_meta(table)
+    if meta:
+        meta["labeled_rows"] = int(meta["rows"])
+        _write_meta(table, meta)
+
+
+# ================= 사이드카 저장/로드 =================
+def save_columns(table: str, df: pd.DataFrame, columns) -> None:
+    """
+    df(원천 행 순서 유지된 v1 테이블)의 지정 컬럼만 사이드카로 저장.
+    행수가 base와 다르면 _rid 정렬이 깨지므로 ValueError.
+    """
+    meta = _read_meta(table)
+    if not meta:
+        raise KeyError(f"'{table}' base가 없습니다. read_source로 먼저 적재하세요.")
+    if _PENDING is not None and _ROW_IDS is not None and table in _ROW_IDS:
+        rid = _ROW_IDS[table]
+        if len(df) != len(rid):
+            raise ValueError(f"[{table}] 부분 테이블 행수 불일치: 행번호={len(rid)}, 입력={len(df)}")
+        _PENDING.extend((table, c, pd.Series(df[c].array, index=pd.Index(rid, name=RID_COL))) for c in columns)
+        return
+    if len(df) != meta["rows"]:
+        raise ValueError(f"[{table}] 행수 불일치: base={meta['rows']}, 입력={len(df)}")
+
+    if _PENDING is not None:
+        _PENDING.extend((table, c, df[c].array) for c in columns)
+        return
+
+    rid = np.arange(len(df), dtype="int64")
+    for c in columns:
+        side = pd.DataFrame({c: df[c].array}, index=pd.Index(rid, name=RID_COL))
+        _write(side, _path(table, c))
+        if c not in meta["sidecars"]:
+            meta["sidecars"].append(c)
+    _write_meta(table, meta)
+
+def defer_writes(row_ids: dict | None = None) -> None:
+    """
+    이후 save_columns를 파일에 쓰지 않고 메모리에 모은다(병렬 워커에서 사용, 병합은 부모가 직렬로).
+    row_ids={table: _rid 배열}이면 해당 테이블은 부분(행 슬라이스) 입력으로 보고 values를 _rid 인덱스 Series로 모은다.
+    """
+    global _PENDING, _ROW_IDS
+    _PENDING, _ROW_IDS = [], row_ids
+
+def take_pending() -> list:
+    """지연된 (table, col, values) 목록을 돌려주고 지연 모드를 해제."""
+    global _PENDING, _ROW_IDS
+    out, _PENDING, _ROW_IDS = (_PENDING or []), None, None
+    return out
+
+def update_columns(table: str, col: str, values: pd.Series, fill=0) -> None:
+    """
+    사이드카 1개를 _rid 일부만 갱신(증분 실행). 기존 사이드카를 base 행수로 늘린 뒤(새 행은 fill)
+    values.index(_rid) 위치만 덮어쓴다. dtype은 기존 사이드카 기준으로 유지.
+    """
+    meta = _read_meta(table)
+    if not meta:
+        raise KeyError(f"'{table}' base가 없습니다. read_source로 먼저 적재하세요.")
+    rid = pd.RangeIndex(meta["rows"], name=RID_COL)
+    path = _path(table, col)
+    if os.path.exists(path):
+        cur = _read(path)[col]
+        dtype = cur.dtype
+        cur = cur.reindex(rid, fill_value=fill)
+    else:
+        dtype = values.dtype
+        cur = pd.Series(fill, index=rid, dtype=dtype)
+    cur.loc[values.index.to_numpy()] = values.to_numpy()
+    _write(pd.DataFrame({col: cur.astype(dtype).array}, index=rid), path)
+    if col not in meta["sidecars"]:
+        meta["sidecars"].append(col)
+        _write_meta(table, meta)
+
+def sidecar_names(table: str) -> list:
+    """저장된 사이드카 컬럼명(저장 순서)."""
+    return list(_read_meta(table).get("sidecars", []))
+
+def load_table(table: str, columns=None, sidecars=None) -> pd.DataFrame:
+    """
+    base(컬럼 프로젝션) + 사이드카를 _rid 기준으로 붙여 반환.
+    columns=None이면 base 전체, sidecars=None이면 저장된 사이드카 전체.
+    """
+    meta = _read_meta(table)
+    if not meta:
+        raise KeyError(f"'{table}' base가 없습니다. read_source로 먼저 적재하세요.")
+    out = _read(_path(table, BASE_NAME), columns=columns)
+    names = meta["sidecars"] if sidecars is None else list(sidecars)
+    for c in names:
+        side = _read(_path(table, c)).sort_index()
+        if len(side) != len(out) or not np.array_equal(side.index.to_numpy(), np.arange(len(out))):
+            raise ValueError(f"[{table}] 사이드카 '{c}'의 _rid가 base와 맞지 않습니다.")
+        out[c] = side[c].array
+    return out
+
+def export_csv(table: str, path: str, columns=None, sidecars=None, **to_csv_kwargs) -> None:
+    """
+    하위 소비자(예측/추천 스크립트)용 CSV 내보내기. 실행기가 라벨 병합을 모두 마친 뒤 1회만 호출.
+    지연 쓰기 중(워커/분할 실행)에는 아직 병합되지 않은 라벨이 빠지므로 RuntimeError.
+    """
+    if _PENDING is not None:
+        raise RuntimeError(f"[{table}] 지연 쓰기 중에는 CSV를 내보낼 수 없습니다(라벨 병합 전).")
+    kw = {"index": False}
+    kw.update(to_csv_kwargs)
+    load_table(table, columns=columns, sidecars=sidecars).to_csv(path, **kw)
+
+
+# ================= 정상/어뷰징 파티션 =================
+def _part_path(table: str, part: str, out_dir: str) -> str:
+    return os.path.join(out_dir, table, f"part={part}", PART_FILE + EXT)
+
+def write_partitions(table: str, df: pd.DataFrame, abuse_mask, out_dir: str = PART_DIR) -> dict:
+    """
+    df를 mask 기준으로 {out_dir}/{table}/part=clean|abuse/ 파일로 저장. 반환: 파티션별 행수.
+    pyarrow가 있으면 Arrow 테이블 1회 변환 후 filter로 나눠 쓴다(pandas 프레임 복사 없음).
+    """
+    mask = np.asarray(abuse_mask, dtype=bool)
+    if len(mask) != len(df):
+        raise ValueError(f"[{table}] mask 길이 불일치: df={len(df)}, mask={len(mask)}")
+    tbl = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False) if _HAS_ARROW else None
+    rows = {}
+    for part, sel in (("clean", ~mask), ("abuse", mask)):
+        path = _part_path(table, part, out_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        if _HAS_ARROW:
+            pq.write_table(tbl.filter(pa.array(sel)), tmp)
+        else:
+            df.loc[sel].to_pickle(tmp)
+        os.replace(tmp, path)
+        rows[part] = int(sel.sum())
+    return rows
+
+def read_partition(table: str, part: str = "clean", columns=None, out_dir: str = PART_DIR) -> pd.DataFrame:
+    """write_partitions로 저장한 파티션 1개만 읽기(다른 파티션은 열지 않음)."""
+    return _read(_part_path(table, part, out_dir), columns=columns)
+
+
+# ================= 분할 실행(out-of-core) 읽기 / 스필 =================
+def _batches(table: str, columns=None, batch_rows: int = SCAN_ROWS):
+    """base를 (시작 _rid, Arrow 배치 | DataFrame) 순서로 순회. pyarrow가 없으면 전체 1배치."""
+    path = _path(table, BASE_NAME)
+    if _HAS_ARROW:
+        pf = pq.ParquetFile(path)
+        off = 0
+        for b in pf.iter_batches(batch_size=batch_rows, columns=columns):
+            yield off, b
+            off += b.num_rows
+    else:
+        yield 0, _read(path, columns=columns).reset_index(drop=True)
+
+def _to_pandas(parts, schema=None) -> pd.DataFrame:
+    """배치 조각 → 행 번호 0부터인 DataFrame(인덱스 컬럼은 버림, _window_frames와 동일)."""
+    if _HAS_ARROW:
+        df = pa.Table.from_batches(parts, schema=schema).to_pandas()
+    else:
+        df = pd.concat(parts) if len(parts) > 1 else parts[0]
+    return _fill_na(df.reset_index(drop=True))
+
+def row_bytes(table: str) -> float:
+    """pandas로 올렸을 때 행당 메모리(바이트) 추정 — 앞쪽 SAMPLE_ROWS행 표본 기준."""
+    for _, b in _batches(table, batch_rows=SAMPLE_ROWS):
+        df = _to_pandas([b], b.schema) if _HAS_ARROW else b.head(SAMPLE_ROWS)
+        return float(df.memory_usage(deep=True).sum()) / max(len(df), 1)
+    return 0.0
+
+def scan_column(table: str, col: str, fn) -> np.ndarray:
+    """컬럼 1개만 배치로 읽어 fn(Series) → 행 단위 배열을 이어 붙인다(파티션 배정용)."""
+    out = []
+    for _, b in _batches(table, columns=[col]):
+        s = _to_pandas([b], b.schema)[col] if _HAS_ARROW else b[col]
+        out.append(np.asarray(fn(s)))
+    return np.concatenate(out) if out else np.zeros(0)
+
+def read_rows(table: str, rids, columns=None) -> pd.DataFrame:
+    """
+    정렬된 _rid 행만 읽어 반환(행 번호 0부터 재부여). 배치마다 해당 행만 골라 두므로
+    메모리는 결과 + 배치 1개. 0행이면 컬럼만 있는 빈 프레임.
+    """
+    rids = np.asarray(rids, dtype="int64")
+    parts, schema = [], None
+    for off, b in _batches(table, columns=columns):
+        n = b.num_rows if _HAS_ARROW else len(b)
+        lo, hi = np.searchsorted(rids, [off, off + n])
+        if _HAS_ARROW:
+            schema = b.schema
+            if hi > lo or not parts:
+                parts.append(b.take(pa.array(rids[lo:hi] - off)))
+        elif hi > lo or not parts:
+            parts.append(b.iloc[rids[lo:hi] - off])
+    return _to_pandas(parts, schema)
+
+def _spill_dir(table: str, name: str) -> str:
+    return os.path.join(_table_dir(table), SPILL_DIR, name)
+
+def spill(table: str, name: str, df: pd.DataFrame, part: int) -> None:
+    """파티션 1개의 중간 결과(라벨 조각·집계)를 디스크로 내린다."""
+    d = _spill_dir(table, name)
+    os.makedirs(d, exist_ok=True)
+    _write(df, os.path.join(d, f"part-{part:05d}{EXT}"))
+
+def read_spill(table: str, name: str) -> pd.DataFrame:
+    """스필 조각 전체를 파티션 순서대로 이어 붙인다(없으면 빈 프레임)."""
+    d = _spill_dir(table, name)
+    files = sorted(f for f in os.listdir(d) if f.endswith(EXT)) if os.path.isdir(d) else []
+    if not files:
+        return pd.DataFrame()
+    return pd.concat([_read(os.path.join(d, f)) for f in files])
+
+def clear_spill(table: str, name: str | None = None) -> None:
+    d = _spill_dir(table, name) if name else os.path.join(_table_dir(table), SPILL_DIR)
+    shutil.rmtree(d, ignore_errors=True)
+
+def merge_spill(table: str, col: str, fill=0) -> None:
+    """스필된 (_rid → 값) 조각들로 사이드카 1개를 갱신(update_columns)하고 스필을 지운다."""
+    parts = read_spill(table, col)
+    if len(parts):
+        update_columns(table, col, parts[col], fill=fill)
+    clear_spill(table, col)
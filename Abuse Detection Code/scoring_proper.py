@@ -8,11 +8,51 @@ import yaml
 from datetime import datetime
 import logging
 
+import abuse_store
+from abuse_identity import encode_users, decode_users
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def proper_scoring():
-    """올바른 어뷰징 스코어링"""
+RECENCY_LOGICS = [1, 3, 6, 7, 8]   # 최근성 가중(1.1) 로직
+SIZE_PARAMS = {   # 매체사 규모 → (size_factor, rate 지수, log 지수)
+    'LARGE':  (1.2, 0.9, 0.2),   # 대형: 비율 중심, 절대값 억제 / 기준 강화
+    'MEDIUM': (1.0, 0.8, 0.3),   # 중형: 균형
+    'SMALL':  (0.8, 0.7, 0.4),   # 소형: 절대값도 고려 / 기준 완화
+}
+
+
+def _entity_logic_stats(df, key, abuse_cols, logic_weights):
+    """
+    (엔티티, 로직)별 traffic/frequency/severity/abuse_rate long 테이블 — groupby 1회.
+    key: 행 단위 엔티티 키(결측 행 제외). 플래그가 없는 (엔티티, 로직)은 제외.
+    """
+    cols = [c for c in abuse_cols if int(c.split('_')[1]) in logic_weights]
+    vals = df[cols].astype('float32')
+    flags = vals.where(vals > 0)                      # 플래그 행만 값 유지 → count=빈도, mean=심각도
+    g = flags.groupby(pd.Series(np.asarray(key), index=df.index))
+    traffic, freq, sev = g.size(), g.count(), g.mean()
+
+    nums = [int(c.split('_')[1]) for c in cols]
+    out = pd.DataFrame({
+        'entity_id': np.repeat(freq.index.to_numpy(), len(cols)),
+        'logic_num': np.tile(nums, len(freq)),
+        'traffic':   np.repeat(traffic.to_numpy(), len(cols)),
+        'frequency': freq.to_numpy().ravel(),
+        'severity':  sev.to_numpy(dtype='float64').ravel(),
+    })
+    out = out[out['frequency'] > 0].reset_index(drop=True)
+    out['abuse_rate'] = out['frequency'] / out['traffic']
+    out['weight'] = out['logic_num'].map(logic_weights).astype(float)
+    return out
+
+def _entity_totals(stats):
+    """엔티티별 total_score (0 초과만), 입력 순서 유지."""
+    tot = stats.groupby('entity_id', sort=False)['logic_score'].sum()
+    return tot[tot > 0]
+
+def proper_scoring(df=None):
+    """올바른 어뷰징 스코어링 (df: 어뷰징 join 프레임, None이면 qqqq/join/part=abuse 파티션 로드)"""
     logger.info("🎯 올바른 종합 어뷰징 스코어링 시작...")
     
     # 설정 로드
@@ -21,8 +61,9 @@ def proper_scoring():
     
     logic_weights = config['logic_weights']
     
-    # 데이터 로드
-    df = pd.read_csv('qqqq/df_join_abuse.csv')
+    # 데이터 로드 (파이프라인 실행 시 메모리 프레임 그대로 사용)
+    if df is None:
+        df = abuse_store.read_partition('join', 'abuse')
     abuse_cols = [f'abuse_{i}' for i in range(1, 11) if f'abuse_{i}' in df.columns]
     
     logger.info(f"데이터: {len(df):,}행, 로직: {len(abuse_cols)}개")
@@ -42,188 +83,82 @@ def proper_scoring():
     
     logger.info(f"대형: {len(large_mdas)}개, 중형: {len(medium_mdas)}개, 소형: {len(small_mdas)}개")
     
-    # 2단계: 매체사별 종합 스코어링
+    # 2단계: 매체사별 종합 스코어링 — (매체사, 로직) 집계 1회 + 벡터 점수식
     logger.info("매체사별 종합 스코어링...")
     
-    mda_results = []
-    
-    for mda_id in df['mda_idx'].unique():
-        if pd.isna(mda_id):
-            continue
-            
-        mda_data = df[df['mda_idx'] == mda_id]
-        total_traffic = len(mda_data)
-        
-        # 규모 분류
-        if mda_id in large_mdas:
-            mda_size = 'LARGE'
-            size_factor = 1.2  # 대형은 기준 강화
-        elif mda_id in medium_mdas:
-            mda_size = 'MEDIUM' 
-            size_factor = 1.0  # 중형은 기준
-        else:
-            mda_size = 'SMALL'
-            size_factor = 0.8  # 소형은 기준 완화
-        
-        total_score = 0.0
-        logic_scores = {}
-        logic_details = {}
-        
-        # 3단계: 로직별 점수 계산 (10개 모두)
-        for col in abuse_cols:
-            if col not in mda_data.columns:
-                continue
-                
-            logic_num = int(col.split('_')[1])
-            if logic_num not in logic_weights:
-                continue
-            
-            abuse_data = mda_data[mda_data[col] > 0]
-            if len(abuse_data) == 0:
-                continue
-            
-            # 기본 지표
-            frequency = len(abuse_data)
-            severity = abuse_data[col].mean()
-            abuse_rate = frequency / total_traffic
-            
-            # 규모별 조정된 magnitude 계산
-            if mda_size == 'LARGE':
-                # 대형: 비율 중심, 절대값 억제
-                magnitude = (abuse_rate ** 0.9) * (np.log1p(frequency) ** 0.2) * severity
-            elif mda_size == 'MEDIUM':
-                # 중형: 균형
-                magnitude = (abuse_rate ** 0.8) * (np.log1p(frequency) ** 0.3) * severity  
-            else:
-                # 소형: 절대값도 고려
-                magnitude = (abuse_rate ** 0.7) * (np.log1p(frequency) ** 0.4) * severity
-            
-            # 4단계: 극값 조절 (tanh 포화함수)
-            normalized_mag = np.tanh(magnitude * 3)  # 0~1 사이로 조절
-            
-            # 5단계: 최종 로직 점수
-            base_weight = logic_weights[logic_num]
-            recency_boost = 1.1 if logic_num in [1, 3, 6, 7, 8] else 1.0
-            
-            logic_score = base_weight * normalized_mag * recency_boost * size_factor
-            
-            total_score += logic_score
-            logic_scores[logic_num] = logic_score
-            logic_details[logic_num] = {
-                'rate': abuse_rate,
-                'frequency': frequency,
-                'severity': severity,
-                'magnitude': magnitude,
-                'normalized': normalized_mag
-            }
-        
-        if total_score > 0:
-            # 상위 기여 로직
-            top_contribs = sorted(logic_scores.items(), key=lambda x: x[1], reverse=True)[:3]
-            contrib_str = ', '.join([f"L{lid}:{score:.3f}" for lid, score in top_contribs])
-            
-            mda_results.append({
-                'entity_id': mda_id,
-                'total_score': total_score,
-                'size_category': mda_size,
-                'traffic_size': total_traffic,
-                'logic_count': len(logic_scores),
-                'contributions': contrib_str,
-                'top_logic': max(logic_scores.items(), key=lambda x: x[1])[0] if logic_scores else None,
-                'score_balance': len([s for s in logic_scores.values() if s > total_score * 0.1])  # 10% 이상 기여하는 로직 수
-            })
+    st = _entity_logic_stats(df, df['mda_idx'], abuse_cols, logic_weights)
+    size_cat = np.where(st['entity_id'].isin(large_mdas), 'LARGE',
+                        np.where(st['entity_id'].isin(medium_mdas), 'MEDIUM', 'SMALL'))
+    prm = (pd.DataFrame.from_dict(SIZE_PARAMS, orient='index', columns=['size_factor', 'rate_pow', 'log_pow'])
+             .reindex(size_cat))
+    size_factor, rate_pow, log_pow = (prm[c].to_numpy() for c in prm.columns)
+    st['size_category'] = size_cat
+    # 규모별 조정된 magnitude → 극값 조절(tanh 포화) → 최종 로직 점수
+    st['magnitude'] = (st['abuse_rate'] ** rate_pow) * (np.log1p(st['frequency']) ** log_pow) * st['severity']
+    st['normalized'] = np.tanh(st['magnitude'] * 3)
+    recency_boost = np.where(st['logic_num'].isin(RECENCY_LOGICS), 1.1, 1.0)
+    st['logic_score'] = st['weight'] * st['normalized'] * recency_boost * size_factor
+
+    total = _entity_totals(st)
+    st = st[st['entity_id'].isin(total.index)]
+    # 상위 기여 로직(점수 내림차순, 동점은 로직 번호 순)
+    ranked = st.sort_values(['entity_id', 'logic_score', 'logic_num'], ascending=[True, False, True], kind='stable')
+    top3 = ranked.groupby('entity_id').head(3)
+    contrib = (('L' + top3['logic_num'].astype(str) + ':' + top3['logic_score'].map('{:.3f}'.format))
+               .groupby(top3['entity_id']).agg(', '.join))
+    per = st.assign(_tot=st['entity_id'].map(total))
+    
+    mda_df = pd.DataFrame({
+        'entity_id': total.index,
+        'total_score': total.to_numpy(),
+        'size_category': st.groupby('entity_id', sort=False)['size_category'].first().reindex(total.index).to_numpy(),
+        'traffic_size': st.groupby('entity_id', sort=False)['traffic'].first().reindex(total.index).to_numpy(),
+        'logic_count': st.groupby('entity_id', sort=False).size().reindex(total.index).to_numpy(),
+        'contributions': contrib.reindex(total.index).to_numpy(),
+        'top_logic': ranked.groupby('entity_id')['logic_num'].first().reindex(total.index).to_numpy(),
+        'score_balance': (per['logic_score'] > per['_tot'] * 0.1).groupby(per['entity_id'], sort=False).sum()
+                            .reindex(total.index).to_numpy(),  # 10% 이상 기여하는 로직 수
+    })
     
     # 결과 정렬
-    mda_df = pd.DataFrame(mda_results).sort_values('total_score', ascending=False).reset_index(drop=True)
+    mda_df = mda_df.sort_values('total_score', ascending=False).reset_index(drop=True)
     
     logger.info(f"매체사 완료: {len(mda_df)}개")
     
     # 전역 변수 저장
     globals()['mda_scores'] = mda_df
     
-    # 퍼블리셔 스코어링 (간단화)
+    # 퍼블리셔 스코어링 — 전체 퍼블리셔(샘플링 없음)
     logger.info("퍼블리셔 스코어링...")
-    pub_results = []
-    pub_sample = df.groupby('pub_sub_rel_id').apply(lambda x: x.head(1000)).reset_index(drop=True)
-    
-    for pub_id in pub_sample['pub_sub_rel_id'].value_counts().head(1000).index:
-        if pd.isna(pub_id):
-            continue
-        pub_data = pub_sample[pub_sample['pub_sub_rel_id'] == pub_id]
-        parent_mda = pub_data['mda_idx'].mode()[0] if len(pub_data['mda_idx'].mode()) > 0 else 'unknown'
-        
-        total_score = 0.0
-        for col in abuse_cols:
-            if col not in pub_data.columns:
-                continue
-            logic_num = int(col.split('_')[1])
-            if logic_num not in logic_weights:
-                continue
-            
-            abuse_data = pub_data[pub_data[col] > 0]
-            if len(abuse_data) == 0:
-                continue
-                
-            abuse_rate = len(abuse_data) / len(pub_data)
-            severity = abuse_data[col].mean()
-            magnitude = (abuse_rate ** 0.8) * (np.log1p(len(abuse_data)) ** 0.3) * severity
-            normalized_mag = np.tanh(magnitude * 2)
-            
-            logic_score = logic_weights[logic_num] * normalized_mag * 0.8  # 퍼블리셔 할인
-            total_score += logic_score
-        
-        if total_score > 0:
-            pub_results.append({
-                'entity_id': pub_id,
-                'parent_mda': parent_mda,
-                'total_score': total_score
-            })
-    
-    pub_df = pd.DataFrame(pub_results).sort_values('total_score', ascending=False).reset_index(drop=True)
+    st = _entity_logic_stats(df, df['pub_sub_rel_id'], abuse_cols, logic_weights)
+    magnitude = (st['abuse_rate'] ** 0.8) * (np.log1p(st['frequency']) ** 0.3) * st['severity']
+    st['logic_score'] = st['weight'] * np.tanh(magnitude * 2) * 0.8  # 퍼블리셔 할인
+    total = _entity_totals(st)
+    
+    # 상위 매체사: 퍼블리셔 내 최빈 mda_idx(동률이면 작은 값)
+    pm = (df.groupby(['pub_sub_rel_id', 'mda_idx']).size().rename('cnt').reset_index()
+            .sort_values(['pub_sub_rel_id', 'cnt', 'mda_idx'], ascending=[True, False, True], kind='stable')
+            .drop_duplicates('pub_sub_rel_id').set_index('pub_sub_rel_id')['mda_idx'])
+    pub_df = pd.DataFrame({
+        'entity_id': total.index,
+        'parent_mda': pm.reindex(total.index).astype(object).fillna('unknown').to_numpy(),
+        'total_score': total.to_numpy(),
+    }).sort_values('total_score', ascending=False).reset_index(drop=True)
     logger.info(f"퍼블리셔 완료: {len(pub_df)}개")
     
-    # 사용자 스코어링 (샘플링)
+    # 사용자 스코어링 — 전체 사용자(샘플링 없음), dvc_idx≠0 → dvc:…, 아니면 ip:…
     logger.info("사용자 스코어링...")
-    user_sample = df.sample(n=min(100000, len(df)), random_state=42)
-    user_sample = user_sample.copy()
-    user_sample['user_key'] = user_sample.apply(lambda row: 
-        f"dvc:{int(row['dvc_idx'])}" if pd.notna(row['dvc_idx']) and row['dvc_idx'] != 0 
-        else f"ip:{row['user_ip']}" if pd.notna(row['user_ip']) 
-        else 'unknown', axis=1)
-    
-    user_results = []
-    for user_key in user_sample['user_key'].value_counts().head(3000).index:
-        if user_key == 'unknown':
-            continue
-        user_data = user_sample[user_sample['user_key'] == user_key]
-        
-        total_score = 0.0
-        for col in abuse_cols:
-            if col not in user_data.columns:
-                continue
-            logic_num = int(col.split('_')[1])
-            if logic_num not in logic_weights:
-                continue
-                
-            abuse_data = user_data[user_data[col] > 0]
-            if len(abuse_data) == 0:
-                continue
-                
-            abuse_rate = len(abuse_data) / len(user_data)
-            severity = abuse_data[col].mean()
-            magnitude = (abuse_rate ** 0.85) * (np.log1p(len(abuse_data)) ** 0.25) * severity
-            normalized_mag = np.tanh(magnitude * 2)
-            
-            logic_score = logic_weights[logic_num] * normalized_mag * 0.6  # 사용자 할인
-            total_score += logic_score
-        
-        if total_score > 0:
-            user_results.append({
-                'entity_id': user_key,
-                'total_score': total_score
-            })
-    
-    user_df = pd.DataFrame(user_results).sort_values('total_score', ascending=False).reset_index(drop=True)
+    uid = encode_users(df['dvc_idx'], df['user_ip'], web_ok=df['user_ip'].notna().to_numpy())
+    uid = pd.Series(uid, index=df.index).where(uid >= 0)   # 식별 불가(unknown) 제외
+    st = _entity_logic_stats(df, uid, abuse_cols, logic_weights)
+    magnitude = (st['abuse_rate'] ** 0.85) * (np.log1p(st['frequency']) ** 0.25) * st['severity']
+    st['logic_score'] = st['weight'] * np.tanh(magnitude * 2) * 0.6  # 사용자 할인
+    total = _entity_totals(st)
+    
+    user_df = pd.DataFrame({
+        'entity_id': decode_users(total.index.to_numpy().astype('int64')).to_numpy(),
+        'total_score': total.to_numpy(),
+    }).sort_values('total_score', ascending=False).reset_index(drop=True)
     logger.info(f"사용자 완료: {len(user_df)}개")
     
     # 종합 통합
@@ -17,269 +17,27 @@ import matplotlib.pyplot as plt
 # In[2]:
 
 
-ads_year = pd.read_csv("df_rpt_clean.csv")
+# 어뷰징 분리 단계의 정상 파티션만 읽기 (경로·확장자는 abuse_store 기준)
+from abuse_outputs import read_clean
+ads_year = read_clean("rpt")
 ads_list = pd.read_csv("df_list_v1.csv")
 
 
 # In[3]:
 
 
-is_test_ad = ads_list["ads_name"].str.contains("테스트|서비스종료|삭제", na=False, case=False)
-is_valid_test_ad = ads_list["ads_name"].str.contains("브레인 테스트|게임테스트", na=False, case=False)
-condition_to_delete = is_test_ad & ~is_valid_test_ad
-ads_list = ads_list[~condition_to_delete].copy()
+# 광고 단위 피처는 ads_features 캐시에서 가져옴 (예측·추천·대시보드 공용, 신규/변경 광고만 재계산)
+# 테스트 광고(브레인 테스트/게임테스트 제외)는 여기서 제거
+from ads_features import load_features
+ads_list, ads_feats = load_features(ads_list, source='df_list_v1')
 
 
 # In[4]:
 
 
-# --- 분류 함수 (제외 키워드 적용) ---
-
-def categorize_domain(df, domain_name, keywords, search_cols, exclude_keywords=None):
-    """
-    DataFrame의 지정된 열(search_cols)에서 키워드를 찾아 
-    새로운 도메인을 부여하는 함수입니다. (제외 키워드 적용)
-    
-    Args:
-        df (pd.DataFrame): 작업할 데이터프레임
-        domain_name (str): 새로 부여할 도메인 이름 (예: '금융/보험')
-        keywords (list): 찾을 키워드 리스트 (예: ['피싱', '보험'])
-        search_cols (list): 키워드를 검색할 열 이름 리스트 (예: ['ads_name', 'ads_summary'])
-        exclude_keywords (list, optional): 제외할 키워드 리스트 (예: ['고양이'])
-        
-    Returns:
-        pd.DataFrame: 도메인이 추가된 데이터프레임
-    """
-    # 1. 키워드 리스트를 OR(|) 조건으로 묶어 하나의 검색 패턴으로 만듭니다.
-    keyword_pattern = '|'.join(keywords)
-    
-    # 2. 검색할 모든 열을 대상으로 키워드가 포함되었는지 확인하는 전체 조건을 만듭니다.
-    contains_keyword = df[search_cols].apply(
-        lambda col: col.str.contains(keyword_pattern, na=False)
-    ).any(axis=1)
-    
-    # 3. 제외 키워드가 있을 경우, 제외 키워드가 포함된 행을 False로 처리
-    if exclude_keywords is not None and len(exclude_keywords) > 0:
-        exclude_pattern = '|'.join(exclude_keywords)
-        contains_exclude = df[search_cols].apply(
-            lambda col: col.str.contains(exclude_pattern, na=False)
-        ).any(axis=1)
-    else:
-        contains_exclude = pd.Series([False]*len(df), index=df.index)
-    
-    # 4. 'domain' 열이 비어있는(NaN) 행 중에서, 키워드가 포함되고, 제외 키워드는 포함되지 않은 행만 선택
-    condition = (df['domain'].isna()) & (contains_keyword) & (~contains_exclude)
-    
-    # 5. 해당 행의 'domain' 열에 새로운 도메인 이름을 채워 넣습니다.
-    df = df.copy()  # 원본 데이터 보호
-    df.loc[condition, 'domain'] = domain_name
-    
-    print(f"✅ '{domain_name}' 카테고리 분류 완료! ({condition.sum()}개 적용, 제외 키워드: {exclude_keywords})")
-    return df
-
-# --- 함수 사용 예시 ---
-
-# 0. 먼저 'domain' 열을 생성하고 NaN으로 초기화합니다.
-ads_list['domain'] = np.nan
-
-# 1. '금융/보험' 도메인 분류 실행 (제외 키워드: '고양이')
-keywords_finance = ['금융','피싱', '보험', '주식', '펀드', '스탁', '신한', '머니트리카드', '공모주', 'KB', '업비트', '거래소', '환급금', '상조','더핀','증권','뱅크','보험료']
-exclude_keywords_finance = ['고양이','차차차','중고차','Idle']
-search_columns = ['ads_name', 'ads_save_way']
-ads_list = categorize_domain(ads_list, '금융/보험', keywords_finance, search_columns, exclude_keywords=exclude_keywords_finance)
-
-
-# 2. '게임' 도메인 분류 실행
-keywords_game = [
-    '게임', '스코어', '캐릭터', '서브퀘스트', '포커', '퍼즐', '라스트워', '피자 레디', 
-    '복권', 'RAID', '머지아일랜더스', '키우기', 'Merge', 'Puzzle', '아케론', '다크엔젤',
-    '악마단', 'RPG', '서바이벌', '라바', '모바일', '사전예약', '타이니팜', '이계밥', '타이쿤',
-    '강쥐','2X','골목주방', '올바른고','철물파크','레벨','도달','달성','00점','원스토어','Idle','Lv.',
-    '초이스 맞추기','클리어','에리어','빗썸','Complete','Tycoon','다이노 투 레이스','획득',
-    '구역 해제','모으기','소울 로그','잠금 해제','외계 시대','좀비','붉은 도시', '코인피클', '디펜스', '디바인엣지','영웅줍줍','K데몬헌터스','조조의 꿈','편의점 정리왕 3D'
-]
-# 제외할 키워드 리스트를 정의합니다.
-exclude_keywords_game = ['프리다이빙']
-
-# 함수를 호출할 때 exclude_keywords 인자를 정확히 전달합니다.
-ads_list = categorize_domain(
-    ads_list, 
-    '게임', 
-    keywords_game, 
-    search_columns, 
-    exclude_keywords=exclude_keywords_game
-)
-
-
-# 3-1. '생활/쇼핑/이커머스_상품소비' 도메인 분류 실행
-keywords_goods_consumption = [
-    # 기존 키워드 유지 (삭제/수정 금지)
-    # 식품/건강
-    '로얄캐닌', '콜라겐', '흑염소', '콘드로이친', '비타민', '간식', '베지밀', '식품', '블랙마카', '절임배추', '뉴트리하루', '영양제', '천심련 아나파랙틴', '고려은단', '오쏘몰', '간장게장', '왕뚜껑 킹스브레이브', '헬스케어', '케어', '홈헬스',
-    '바지락', '닭가슴살', '식단', '단백질', '제주농장', '진공포장', 'MSM', '글루타치온', '완도', '김',
-    # 패션/뷰티
-    '향수', '여신티켓', '화장품', '스나이델뷰티', '바바더닷컴', '팬츠',
-    '목걸이', '가방', '슬링백', '반팔티', '보정속옷', '캔버스', '카프스킨', '립앤칙스', '멀티밤', '톤업크림', '크림샌드',
-    # 리빙/인테리어
-    '핸드타올', '방석', '오늘의집', '한샘몰', '바자르', '방향제', '네온라이트',
-    '싱크대배수구', '배수통', '배수관', '방충망', '모기장', '하수구트랩', '도어스토퍼', '선반', '매트',
-    # 디지털/가전
-    'LG전자', '삼성닷컴', '몬스타기어', '몬스타pc스토어',' 전자',
-    '공기청정기', '필터', '랜턴', '마사지기', '모기채', '카드단말기', '키오스크', '포스기', '터미널', '커피메이커', '드립포트', '전기그릴',
-    # 반려동물
-    '강아지', '애견', '고양이', '덴탈껌', '치약껌', '이동가방', '리터네코',
-    # 기타 상품소비
-    '연장체인', '대나무체인', '퍼퓸', '오드퍼퓸', '세트', '골프 퍼팩트맨', '부스터 마사지건', '알로에겔', '알로에', '폼클렌징', '영화할인권', '영화예매권', '보일러',
-    # 신규 추가: 상품소비(구매) 관련 키워드
-    '토스터기', '안마기', '티포트', '크림', '토너', '경주빵', '이어폰', '충전케이블', '베개', '카사바칩', '샘물', '에그트레이', '귀이개', '마사지건', '실내사이클', '분리수거함', '보조배터리', '밀대', '코인타올', '목난로',
-    # 신규 추가: 샘플 데이터에서 추출된 상품소비(구매) 관련 키워드
-    '토마스 풀 패밀리', '멀티 와이드 그릴', '뉴네이처 알티지오메가3파워', '황후지화', '다이어트커피', '체지방감소', '레오폴디 로봇청소기', '스텐밀폐용기', '그린바나나 정', '깐알밤', '아쿠아 부스트 옴므 올인원', '체중계', '빨래바구니', '쎈쏘팔메토', '순녹용 골드', '진공청소기', '다이렉트 다이어트N유산균', '발효흑삼고', '레몬밤 다이어트', '샤인 미스트', '요거트메이커', '피부관리기', '올포유', '캐리어', '에어 프라이어', '후라이팬', '오로라플러스플라즈마', '피톤치드 탈취제', '카무트 효소', '모로실', '쿨토시', '헤어 에센스', '와인잔', '접이식 카트', '홍삼정', '리챔', '돼지양념구이', '믹스웰 블랜더', '차전자피식이섬유분말스틱', '브랜드밀효소', '연어코프로테오글리칸프리미엄', '비타 이뮨 플래티넘 골드', '타우린L-아르기닌', '냄비', '셀 이펙터 세럼', '오트밀', '관절보단', '기억력개선', '스트롱 업 차전자피', '호박 진액', '발효홍삼 산삼배양근 활력진골드 앰플', '핸디스팀다리미', '코헴무선스팀다리미', '코힐밤', '마호가니 원형도마', '마호가니 사각도마', '에디번 전기 그릴', '멀티믹서기', '철갑상어 건강즙', '홍삼로얄젤리스틱', '6년근홍삼정에브리원', '로댕 쏘 화이트업 마스크팩', '이데베논 페롤릭 부스터 앰플', '발효구기자 차', '모로오렌지 C3G 프리미엄', '목동알탕', '목동 곤이알찜', '올플레임 IH 세라믹 후라이팬', '올플레임 IH 세라믹 궁중팬', '캐리어 기내용', '레디백', '헤어클리닉', '쎈류신에너지파워', '에브리원 헤어드라이어', '아쿠아 무드등가습기', '마뜨앙 여행용 기내형캐리어', '찹살떡', '설기', '퍼펙트 커버 쿠션''온열', '카트', '투표권', '가르시니아', '브로멜', '파인애플효소', '하루힘차', '여주해죽순돼지감자차', '당당컷', '라끄시안', '굿매너', '화장지', '뷰티앤소프트', '더화이트', '키친타올', '물티슈', '나틴다', '클렌징', '립스틱', '로션', '자연에서 온 녹차', '블랙앵거스', 'LA갈비', '소불고기', '돼지불고기', '라에스테', '퍼펙트 듀오', '샴푸', '트리트먼트', '드라이기', '인덕션', '에어프라이어', '세정티슈', '벌꿀', '헤어팩', '양말', '더플백', '진공 쌀통', '찜질박사', '주방세제', '세탁세제', '섬유유연제', '톱날과도', '기황단', '레몬즙', '오메가3', '락토페린', '브레인1088', '루테인', '허니로얄제리', '참진한 흑마늘', '칫솔', '이불', '패드', '바싹불고기', '냉감 패드', '냉감 바디필로우', '에어매쉬토퍼', '레몬자몽즙', '레자몽', '레티놀C', '짜장', '해물짬뽕', '홍삼진', '홍삼액진', '흑삼진액', '스팀 헤어팩', '헤어로스 세럼', '헤리티지', '셀 부스팅 니들', '카무트효소', '리놀렌산', '장어활력', '녹용', '아르기닌', '마카', '샬롱', '이지쿡', '글라스뷰', '스위스밀리터리', '이엔비', '인사덴탑', 'NMN', 'Tubble', '메디트리', '네이처프리', '코오롱제약', '보령파워', '코스모팜', '신꼬', '칸투칸', '독일 코겔', '햄토피아', '동의삼', '순수달', '밸런스어게인', '퍼니트', '맛다움', 'G마켓',
-    # 신규 추가: 샘플 데이터 기반 추가 키워드 (기존 키워드와 중복 제외)
-    '케라틴 키퍼', '액상 마그네슘', '콤부차', '복합유산균', '골드 앰플', '워터 글라이드', '프로바이오틱스', '유기농애사비스틱', '유기농레몬생강즙', '오트오브맘', '프로틴메이트', '아르간 에센스', '스트레이트 펌', '헤어앰플', '스프레이', '염모제', '귀리 오트오브맘', '쿠폰팩', '마늘후랑크', '동치미 물냉면', '곡물발효효소', '함흥냉면', '신라면', '치즈카츠', '천연펄프', '팔토시', '닭한마리 볶음탕', '캡슐세제', '팔목형', '손목형', '보양 추어탕', '귀리쌀죽', '선 스크린', '바른어묵', '우거지 뼈해장국', '소내장탕', '카무트 누룽지', '보풀제거기', '골드 등급 패키지', '실버 등급 패키지', '블랙 등급 패키지', '팥찜질팩', '규조토페인트','스탠드다리미',
-    '가정용천국의계단','침구청소기','프랭클린 이염방지시트','젖병소독기','자차청정기','유럽미장',
-    '규조토페인트','커리쉴', '루트 레미디', '스칼프 토닉', '프레시포레스트향', '소프트켄넬', '얼음조끼', 'homegrow', '창문열차단', '암막시트지', '발 받침대', '반팔 와이셔츠', '인감도장', '럭스엑스팟', '용가리', '목문용방문손잡이', '플로우아쿠아슈즈', '골프모자', '보스턴백', '건전지', '트램폴린', '남자셔츠', '쿠션커버', '오리젠사료오리지날', '골프피규어', '수면조끼', '베이포레소맥스', '쿠션', '볼마커', '라셀르간냉식', 'Modern High', '팜아크', '아크용접기', '바를 수딩 쿨링젤', '지아자연애장판', '유막제거제', '진정 앰플', '퍼팩트컴', '각인반지', '니트릴장갑', '부산국밥', '팰리세이드호환튜닝용품', '드리미 음식물처리기', '43인치스탠바이미', '휴나인 매스틱 검', '팰리세이드튜닝', '팰리세이드튜닝 c필러수납', '팰리세이드튜닝142', '팰리세이드 사이드스텝', '팰리세이드 쓰레기통 튜닝', '코인비엠에스', '갤럭시북K71AR', 'NT950XFT-A51A', '하주씨앤씨', '긱베이프 레전드3','루이보스티', '양배추즙', '토마토즙', '대추즙', '헛개진액', '수제청', '포스파티딜세린', '올리브오일', '미백마스크팩', '진정마스크팩', '유산균', '등산화깔창', '게이밍 컴퓨터의자', '디퓨저', '골프패치', '남자링거티', '기능성반팔 쿨 카라티', '즐거운가구 렌지대', 'NUTRALIFE 카테킨', '비엔엠코리아', '미마유모차', '에피소X', '블로커콤비블라인드', '엘리카', '벨벳', '엘라카테슬라', '테슬라', '오란다', '오토바이 자석 거치대', '바벨런스', '쿠션커버', '쿠션', '수면조끼', '팥찜질팩', '방수앞치마', '명함제작', '스티커제작', '드레이프블라우스', '꼬막', '방수앞치마', '유리문 도어락', '무타공 도어락', '모기퇴치기', '해충 퇴치기', 'Onliv', '잔더','롯데마트 제타', '락앤락', '동국제약', '닥터로니', '휴리엔', '백년약방', '네일로그', '안락의자', '리빙박스', '아이언커버', '와이셔츠', '블라우스', '한우사골곰탕', '곶감', 'usb', '청국장', '베누스타 청소기', '컴퓨터의자', '인테리어의자', '그로밋 키링', '해장국', '딸기칩', '개완', '티머그', '차총', '보이차', '구찌뽕 추출물', '백향과', '황토볼', '차열페인트', '곰팡이방지페인트', '결로방지페인트', '벽지페인트', '가정용미니에어건', '네오프렌구명조끼', '휴나인 애사비','삼성 G100','삼성 H170D','삼성 F100D','키친플래그','제주탄산수',
-    # 신규 추가: 분석된 상품소비 키워드
-    '밴디 양방향 미끄럼방지 실내 욕실화', '삼성제약 내간에밀크씨슬실리마린', 'US 스킨아우라히알루론비타', 'US 프로바이오포스콜리500', '부사 사과', '스테비아 방울토마토', '천도복숭아', '하우스 감귤', '청사과', '프리미엄 파로', '백골뱅이', '대추 방울토마토', 'vintage', '체리 운드', '밤꿀', '네오디움 자석', '쉬폰커튼', '암막커튼', '코드스트랩', '스와들', '셀프페인트', '젯소', '페인트', '친환경페인트', '마이크로시멘트', '휘게로 페인트', '베스트에어컨 투인원', '여성 여름 셔츠', '치약', '피톤치드', '나노건', '피톤치드연무기', 'LCN마이코셉트', '업젤', '닭갈비', '오리주물럭', '프로파일','전자담배','논가스용접기',
-    # 신규 추가: 분석된 데이터에서 상품소비로 분류할 키워드
-    '볶은아몬드', '무선 쿨링 고데기', '골프트로피', '스탠맨해머전동드릴', '블루키워드', '리브라 에보', '유산지어', '지오 24MR400W 지오비전', '개밥청춘 위픽 에어드', '테이블야자', '떡볶이택배', '구운계란', '엘카라 프로폴리스', '크리스탈 감사패', '커피원두', '인섹트도그', '미마 모카색상 절충형유모차', '여행용 프리볼트 고데기', '수술복', '갤럭시S25케이스', '꼬리곰탕', '아론샵 홀드맥스 헤어젤', '루피는 참치마요', '야채참치', '밀크팡 산양유프로틴', '대추차', '27US550', '윈도우11', '닥터스초이스 콘드', '자전거라이트어', '자바라의자', '스탠드스팀다리미', '스팀다리미', '구강세정기', '제본', '산삼', '식물등', '테라리움', '책상 스탠드', '슬릿분', '백일상대여', '출차주의등', '수모', '도라지청', '환갑현수막', '칠순현수막', '관리기', '결명자차', '구기자차', '보리차 원액',
-    # 신규 추가: 100행 데이터에서 확실한 상품소비 키워드
-    '구운아몬드', '캐슈넛', '임산부효소', '업소용청소기', '아기잠옷', '아기파자마', 'PPF 왁스', '실내수영복', '용융소금', '스캇나인 아구아헤', '스타리온 대형 45박스 올냉장 냉장고', '전자저울', '멜라토닌', '감사패', '장수돌침대', '골프마스크팩', '교구장', '체리', '코튼 폴로 반팔니트', '코튼 반팔 폴로 여름니트', '차거름망', '곰탕육수', '씽크어스 하트', '차판', '자숙문어', '메리네 라비앙독', '여성 반팔 셔츠', '샤인머스켓', '오토바이리스', '양갈비', '까렌다쉬샤프', '잔디깎기', '하수구 뚫는 기계', '메탈지그', '청양고추', '예초기', '배달오토바이리스', '오리젠사료', '시트지제작', '우정링', '커플팔찌', '홍삼음료', '클립온 선글라스', '노시부석션팁', '닥터커피', '아몬드', '안전벨트', '건강하삼', '햄스터 케이지', 'ab슬라이드', '숙취해소제', '삼성ssd', '석재볼라드', '마사지젤', '가죽스티커', '콘체 블렌더',
-    # 신규 추가: 83행 데이터에서 확실한 상품소비 키워드
-    '메이튼 맥세이프자동차거치대', '베베끌레르 퍼펙트제로', '리플렛', '어닝', '방수액', '스트레치필름', '오토바이자석거치대', '핸드워시 답례품', '가죽트레이', '아만', '휴대폰 맥세이프 마그네틱 투명케이스', '어그 밴딩 슬리퍼', '손톱강화제', '까렌다쉬 샤프', '메탈파일', '원두커피', '인형뽑기기계', '일본지게차', '피오렌자또', '씨메커피머신', '토삭스', '파고라', '패션뷰티몰', '세레스쥬얼리',
-    '최대 77% 할인. 럭키세븐 특가','29cm', '상품찜','JONS 신규 가입 혜택','참소라', '글루어트', '새미쥬얼리', '조개구이', '초코파이','나물짤순이'
-]
-exclude_keywords_goods_consumption = ['연남동 스튜디오']
-ads_list = categorize_domain(
-    ads_list,
-    '상품소비',
-    keywords_goods_consumption,
-    search_columns,
-    exclude_keywords=exclude_keywords_goods_consumption
-)
-
-# 3-2. '생활/쇼핑/이커머스_생활서비스' 도메인 분류 실행
-keywords_life_service = [
-    # 기존 키워드 유지 (삭제/수정 금지)
-    # 교육/부동산
-    '교육', '학습', '영어', '보카', '홈런', '온리원', '부동산', '경매', '기출문제', '학원',
-    # 여행/문화
-    '호텔', '하나투어', '골프네임택', '스마트캐디', '프리다이빙',
-    # 생활서비스
-    '운동', '휘트니스', '테라피', '캠핑', '물구나무', '운동기구', '참여신청', '달다방',
-    # 신규 추가: 회원가입(서비스) 관련 키워드
-    '회원가입', '서비스 가입', '라이프플러스', '트라이브', 'H.Point 회원 가입하기',
-    # 샘플 데이터에서 추출된 생활서비스 관련 키워드
-    '공용 화장실 해제','이혼전문변호사',
-    # 신규 추가: 샘플 데이터 기반 추가 키워드 (기존 키워드와 중복 제외)
-    '최초 오픈', '기부완료', '쿠폰팩 가입', '인터넷신규가입','Shipping','패러글라이딩', '일상비일상의틈', 'NOL', 'NOL (신규회원 국내숙소 특별할인)', '최초 오픈', '정답입력',
-    # 추가: 리뷰 전체보기 클릭 후 URL 제출, 스토어 알림받기, 명소찾기
-    '리뷰 전체보기 클릭 후 URL 제출', '스토어 알림받기', '명소찾기',
-    # 신규 추가: 분석된 생활서비스 키워드
-    '상세페이지제작', '비상주사무실',  'V컬러링 이용권',
-    # 신규 추가: 100행 데이터에서 확실한 생활서비스 키워드
-    '로고제작',
-    # 신규 추가: 83행 데이터에서 확실한 생활서비스 키워드
-    '특수청소', '전단지배포및제작','바카르','젤톡스','SK브로드밴드'
-]
-exclude_keywords_life_service = []
-ads_list = categorize_domain(
-    ads_list,
-    '생활서비스',
-    keywords_life_service,
-    search_columns,
-    exclude_keywords=exclude_keywords_life_service
-)
-
-# 3-3. '생활/쇼핑/이커머스_플랫폼' 도메인 분류 실행
-keywords_platform = [
-    # 기존 키워드 유지 (삭제/수정 금지)
-    '쿠팡', '아이템매니아', '중고거래', '백화점', '당근마켓', '동네GS', 'GS25', '배달의민족',
-    # '네이버스마트스토어',
-    # 샘플 데이터에서 추출된 플랫폼 관련 키워드
-    'G마켓',
-    # 신규 추가: 샘플 데이터 기반 추가 키워드 (기존 키워드와 중복 제외)
-    '에누리 가격비교', '네이버 쇼핑', '네이버 상품 해시태그', '상품 태그 맞추기',
-    # # 신규 추가: 분석된 플랫폼 키워드
-    # '최대 77% 할인. 럭키세븐 특가',
-    # # 신규 추가: 100행 데이터에서 확실한 플랫폼 키워드
-    # '29cm', '상품찜',
-    # # 신규 추가: 83행 데이터에서 확실한 플랫폼 키워드
-    # 'JONS 신규 가입 혜택', '바카르'
-]
-exclude_keywords_platform = []
-ads_list = categorize_domain(
-    ads_list,
-    '플랫폼',
-    keywords_platform,
-    search_columns,
-    exclude_keywords=exclude_keywords_platform
-)
-
-# 아래는 분류가 애매하거나 추가 검토가 필요한 항목 리스트입니다.
-# 분류가 애매한 항목 (키워드로 분류가 어려운 경우)
-# - 퀴즈 맞추기, 퀴즈 정답 맞추기, [퀴즈] ~, ~맞추기, [정답] ~, 클릭, 받기, 상세페이지제작, 대전 비상주사무실, [간편참여] 특가요정, 강재인 (저장 후 주차장 URL), 다이아XXXX (저장 후 주차장 URL), 푸슈 (저장 후 주차장 URL), 일산보청기 (저장 후 주차장 URL), 미사 피부과 병원 미엘 (저장 후 주차장 URL), 수원중고차 (저장 후 주차장 URL), 인천제일바다낚시 (저장 후 주차장 URL), 라플로르드무아 (저장 후 주차장 URL), 창원세무사 조영빈 사무소 (저장 후 주차장 URL), 대전유리창청소 (저장 후 주차장 URL), 부천한방병원 차오름 (명소찾기), 강남수입차정비 내화모터스 (명소찾기), 이리와코리아 10개옵션 맞추기, 피지컬방이헬스 맞추기, 논가스용접기 200프로 맞추기, 유산지어 맞추기, 테이블야자 맞추기, 떡볶이택배 맞추기, 구운계란 인생 맞추기, 개밥청춘 위픽 에어드 맞추기, 우주인전자담배 맞추기, 지오 24MR400W 지오비전 맞추기, 엘카라 프로폴리스 맞추기, 크리스탈 감사패 맞추기, 인섹트도그7.5kg 맞추기, 잘봄XXX (저장 후 주차장 URL), [퀴즈] 강남 하수구뚫음, 삼성 F100D, 닥터초이스맞추기, 볶은아몬드, [퀴즈] 금천구 하수구막힘, 습자지 맞추기, [퀴즈] 무선 쿨링 고데기, 좋은상패26 닷컴 골프트로피 맞추기, 스탠맨해머전동드릴 맞추기, 블루키워드 맞추기, 동동마켓 리브라 에보 맞추기, 전자담배 액상(미성년자불가미션), 커피원두 맞추기, 상세페이지제작, 대전 비상주사무실, [정답] 치약(네이버 상품 상세내용) 등은 명확한 카테고리 분류가 어려워 추가 검토 필요
-# - 닥터초이스맞추기, 삼성 F100D, 볶은아몬드, [퀴즈] 금천구 하수구막힘, 습자지 맞추기, [퀴즈] 무선 쿨링 고데기, 좋은상패26 닷컴 골프트로피 맞추기, 스탠맨해머전동드릴 맞추기, 블루키워드 맞추기, 동동마켓의 엘리카 핏 83 맞추기, 동동마켓의 엘리카 핏 60 맞추기, 동동마켓 리브라 에보 맞추기, 동동마켓 엘리카 니콜라테슬라 벨벳83 맞추기, 동동마켓의 벨벳60 맞추기, 동동마켓 엘라카테슬라 맞추기, 동동마켓 4구엘리카 테슬라 맞추기, 피지컬방이헬스 맞추기, 이리와코리아 10개옵션 맞추기, 미마유모차 절충형유모차 맞추기, 논가스용접기 200프로 맞추기, 유산지어 맞추기, 테이블야자 맞추기, 떡볶이택배 맞추기, 구운계란 인생 맞추기, 기능성반팔 쿨 카라티 무지 맞추기, 즐거운가구 렌지대1800 맞추기, NUTRALIFE 카테킨 맞추기, 비엔엠코리아 10개옵션 맞추기, 오란다, 바벨런스, 골프패치, 남자링거티, 지오 24MR400W 지오비전 맞추기, 우주인전자담배 맞추기, 등산화깔창, 진정마스크팩, 미백마스크팩, 유산균, 디퓨저, 양배추즙, 토마토즙, 대추즙, 헛개진액, 수제청, 포스파티딜세린, 올리브오일, 게이밍 컴퓨터의자, 꼬막, 방수앞치마, 유리문 도어락, 무타공 도어락, 모기퇴치기, 해충 퇴치기, 드레이프블라우스, 명함제작, 스티커제작, 잔더, Onliv, 스토어 알림받기, 아이티시스템 (저장 후 주차장 URL), 강재인 (저장 후 주차장 URL), 인천이혼전문변호사 (저장 후 주차장 URL), 다이아XXXX (저장 후 주차장 URL), 푸슈 (저장 후 주차장 URL), 일산보청기 (저장 후 주차장 URL), 미사 피부과 병원 미엘 (저장 후 주차장 URL), 수원중고차 (저장 후 주차장 URL), 인천제일바다낚시 (저장 후 주차장 URL), 라플로르드무아 (저장 후 주차장 URL), 창원세무사 조영빈 사무소 (저장 후 주차장 URL), 대전유리창청소 (저장 후 주차장 URL), 부천한방병원 차오름 (명소찾기), 강남수입차정비 내화모터스 (명소찾기), 에피소X XX출 (저장 후 주차장 URL), [간편참여] 특가요정, 락앤락 첫구매 이벤트, 상세페이지제작, 대전 비상주사무실
-# Mr.Shipping (ads_name: Mr.Shipping, ads_save_way: 참여) : 어떤 카테고리인지 불분명, 추가 검토 필요
-# Travel 포캐스트, 헬씨 포캐스트 (ads_save_way: 결제 및 콘텐츠 이용) : 콘텐츠/여행/서비스 등 복합적, 추가 검토 필요
-# 사주링 맞추기, 닥터초이스맞추기, 스탠드다리미, 가정용천국의계단, 침구청소기, 패러글라이딩, 습자지 맞추기, 프랭클린 이염방지시트 맞추기, 해님 젖병소독기 맞추기, 해님UVLED젖병소독기4세대 맞추기, 에어힐러자차청정기 맞추기, 유럽미장, 유럽미장셀프, 규조토페인트, 등 "퀴즈 맞추기"류 : 콘텐츠/앱테크/기타 등 분류 애매, 추가 검토 필요
-# 강재인, 인천이혼전문변호사, 다이아XXXX, 푸슈, 에피소X 등 (ads_save_way: 퀴즈 정답 맞추기, ads_name에 (저장 후 주차장 URL) 포함) : 분류 불명확, 추가 검토 필요
-# - Mr.Shipping (참여, ads_name: Mr.Shipping) : 어떤 카테고리인지 불분명, 추가 검토 필요
-
-
-# 5.'SNS/커뮤니케이션' 도메인 분류 실행
-keywords_sns = ['페이스북', '인스타', '채팅', '친구', '동네', '소개팅', '데이팅', '골드스푼', '여보야', '팬더티비', '상담', '라임', '카페', '카카오톡', '후엠아이','여보랑','비긴즈','커넥트 CONNECT']
-exclude_keywords_sns = []
-ads_list = categorize_domain(ads_list, 'SNS/커뮤니케이션', keywords_sns, search_columns, exclude_keywords=exclude_keywords_sns)
-
-
-# 7.'콘텐츠' 도메인 분류 실행
-keywords_content = ['탑툰', '웹툰', '미툰', '미노벨', '운세', '워치페이스', '파일썬', '웹하드', '애니툰', '포춘텔러','꿀밤티비', '꿀물티비', '핑크티비','토정비결','굿툰','TikTok','나의 커리어 DNA','천신','성향매핑', '커플케미', '영화리뷰','멜론팔로우', '궁합', '포춘쿠키','홀스브릿지','영화 보스','회원가입 후 결제','KWDA','투표권 +','포캐스트','사주']
-exclude_keywords_content = []
-ads_list = categorize_domain(ads_list, '콘텐츠', keywords_content, search_columns, exclude_keywords=exclude_keywords_content)
-
-# 8. '앱테크/리워드' 도메인 분류 실행
-keywords_apptech = ['앱테크', '돈버는', '리워드어플', '오토링', '짤', '아이부자', 'Cash Giraffe', 'Cash Cow', '파블로', '서베이','MyB','돈 버는 미션','판도라박스', '도형그리기', '박스찾기', '시간잡기','서베이']
-exclude_keywords_apptech = []
-ads_list = categorize_domain(ads_list, '앱테크/리워드', keywords_apptech, search_columns, exclude_keywords=exclude_keywords_apptech)
-
-
-# 10. '유틸리티/툴' 도메인 분류 실행
-keywords_util = ['통화녹음', '익시오', 'AI', '뤼튼', '구독', '체크플러스']
-exclude_keywords_util = []
-ads_list = categorize_domain(ads_list, '유틸리티/툴', keywords_util, search_columns, exclude_keywords=exclude_keywords_util)
-
-# 11. '지역/상점' 도메인 분류 실행
-keywords_local = ['맛집', '식당', '점', '시장', '휘트니스', '쭈앤쭈', '족발선생',
-'소곱판','박가네 빈대떡','풍년옥','철판집','청류','지도','플레이스','연남동',
-'방이별관','카카오맵','공항', '클럽', '스튜디오','잠실','그래한의원','신의주찹쌀순대','라 스위스 서촌',
-'의원','PT 청라','숙성회','서촌', '한의원', '순대', '쭈꾸미', '막국수','포항', '계곡', '테라피','캄왁싱','이지은웨딩','제주 이모카세',
-'수성구 치과', '강남 하수구뚫음', '두정역 메이크업 속눈썹', '불당동 윤곽관리', '봉선동돼지갈비','제주 장어정식', '광주 첨단 갈매기살', '제주 외도동 물회', '외도동 횟집' ,'대전유리창청소', '한남동 인터내셔널 필라테스' , '수원중고차',
-# 신규 추가: 미분류 데이터에서 추출된 지역/상점 키워드
-'치과', '고깃집', '술집', '이자카야', '헬스장', '케이크', '가족사진', '맞춤정장', '요트투어', '보청기', '피부과', '병원', '미엘', '바다낚시', '세무사', '사무소', '유리창청소', '한방병원', '수입차정비', '모터스', '냉면', '숙성명작', '평양냉면', '여수', '구미', '충주', '용산', '광안리', '진주', '가좌', '칠암동', '진해', '초천동', '진주혁신도시', '굴포천역', '수원역', '강서', '가정동', '일산', '인천', '달항아리', '청라', '부산', '동래역', '랍스타', '고양시', '중앙로', '노량진고시원', '안양 정형외과', '대구 정형외과', '경산시 중산동', '연남 초야', '구리 비뇨기과', '피지컬방이헬스', '경남 아파트']
-exclude_keywords_local = []
-ads_list = categorize_domain(
-    ads_list, 
-    '지역/상점', 
-    keywords_local, 
-    search_columns, 
-    exclude_keywords=exclude_keywords_local
-)
-
-# 12. '기타' 도메인 분류 실행
-# 기타 내부에 속하는 도메인 -> 보안, 뉴스
-keywords_etc = ['뉴스','충청남도','다함께차차차','피싱', 'OTP', '안심', '스마트사인', '인증', '범죄알리미', '약속번호','원키퍼','렌트카',
-'로그인보호서비스','차차차','보호','사람인','리본카','보안플러스','건강지키미','종합광고대행사','캐디톡','인크루트','네이버맵','정답 미션','붙임머리', '치료', '블로그', '마케팅','제로네이트','법무사','알바천국', '알바몬', '인터넷가입', '누수', '국무조정실','국가', '붙임머리', '치료', '블로그', '마케팅', '입주청소']
-exclude_keywords_etc = []
-ads_list = categorize_domain(
-    ads_list,
-    '기타',
-    keywords_etc,
-    search_columns,
-    exclude_keywords=exclude_keywords_etc
-)
-
-# 이제까지 분류되지 않은(nan) 모든 행을 '기타'로 할당합니다.
-ads_list.loc[ads_list['domain'].isna(), 'domain'] = '기타'
+# --- 도메인 분류 ---
+# 도메인별 포함/제외 키워드와 우선순위는 domain_classifier.DOMAIN_RULES, 미분류는 '기타'
+ads_list['domain'] = ads_feats['domain']
 
 
 # --- 최종 결과 확인 ---
@@ -301,17 +59,8 @@ for domain in ads_list['domain'].dropna().unique():
 # In[5]:
 
 
-conditions = [
-    # 3단계: 최종 수익 창출 (구매, 게임(특정퀘스트))
-    (ads_list['ads_type'].isin([9, 12])) | (ads_list['ads_category'].isin([5, 6, 10, 11])),
-    # 2단계: 행동 유도 (설치, 실행, 참여, 퀴즈, 구독 등)
-    (ads_list['ads_type'].isin([1, 2, 3, 7, 11])) | (ads_list['ads_category'].isin([1, 2, 3, 4, 7, 8])),
-    # 1단계: 단순 노출 및 클릭
-    (ads_list['ads_type'].isin([4, 5, 6, 8, 10]))
-]
-values = [3, 2, 1]
-# 3. numpy.select를 사용하여 새로운 컬럼 생성
-ads_list['ads_category_id'] = np.select(conditions, values, default=0)
+# 광고 단계 (3: 최종 수익 창출, 2: 행동 유도, 1: 단순 노출 및 클릭)
+ads_list['ads_category_id'] = ads_feats['ads_3step']
 
 
 # In[6]:
@@ -548,26 +297,34 @@ df_day.info()
 # 오늘 날짜
 end_date = pd.to_datetime("2025-08-29")
 
-filled_list = []
-
-for uid, group in df_day.groupby("unique_id"):
-    # 아이디별 시작 날짜 ~ 8/29까지 생성
-    start_date = group['rpt_time_date'].min()
-    all_dates = pd.date_range(start=start_date, end=end_date, freq="D")
-
-    # 날짜 기준으로 reindex
-    g = group.set_index("rpt_time_date").reindex(all_dates)
-
-    # flag: 기존 데이터 있으면 1, 없으면 0
-    g["flag"] = g["turn_sum"].notna().astype(int)
+def fill_daily_gaps(df, end_date, id_col="unique_id", date_col="rpt_time_date",
+                    value_col="turn_sum", static_cols=()):
+    """
+    id별 첫 날짜 ~ end_date 일 단위 격자를 repeat/arange로 한 번에 만들고, 관측값은 left merge 1회로 붙인다.
+    flag: value_col이 있으면 1, 없으면 0 / static_cols(광고·매체 고정값)는 빈 날짜에 id별 값으로 채움.
+    """
+    start = df.groupby(id_col)[date_col].min()
+    n_days = np.clip((end_date - start).dt.days.to_numpy() + 1, 0, None)
+    first = np.repeat(np.cumsum(n_days) - n_days, n_days)          # id별 격자 시작 위치
+    day = (np.arange(n_days.sum()) - first).astype("timedelta64[D]")
+    grid = pd.DataFrame({
+        date_col: np.repeat(start.to_numpy(), n_days) + day,
+        id_col: np.repeat(start.index.to_numpy(), n_days),
+    })
 
-    # ID 다시 넣기
-    g["unique_id"] = uid
-    g = g.reset_index().rename(columns={"index": "rpt_time_date"})
+    out = grid.merge(df, on=[id_col, date_col], how="left")
+    out["flag"] = out[value_col].notna().astype(int)
 
-    filled_list.append(g)
+    # 고정값: id별 값 조회 (관측된 날은 원래 값 유지)
+    if len(static_cols):
+        static = df.groupby(id_col)[list(static_cols)].first()
+        miss = out["flag"].to_numpy() == 0
+        pos = np.repeat(np.arange(len(start)), n_days)[miss]
+        for c in static_cols:
+            out.loc[miss, c] = static[c].to_numpy()[pos]
+    return out
 
-df_filled = pd.concat(filled_list, ignore_index=True)
+df_filled = fill_daily_gaps(df_day, end_date, static_cols=['ads_idx','mda_idx','ads_category_id','domain'])
 
 print(df_filled.head(15))
 
@@ -581,10 +338,7 @@ df_filled.isna().sum()
 # In[24]:
 
 
-# 고정값 채우기 (광고별/매체별 단위)
-df_filled[['ads_idx','mda_idx','ads_category_id','domain']] = (
-    df_filled.groupby('unique_id')[['ads_idx','mda_idx','ads_category_id','domain']].ffill().bfill()
-)
+# 고정값(광고별/매체별 단위)은 fill_daily_gaps에서 id별 조회로 채움
 
 # 수치형 지표는 0으로
 cols_num = ['turn_sum']
@@ -649,187 +403,79 @@ df_feat
 
 
 
-# ### 평균 관련 피처들
+# ### 평균 관련 피처들 + 시차피처화
 
 # In[30]:
 
 
-import gc
+# 시차 피처 명세: (값 컬럼, 그룹 키, 시차 수, 평균 기준 키)
+# - 평균 기준 키가 있으면 값 = ['rpt_time_date'] + 평균 기준 키로 그룹화한 일별 평균 전환수('{키}_mean_turn')
+#   평균 컬럼 자체는 결과에 남기지 않고 시차만 남김
+# - 그룹 키 기준으로 정렬 후 shift, 결측(그룹 첫 날들)은 0
+LAG_SPECS = [
+    ('turn_sum',                           ['ads_idx', 'mda_idx'],         3, None),
+    ('turn_day_count',                     ['ads_idx', 'mda_idx'],         3, None),
+    ('ads_idx_mean_turn',                  ['mda_idx'],                    3, ['ads_idx']),
+    ('ads_idx/ads_category_id_mean_turn',  ['mda_idx', 'ads_category_id'], 3, ['ads_idx', 'ads_category_id']),
+    ('mda_idx_mean_turn',                  ['mda_idx'],                    3, ['mda_idx']),
+    ('mda_idx/ads_category_id_mean_turn',  ['mda_idx', 'ads_category_id'], 3, ['mda_idx', 'ads_category_id']),
+]
 
-def add_mean_features(df, mean_features, idx_features):
-    # 기준 피처 확인 
-    assert (idx_features[0] == 'rpt_time_date') and \
-           len(idx_features) in [2, 3]
-    
-    # 파생 피처명 설정 
-    if len(idx_features) == 2:
-        feature_name = idx_features[1] + '_mean_turn'
-    else:
-        feature_name = idx_features[1] + '/' + idx_features[2] + '_mean_turn'
-    
-    # 기준 피처를 토대로 그룹화해 월간 평균 판매량 구하기 
-    group = df.groupby(idx_features).agg({'turn_sum': 'mean'})
-    group = group.reset_index()
-    group = group.rename(columns={'turn_sum': feature_name})
-    
-    # df와 group 병합 
-    df = df.merge(group, on=idx_features, how='left')
-    # 데이터 다운캐스팅 
+def build_lag_features(df, specs, date_col='rpt_time_date', base_col='turn_sum'):
+    """
+    LAG_SPECS 명세 (값 컬럼, 그룹 키, 시차 수, 평균 기준 키)를 순서대로 처리해
+    '{값 컬럼}_lag{i}' 시차 피처를 float32 블록 1장에 기록하고, 마지막에 행 순서만 1회 적용.
+    - 평균 기준 키가 있는 명세는 [date_col] + 기준 키별 base_col 일 평균을 값으로 사용 (평균 컬럼은 남기지 않음)
+    - 다운캐스팅은 시작할 때 1회 (평균도 다운캐스팅된 base_col로 계산)
+    - 정렬은 그룹 키 세트가 바뀔 때만, 직전 순서 기준 안정 정렬
+      (명세 순서대로 [그룹 키 + date_col] 정렬을 이어 적용한 것과 같은 행 순서 → 같은 날짜 동률 행의 shift 결과도 동일)
+    - shift는 정렬된 정수 그룹 코드의 그룹 시작 위치로 계산 (전체 복사 없음), 그룹 첫 날들의 결측은 0
+    반환: (시차 피처가 붙은 df, 시차 피처 이름 목록)
+    """
     df = downcast(df, verbose=False)
-    # 새로 만든 feature_name 피처명을 mean_features 리스트에 추가 
-    mean_features.append(feature_name)
-    
-    # 가비지 컬렉션
-    del group
-    gc.collect()
-    
-    return df, mean_features
+    n = len(df)
+    names = [f"{col}_lag{i}" for col, _, nlags, _ in specs for i in range(1, nlags + 1)]
+    block = np.zeros((n, len(names)), dtype='float32')
+
+    order, keys_prev, k = np.arange(n), None, 0
+    for col, keys, nlags, mean_keys in specs:
+        if mean_keys is not None:
+            values = df.groupby([date_col] + mean_keys)[base_col].transform('mean').to_numpy()
+        else:
+            values = df[col].to_numpy()
+
+        if keys != keys_prev:
+            sort_cols = [df[c].to_numpy()[order] for c in reversed(keys + [date_col])]
+            order = order[np.lexsort(sort_cols)]
+            codes = df.groupby(keys, sort=False).ngroup().to_numpy()[order]
+            head = np.r_[True, codes[1:] != codes[:-1]] if n else np.zeros(0, dtype=bool)
+            start = np.maximum.accumulate(np.where(head, np.arange(n), 0))
+            keys_prev = keys
+
+        v = values[order].astype('float64')
+        for i in range(1, nlags + 1):
+            src = np.arange(n) - i
+            ok = src >= start
+            lag = np.where(ok, v[np.maximum(src, 0)], np.nan)
+            block[order, k] = np.where(np.isnan(lag), 0, lag)
+            k += 1
+
+    out = pd.concat([df, pd.DataFrame(block, columns=names, index=df.index)], axis=1)
+    return out.take(order), names
 
 
 # In[31]:
 
 
-# 그룹화 기준 피처 중 'ads_idx'가 포함된 파생 피처명을 담을 리스트
-ads_mean_features = []
-
-# ['rpt_time_date', 'ads_idx']로 그룹화한 월간 평균 판매량 파생 피처 생성
-df_feat, ads_mean_features = add_mean_features(df=df_feat,
-                                                 mean_features=ads_mean_features,
-                                                 idx_features=['rpt_time_date', 'ads_idx'])
-
-# ['rpt_time_date', 'ads_idx', 'ads_category_id']로 그룹화한 월간 평균 판매량 파생 피처 생성
-df_feat, ads_mean_features = add_mean_features(df=df_feat,
-                                                 mean_features=ads_mean_features,
-                                                 idx_features=['rpt_time_date', 'ads_idx', 'ads_category_id'])
+df_feat, lag_features = build_lag_features(df_feat, LAG_SPECS)
 
 
 # In[32]:
 
 
-mda_mean_features = []
-
-# ['rpt_time_date', 'mda_idx']로 그룹화한 월간 평균 판매량 파생 피처 생성
-df_feat, mda_mean_features = add_mean_features(df=df_feat,
-                                                 mean_features=mda_mean_features,
-                                                 idx_features=['rpt_time_date', 'mda_idx'])
-
-# ['rpt_time_date', 'mda_idx', 'ads_category_id']로 그룹화한 월간 평균 판매량 파생 피처 생성
-df_feat, mda_mean_features = add_mean_features(df=df_feat,
-                                                 mean_features=mda_mean_features,
-                                                 idx_features=['rpt_time_date', 'mda_idx', 'ads_category_id'])
-
-
-# ## 시차피처화
-
-# In[33]:
-
-
-def add_lag_features(df, lag_features_to_clip, idx_features, 
-                     lag_feature, nlags=3, clip=False):
-    # 정렬 필수
-    df = df.sort_values(idx_features + ['rpt_time_date']).copy()
-
-    for i in range(1, nlags+1):
-        lag_feature_name = f"{lag_feature}_lag{i}"
-
-        # 그룹별 shift + NA를 0으로 처리
-        df[lag_feature_name] = (
-            df.groupby(idx_features)[lag_feature]
-              .shift(i)
-              .fillna(0)
-        )
-
-        if clip:
-            lag_features_to_clip.append(lag_feature_name)
-
-    return df, lag_features_to_clip
-
-
-# In[34]:
-
-
-# turn_sum의 시차 피처
-lag_features = [] # 시차 피처명을 담을 리스트
-idx_features = ["ads_idx", "mda_idx"] # 기준 피처
-
-# idx_features를 기준으로 월간 판매량의 세 달치 시차 피처 생성
-df_feat, lag_features = add_lag_features(df=df_feat, 
-                                                  lag_features_to_clip=lag_features,
-                                                  idx_features=idx_features,
-                                                  lag_feature='turn_sum', 
-                                                  nlags=3,
-                                                  clip=False) 
-
-
-# In[35]:
-
-
-# turn_day_count의 시차 피처
-lag_features = [] # 시차 피처명을 담을 리스트
-idx_features = ["ads_idx", "mda_idx"] # 기준 피처
-
-# idx_features를 기준으로 월간 판매량의 세 달치 시차 피처 생성
-df_feat, lag_features = add_lag_features(df=df_feat, 
-                                                  lag_features_to_clip=lag_features,
-                                                  idx_features=idx_features,
-                                                  lag_feature='turn_day_count', 
-                                                  nlags=3,
-                                                  clip=False) 
-
-
-# In[36]:
-
-
-df_feat = downcast(df_feat, verbose=False)
-
-
-# In[37]:
-
-
 df_feat.info()
 
 
-# In[38]:
-
-
-# idx_features를 기준으로 월간 판매량의 세 달치 시차 피처 생성
-df_feat, lag_features = add_lag_features(df=df_feat, 
-                                                  lag_features_to_clip=lag_features,
-                                                  idx_features=['mda_idx'],
-                                                  lag_feature='ads_idx_mean_turn', 
-                                                  nlags=3,
-                                                  clip=False)
-
-# idx_features를 기준으로 월간 판매량의 세 달치 시차 피처 생성
-df_feat, lag_features = add_lag_features(df=df_feat, 
-                                                  lag_features_to_clip=lag_features,
-                                                  idx_features=['mda_idx', 'ads_category_id'],
-                                                  lag_feature='ads_idx/ads_category_id_mean_turn', 
-                                                  nlags=3,
-                                                  clip=False)
-df_feat = df_feat.drop(ads_mean_features, axis=1)
-
-
-# In[39]:
-
-
-# idx_features를 기준으로 월간 판매량의 세 달치 시차 피처 생성
-df_feat, lag_features = add_lag_features(df=df_feat, 
-                                                  lag_features_to_clip=lag_features,
-                                                  idx_features=['mda_idx'],
-                                                  lag_feature='mda_idx_mean_turn', 
-                                                  nlags=3,
-                                                  clip=False)
-# idx_features를 기준으로 월간 판매량의 세 달치 시차 피처 생성
-df_feat, lag_features = add_lag_features(df=df_feat, 
-                                                  lag_features_to_clip=lag_features,
-                                                  idx_features=['mda_idx', 'ads_category_id'],
-                                                  lag_feature='mda_idx/ads_category_id_mean_turn', 
-                                                  nlags=3,
-                                                  clip=False)
-df_feat = df_feat.drop(mda_mean_features, axis=1)
-
-
 # In[40]:
 
 
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+어뷰징 파이프라인 산출물 읽기(공용) — 광고비 예측 / 신규 광고 매체 추천 스크립트와 현황 대시보드 노트북이 함께 사용.
+
+- 정상/어뷰징 분리 결과는 abuse_end가 abuse_store.write_partitions로 저장한 파티션 파일만 읽는다.
+- 파티션 경로·확장자(Parquet, pyarrow가 없으면 pickle)는 abuse_store(PART_DIR, EXT)를 따르므로 소비자가 하드코딩하지 않는다.
+"""
+
+import os
+import sys
+
+ABUSE_CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Abuse Detection Code")
+if ABUSE_CODE_DIR not in sys.path:
+    sys.path.append(ABUSE_CODE_DIR)
+
+import abuse_store
+
+
+def read_clean(table: str, columns=None):
+    """정상 파티션(part=clean)만 읽기. 어뷰징 파이프라인(abuse_end)이 먼저 실행돼 있어야 한다."""
+    return abuse_store.read_partition(table, "clean", columns=columns)
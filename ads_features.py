@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+광고 목록(ads_list) 피처 테이블(공용) — 광고비 예측 / 신규 광고 매체 추천 스크립트와 현황 대시보드 노트북이 함께 사용.
+
+- 광고 단위 피처(테스트 광고 여부, domain, ads_3step, 참여 비용, 유료 여부, ads_length, age_limit/gender_limit)를
+  한 번 계산해 컬럼형 파일(Parquet, pyarrow가 없으면 pickle)로 보관하고 모든 소비자가 같은 값을 받아 간다.
+- 행 키(_row_key) = 입력 컬럼(INPUT_COLS) 내용 해시. 캐시에 같은 키가 있으면 재사용하고,
+  새로 생기거나 내용이 바뀐 ads_idx 행만 다시 계산해 캐시에 합친다(바뀐 ads_idx의 이전 행은 교체).
+- 캐시 파일명에 키워드/패턴 설정 해시(version)를 넣어, DOMAIN_RULES 등이 바뀌면 새 파일에서 전체 재계산.
+- 원천 목록(source)마다 캐시 파일 1개: {CACHE_DIR}/{source}-{version}.
+- 모든 피처는 행 단위 계산이라 소비자별 필터(aff_idx 등) 전후 어느 쪽에서 계산해도 같은 값.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from domain_classifier import DOMAIN_RULES, SEARCH_COLUMNS, classify_domains
+from ads_parsing import AGE_PATTERN, GENDER_PATTERN, parse_payment, limit_flags
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_ARROW = True
+except ImportError:
+    _HAS_ARROW = False
+
+# ===== 전역 파라미터 =====
+CACHE_DIR       = "_ads_features"   # 피처 캐시 디렉터리
+FEATURE_VERSION = 1                 # 계산 로직이 바뀌면 올린다(캐시 무효화)
+KEY_COL         = "_row_key"
+INPUT_COLS      = ['ads_idx', 'ads_name', 'ads_save_way', 'ads_type', 'ads_category',
+                   'ads_payment', 'ads_summary', 'ads_limit']
+FEATURE_COLS    = ['is_test_ad', 'domain', 'ads_3step', 'ads_payment_num', 'ads_paid',
+                   'ads_length', 'age_limit', 'gender_limit']
+
+TEST_PATTERN       = "테스트|서비스종료|삭제"
+VALID_TEST_PATTERN = "브레인 테스트|게임테스트"
+PAID_PATTERN       = "유료|구매|결제"
+EXT = ".parquet" if _HAS_ARROW else ".pkl"
+
+
+# ================= 피처 계산 =================
+def build_features(src: pd.DataFrame) -> pd.DataFrame:
+    """INPUT_COLS가 있는 광고 행 → [ads_idx] + FEATURE_COLS (src와 같은 행 순서)."""
+    out = pd.DataFrame({'ads_idx': src['ads_idx'].to_numpy()})
+
+    # 테스트 광고 (브레인 테스트/게임테스트는 정상 광고)
+    is_test_ad = src["ads_name"].str.contains(TEST_PATTERN, na=False, case=False)
+    is_valid_test_ad = src["ads_name"].str.contains(VALID_TEST_PATTERN, na=False, case=False)
+    out['is_test_ad'] = (is_test_ad & ~is_valid_test_ad).to_numpy()
+
+    # 도메인 (미분류는 '기타')
+    dom = src[SEARCH_COLUMNS].copy()
+    dom['domain'] = np.nan
+    dom = classify_domains(dom, verbose=False)
+    dom.loc[dom['domain'].isna(), 'domain'] = '기타'
+    out['domain'] = dom['domain'].to_numpy(dtype=object)
+
+    # 광고 단계 (3: 최종 수익 창출, 2: 행동 유도, 1: 단순 노출·클릭)
+    conditions = [
+        (src['ads_type'].isin([9, 12])) | (src['ads_category'].isin([5, 6, 10, 11])),
+        (src['ads_type'].isin([1, 2, 3, 7, 11])) | (src['ads_category'].isin([1, 2, 3, 4, 7, 8])),
+        (src['ads_type'].isin([4, 5, 6, 8, 10]))
+    ]
+    out['ads_3step'] = np.select(conditions, [3, 2, 1], default=0)
+
+    # 참여 비용: 만/천 단위 변환 → 괄호·문자 제거 → 숫자(변환 불가는 0)
+    out['ads_payment_num'] = parse_payment(src['ads_payment'])
+
+    # 유료 여부: 유료 키워드 또는 원문 숫자 > 0
+    paid_kw = src['ads_payment'].astype(str).str.contains(PAID_PATTERN, na=False)
+    paid_num = pd.to_numeric(src['ads_payment'], errors='coerce') > 0
+    out['ads_paid'] = (paid_kw | paid_num).astype(int).to_numpy()
+
+    out['ads_length'] = src['ads_summary'].str.len().astype(float).to_numpy()
+
+    # 나이/성별 제한 (결측은 '제한없음' → 0)
+    out['age_limit'], out['gender_limit'] = limit_flags(src['ads_limit'])
+    return out
+
+
+# ================= 캐시 =================
+def config_version() -> str:
+    """키워드/패턴 설정 + FEATURE_VERSION 해시."""
+    cfg = [FEATURE_VERSION, DOMAIN_RULES, SEARCH_COLUMNS, INPUT_COLS,
+           TEST_PATTERN, VALID_TEST_PATTERN, PAID_PATTERN, AGE_PATTERN, GENDER_PATTERN]
+    return hashlib.sha1(json.dumps(cfg, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+
+def row_keys(ads_list: pd.DataFrame) -> np.ndarray:
+    """입력 컬럼 내용 해시(uint64, 행 단위)."""
+    return pd.util.hash_pandas_object(ads_list[INPUT_COLS], index=False).to_numpy()
+
+def _cache_path(source: str) -> str:
+    return os.path.join(CACHE_DIR, f"{source}-{config_version()}{EXT}")
+
+def _read_cache(source: str) -> pd.DataFrame:
+    p = _cache_path(source)
+    if not os.path.exists(p):
+        return pd.DataFrame(columns=[KEY_COL, 'ads_idx'] + FEATURE_COLS)
+    return pd.read_parquet(p) if _HAS_ARROW else pd.read_pickle(p)
+
+def _write_cache(source: str, cache: pd.DataFrame) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    p = _cache_path(source)
+    tmp = p + ".tmp"
+    if _HAS_ARROW:
+        cache.to_parquet(tmp, index=False)
+    else:
+        cache.to_pickle(tmp)
+    os.replace(tmp, p)
+    for f in os.listdir(CACHE_DIR):   # 이전 설정 버전 파일 정리
+        if f.startswith(source + "-") and os.path.join(CACHE_DIR, f) != p:
+            os.remove(os.path.join(CACHE_DIR, f))
+
+def materialize(ads_list: pd.DataFrame, source: str) -> pd.DataFrame:
+    """ads_list 행 순서에 맞춘 피처 테이블(index = ads_list.index). 캐시에 없는 행만 계산."""
+    keys = row_keys(ads_list)
+    cache = _read_cache(source)
+    hit = pd.Index(keys).isin(cache[KEY_COL].astype("uint64"))
+    if (~hit).any():
+        _, first = np.unique(keys[~hit], return_index=True)
+        todo = ads_list[~hit].iloc[np.sort(first)]
+        new = build_features(todo)
+        new.insert(0, KEY_COL, row_keys(todo))
+        cache = cache[~cache['ads_idx'].isin(new['ads_idx'])]   # 바뀐 ads_idx의 이전 행 교체
+        cache = new if cache.empty else pd.concat([cache, new], ignore_index=True)
+        _write_cache(source, cache)
+    print(f"[ads_features] {source}: 캐시 {int(hit.sum()):,}행 / 신규·변경 {int((~hit).sum()):,}행 계산")
+
+    feats = cache.drop_duplicates(KEY_COL).set_index(KEY_COL).reindex(keys)
+    feats.index = ads_list.index
+    return feats[FEATURE_COLS]
+
+def load_features(ads_list: pd.DataFrame, source: str, drop_test: bool = True) -> tuple:
+    """
+    (테스트 광고를 뺀 ads_list 복사본, 같은 index의 피처 테이블).
+    소비자는 필요한 피처만 자기 컬럼명으로 붙인다: ads_list['domain'] = feats['domain']
+    """
+    feats = materialize(ads_list, source)
+    if drop_test:
+        keep = ~feats['is_test_ad'].astype(bool).to_numpy()
+        ads_list, feats = ads_list[keep].copy(), feats[keep]
+    feats = feats.astype({'is_test_ad': bool, 'ads_3step': 'int64', 'ads_paid': 'int64',
+                          'age_limit': 'int64', 'gender_limit': 'int64', 'ads_payment_num': float})
+    if feats['ads_length'].notna().all():   # 요약 결측이 없으면 str.len()과 같은 정수형
+        feats = feats.astype({'ads_length': 'int64'})
+    return ads_list, feats
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+광고 목록 텍스트 파싱(공용) — 참여 비용(ads_payment), 나이/성별 제한(ads_limit), 앱/웹 구분(ads_os_type).
+
+- 행마다 .apply + re.search를 돌리지 않고, 고유 문자열만 factorize → 미리 컴파일한 패턴으로
+  str.extract/str.replace 일괄 처리 → codes로 펼친다. 비용은 행 수가 아니라 고유 문자열 수에 비례.
+- 결과는 기존 행 단위 함수(convert_korean_units → 괄호·문자 제거 → to_numeric, re.search 플래그)와 같다.
+- 벤치마크: python ads_parsing.py [df_list_v1.csv] → 전체 광고 목록에서 기존/벡터화 행당 비용(µs) 비교.
+"""
+
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# ===== 전역 파라미터 =====
+AGE_PATTERN    = r'(\d+세|\d+대|\d+~\d+세|\d세+~\d+세)'
+GENDER_PATTERN = r'(남성|여성|남녀)'
+NO_LIMIT       = '제한없음'   # ads_limit 결측 대체값
+WEB_OS_TYPE    = 7            # ads_os_type 7 = 웹
+
+_NUMBER = re.compile(r'(\d+)')
+_PAREN  = re.compile(r'\(.*?\)')
+_NON_NUM = re.compile(r'[^0-9.]')
+_UNITS  = (('만', 10000), ('천', 1000))   # 앞 단위가 우선
+
+
+# ================= 행 단위 기준 구현 =================
+def convert_korean_units(text):
+    """'3만원' → 30000, '5천원' → 5000 (만/천 단위가 없으면 문자열 그대로)."""
+    text = str(text)
+    if '만' in text:
+        number = re.search(r'\d+', text)
+        return int(number.group()) * 10000 if number else text
+    elif '천' in text:
+        number = re.search(r'\d+', text)
+        return int(number.group()) * 1000 if number else text
+    return text
+
+
+# ================= 벡터화 =================
+def _unique_strings(values) -> tuple:
+    """values → (codes, 고유값별 str(x) Series). 결측도 하나의 값('nan')으로 본다."""
+    codes, uniq = pd.factorize(pd.Series(np.asarray(values, dtype=object)), use_na_sentinel=False)
+    return codes, pd.Series([str(v) for v in uniq], dtype=object)
+
+def parse_payment(values) -> np.ndarray:
+    """
+    참여 비용 → float64 금액 (변환 불가는 0).
+    만/천이 있고 숫자가 있으면 첫 숫자 × 단위, 아니면 괄호 안 내용과 숫자·'.' 외 문자를 지운 값.
+    """
+    codes, u = _unique_strings(values)
+    cleaned = u.str.replace(_PAREN, '', regex=True).str.replace(_NON_NUM, '', regex=True)
+    amount = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype='float64')
+
+    first = u.str.extract(_NUMBER, expand=False)   # 전각 숫자 등 유니코드 숫자도 int()로 변환(re.search와 동일)
+    first = np.array([int(x) if isinstance(x, str) else np.nan for x in first], dtype='float64')
+    unit = np.select([u.str.contains(k, regex=False).to_numpy(dtype=bool) for k, _ in _UNITS],
+                     [m for _, m in _UNITS], default=0)
+    amount = np.where((unit > 0) & ~np.isnan(first), first * unit, amount)
+    return np.nan_to_num(amount, nan=0.0)[codes]
+
+def limit_flags(values) -> tuple:
+    """ads_limit → (age_limit, gender_limit) int 배열 (결측은 '제한없음' → 0)."""
+    codes, u = _unique_strings(pd.Series(np.asarray(values, dtype=object)).fillna(NO_LIMIT))
+    age = u.str.extract(AGE_PATTERN, expand=False).notna().to_numpy().astype(int)
+    gender = u.str.extract(GENDER_PATTERN, expand=False).notna().to_numpy().astype(int)
+    return age[codes], gender[codes]
+
+def web_flag(values) -> np.ndarray:
+    """ads_os_type → 웹(7)이면 1, 그외(앱·결측) 0."""
+    return (pd.Series(np.asarray(values)) == WEB_OS_TYPE).to_numpy().astype(int)
+
+
+# ================= 벤치마크 =================
+def _rowwise(ads_list: pd.DataFrame) -> dict:
+    """기존 행 단위 구현 (비교 기준)."""
+    pay = ads_list['ads_payment'].apply(convert_korean_units).astype(str)
+    pay = pay.str.replace(r'\(.*?\)', '', regex=True).str.replace(r'[^0-9.]', '', regex=True)
+    limit = ads_list['ads_limit'].fillna(NO_LIMIT).astype(str)
+    age_pattern, gender_pattern = re.compile(AGE_PATTERN), re.compile(GENDER_PATTERN)
+    return {
+        'ads_payment': pd.to_numeric(pay, errors='coerce').fillna(0).astype(float).to_numpy(),
+        'age_limit': limit.apply(lambda x: 1 if re.search(age_pattern, x) else 0).astype(int).to_numpy(),
+        'gender_limit': limit.apply(lambda x: 1 if re.search(gender_pattern, x) else 0).astype(int).to_numpy(),
+        'ads_os_type': ads_list['ads_os_type'].apply(lambda x: 1 if x == 7 else 0).astype(int).to_numpy(),
+    }
+
+def _vectorized(ads_list: pd.DataFrame) -> dict:
+    age, gender = limit_flags(ads_list['ads_limit'])
+    return {'ads_payment': parse_payment(ads_list['ads_payment']),
+            'age_limit': age, 'gender_limit': gender,
+            'ads_os_type': web_flag(ads_list['ads_os_type'])}
+
+def benchmark(ads_list: pd.DataFrame, repeat: int = 3) -> pd.DataFrame:
+    """기존/벡터화 구현의 행당 비용(µs, repeat회 중 최소)과 결과 일치 여부."""
+    res, out = {}, {}
+    for name, fn in (('rowwise', _rowwise), ('vectorized', _vectorized)):
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out[name] = fn(ads_list)
+            best = min(best, time.perf_counter() - t0)
+        res[name] = best
+    n = max(len(ads_list), 1)
+    same = all(np.array_equal(out['rowwise'][k], out['vectorized'][k]) for k in out['rowwise'])
+    return pd.DataFrame({'rows': len(ads_list),
+                         'sec': [res['rowwise'], res['vectorized']],
+                         'us_per_row': [res['rowwise'] / n * 1e6, res['vectorized'] / n * 1e6],
+                         'same': same}, index=['rowwise', 'vectorized'])
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "df_list_v1.csv"
+    ads = pd.read_csv(path, usecols=['ads_payment', 'ads_limit', 'ads_os_type'])
+    print(benchmark(ads).round(3))